@@ -0,0 +1,124 @@
+import json
+
+import os
+import re
+import xml.etree.ElementTree as ET
+
+from exiftoolgui_configs import ExifToolGUIConfigs
+
+
+class ExifToolTagDefs:
+    _instance: 'ExifToolTagDefs' = None
+
+    @classmethod
+    @property
+    def Instance(cls) -> 'ExifToolTagDefs':
+        if cls._instance == None:
+            cls._instance = cls()
+        return cls._instance
+
+    # scalar numeric formats, whose values must look like numbers when print conversion is off (-n)
+    pattern_numeric_type: str = r"^(?:int\d+[us]|rational\d+[us]|fixed\d+[us]|float|double)$"
+    pattern_numeric_value: str = r"^[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?(?:/\d+)?$|^(?:inf|-inf|undef)$"
+
+    def __init__(self) -> None:
+        self.source_file: str = None
+        self.version: str = None
+        '''
+        Tag database built from ExifTool's tag listing (-listx).
+        Indexed by group (any of family 0, 1 and 2) and tag name, both in lower case:
+            {group: {tag: [type, writable, count]}}
+        '''
+        self.raw: dict[str, dict[str, list]] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.raw != None
+
+    def load(self, exiftool) -> None:
+        '''
+        Load the database cached for the running ExifTool version, or build it.
+        Building runs '-listx' once, which takes a few seconds.
+        '''
+        self.version = exiftool.execute('-ver').strip()
+        self.source_file = ExifToolGUIConfigs.Instance.file_exiftool_tag_defs.format(version=self.version)
+
+        if os.path.exists(self.source_file):
+            with open(self.source_file, mode="r", encoding='utf-8') as f:
+                self.raw = json.load(f)
+            return
+
+        listx: str = exiftool.execute('-listx', '-s', '-f')
+        self.raw = ExifToolTagDefs.Parse_Listx(listx)
+
+        os.makedirs(os.path.dirname(self.source_file), exist_ok=True)
+        with open(self.source_file, mode="w", encoding='utf-8') as f:
+            json.dump(self.raw, f, ensure_ascii=False)
+
+    @staticmethod
+    def Parse_Listx(listx: str) -> dict[str, dict[str, list]]:
+        tag_defs: dict[str, dict[str, list]] = {}
+
+        root = ET.fromstring(listx)
+        for table in root.iter('table'):
+            groups_table = [table.get(f'g{family}') for family in range(3)]
+
+            for tag in table.iter('tag'):
+                name: str = tag.get('name').lower()
+                tag_def: list = [tag.get('type', ''), tag.get('writable') == 'true', tag.get('count')]
+
+                for family in range(3):
+                    group: str = tag.get(f'g{family}', groups_table[family])
+                    if not group:
+                        continue
+                    tags: dict[str, list] = tag_defs.setdefault(group.lower(), {})
+
+                    # the same name may be defined more than once in a group, prefer the writable one
+                    tag_def_exist = tags.get(name, None)
+                    if tag_def_exist == None or (tag_def[1] and not tag_def_exist[1]):
+                        tags[name] = tag_def
+
+        return tag_defs
+
+    def find_tag(self, tag: str) -> list:
+        if not self.loaded:
+            return None
+
+        tag_s: list[str] = tag.lower().split(':')
+        if len(tag_s) < 2:
+            # without group, it's not sure which one is going to be written
+            return None
+
+        return self.raw.get(tag_s[0], {}).get(tag_s[-1], None)
+
+    def check(self, tag: str, value: str, numeric: bool = False) -> str:
+        '''
+        Return the reason if the value is known to be unsavable, otherwise None.
+        Unknown tags are left to ExifTool.
+        '''
+        tag_def = self.find_tag(tag)
+        if tag_def == None:
+            return None
+
+        type_, writable, count = tag_def
+
+        if not writable:
+            return f"{tag}: tag is not writable"
+
+        if numeric and value != '' and (count == None or count == '1') and re.match(ExifToolTagDefs.pattern_numeric_type, type_):
+            if not re.match(ExifToolTagDefs.pattern_numeric_value, str(value).strip()):
+                return f"{tag}: value of format '{type_}' is expected"
+
+        return None
+
+
+if __name__ == "__main__":
+    from exiftool.helper import ExifToolHelper
+
+    with ExifToolHelper(common_args=None) as exiftool:
+        t = ExifToolTagDefs.Instance
+        t.load(exiftool)
+
+    print(t.check('EXIF:DateTimeOriginal', '2023:07:08 20:09:10'))
+    print(t.check('Composite:ImageSize', '100x100'))
+    print(t.check('EXIF:ISO', 'abc', numeric=True))
@@ -1,5 +1,6 @@
+import os
 import sys
-from datetime import datetime, timezone
+from typing import Callable
 
 # from PySide6 import QtCore
 from PySide6.QtCore import *  # QFile, QUrl
@@ -13,14 +14,19 @@ from PySide6.QtGui import *  # QImage, QPixmap
 
 from exiftoolgui_configs import ExifToolGUIConfigs
 from exiftoolgui_data import ExifToolGUIData
+from exiftoolgui_dir_index import ExifToolGUIDirIndex
+from exiftoolgui_file_types import ExifToolGUIFileTypes
+from exiftoolgui_profiler import ExifToolGUIProfiler
+from exiftoolgui_stats import ExifToolGUIStats
 from exiftool_option_defs import ExifToolOptionDefs
 
 
 class ExifToolGUI(QObject):
 
-    dataLocker: QMutex = QMutex()
-
     metadataLoaded = Signal(int, int)
+    batchLoaded = Signal(object, int)
+    filesFound = Signal(object, int)
+    statusMessage = Signal(str)
     previewLoaded = Signal(QTableWidgetItem, QPixmap, int)
 
     def __init__(self) -> None:
@@ -42,7 +48,10 @@ class ExifToolGUI(QObject):
         # apply_stylesheet(self.app, theme='dark_teal.xml')
 
         self.configs: ExifToolGUIConfigs = ExifToolGUIConfigs.Instance
+        self.profiler: ExifToolGUIProfiler = ExifToolGUIProfiler.Instance
+        self.profiler.start()
         self.data: ExifToolGUIData = ExifToolGUIData.Instance
+        self.data.load_tag_defs()  # in the background, for preflight of edits
         self.exiftool_option_defs = ExifToolOptionDefs.Instance
 
         '''
@@ -66,6 +75,9 @@ class ExifToolGUI(QObject):
         self.load_tabs_for_single()
         self.load_comboBox_functions()
         self.init_exiftool_options()
+        self.init_watcher()
+        self.init_stats()
+        self.init_profiler()
 
         self.main_window.show()
 
@@ -73,6 +85,7 @@ class ExifToolGUI(QObject):
 
         self.reload_list_for_dirs()  # reload_table_for_group()
 
+        self.profiler.mark_idle()
         sys.exit(self.app.exec())
 
     '''################################################################
@@ -115,6 +128,10 @@ class ExifToolGUI(QObject):
     def button_rebuild(self) -> QPushButton:
         return self.main_window.findChild(QPushButton, 'button_rebuild')
 
+    @property
+    def statusbar(self) -> QStatusBar:
+        return self.main_window.findChild(QStatusBar, 'statusbar')
+
     @property
     def comboBox_functions(self) -> QComboBox:
         return self.main_window.findChild(QComboBox, 'comboBox_functions')
@@ -190,7 +207,7 @@ class ExifToolGUI(QObject):
         self.table_for_group.verticalScrollBar().setSingleStep(10)
         self.table_for_group.horizontalScrollBar().setSingleStep(10)
 
-    def reload_list_for_dirs(self):
+    def reload_list_for_dirs(self, streaming: bool = True):
 
         self.cleanup_threading()
 
@@ -201,11 +218,6 @@ class ExifToolGUI(QObject):
         '''
         QCoreApplication.processEvents()
 
-        '''
-        lock data IO
-        '''
-        QMutexLocker(ExifToolGUI.dataLocker)
-
         list_dirs: QListWidget = self.list_dirs
         print("done:    list_dirs=...")
         list_dirs.clear()
@@ -213,18 +225,37 @@ class ExifToolGUI(QObject):
         list_dirs.addItems(self.configs.dirs)
         print("done:    list_dirs.addItems(...)")
 
-        self.data.reload()
+        if self.configs.recursive and streaming:
+            # files are listed chunk by chunk while scanning, see on_filesFound
+            self.data.reload(files=[])
+            print("done:    data.reload(files=[])")
+            self.reload_table_for_group()
+            print("done:    reload_table_for_group()")
+            self.scanning = True
+            ScanTask(self.threading_flag, self)
+            self.reload_current_tree_for_single(initial=True)  # nessary
+            print("done:    reload_current_tree_for_single()")
+            self.update_watcher()
+            return
+
+        self.scanning = False
+        kept: dict[int, int] = self.data.reload()
         print("done:    data.reload()")
-        self.reload_table_for_group()
-        print("done:    reload_table_for_group()")
+        if len(kept) == 0 or self.table_for_group.rowCount() == 0:
+            self.reload_table_for_group()
+            print("done:    reload_table_for_group()")
+        else:
+            self.update_table_for_group(kept)
+            print("done:    update_table_for_group()")
         self.reload_current_tree_for_single(initial=True)  # nessary
         print("done:    reload_current_tree_for_single()")
+        self.update_watcher()
+        self.statusbar.showMessage(ExifToolGUIData.cache_pool.report())
 
     def reload_table_for_group(self):
 
         table: QTableWidget = self.table_for_group
 
-        # ExifToolGUI.dataLocker.lock()
         table.blockSignals(True)
         # table.setRowCount(0)
         table.clear()
@@ -239,45 +270,101 @@ class ExifToolGUI(QObject):
         # table.setVerticalHeaderLabels([str(x) for x in range(0, file_count)])
 
         for file_index in range(0, file_count):
+            self.set_row_for_group(file_index, file_index)
 
-            table.setRowHeight(file_index, 64)
+        # table.resizeColumnsToContents()
+        # table.resizeRowsToContents()
+        # if table.columnWidth(0) > 300:
+        #     table.setColumnWidth(0, 300)
 
-            if len(self.data.cache[file_index]) <= 1:
-                GetDataTask(self.threading_flag, file_index, self)
+        table.verticalHeader().setDefaultSectionSize(self.configs.preview_size)
+        table.horizontalHeader().setDefaultSectionSize(160)
+        table.setColumnWidth(0, 300)
 
-            for column in range(0, tags_count):
-                tag = tags[column]
+        table.blockSignals(False)
 
-                # value = self.data.get(file_index, tag, default='')
-                # delay value acquisition until the editing phase
-                value = ""
-                if tag == 'SourceFile':
-                    value = self.data.get(file_index, tag, default='')
+        # edit
+        self.edit_table_for_group(initial=True)
 
-                item = QTableWidgetItem(str(value))
+    def set_row_for_group(self, row: int, file_index: int):
+        table: QTableWidget = self.table_for_group
+        tags = self.configs.tags_for_group
 
-                item.setData(Qt.UserRole, {"file_index": file_index, "tag": tag, "gui": self})  # mark
+        table.setRowHeight(row, 64)
 
-                if tag == 'SourceFile':
-                    item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
+        if len(self.data.cache[file_index]) <= 1 and not self.data.is_ignored(file_index):
+            GetDataTask(self.threading_flag, file_index, self)
 
-                    GetPreviewTask(self.threading_flag, item, value, self.configs.preview_size, self.configs.preview_precision)
+        for column in range(0, len(tags)):
+            tag = tags[column]
 
-                table.setItem(file_index, column, item)
+            # value = self.data.get(file_index, tag, default='')
+            # delay value acquisition until the editing phase
+            value = ""
+            if tag == 'SourceFile':
+                value = self.data.get(file_index, tag, default='')
 
-        # table.resizeColumnsToContents()
-        # table.resizeRowsToContents()
-        # if table.columnWidth(0) > 300:
-        #     table.setColumnWidth(0, 300)
+            item = QTableWidgetItem(str(value))
 
-        table.verticalHeader().setDefaultSectionSize(self.configs.preview_size)
-        table.horizontalHeader().setDefaultSectionSize(160)
-        table.setColumnWidth(0, 300)
+            item.setData(Qt.UserRole, {"file_index": file_index, "tag": tag, "gui": self})  # mark
+
+            if tag == 'SourceFile':
+                item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
+
+                GetPreviewTask(self.threading_flag, item, value, self.configs.preview_size, self.configs.preview_precision)
+
+            table.setItem(row, column, item)
+
+    def append_rows_for_group(self, file_indexes: list[int]):
+        table: QTableWidget = self.table_for_group
+        table.blockSignals(True)
+        row = table.rowCount()
+        table.setRowCount(row + len(file_indexes))
+        for file_index in file_indexes:
+            self.set_row_for_group(row, file_index)
+            self.edit_row_for_group(row, initial=True)
+            row += 1
+        table.blockSignals(False)
+
+    def update_table_for_group(self, kept: dict[int, int]):
+        '''
+        Apply the diff of file list to table, instead of rebuilding every row.
+        Rows of files kept stay where they are (sorted or not), rows of files added are appended.
+        '''
+        table: QTableWidget = self.table_for_group
+        table.blockSignals(True)
+
+        for row in reversed(range(0, table.rowCount())):
+            file_index_old: int = table.item(row, 0).data(Qt.UserRole)['file_index']
+            if file_index_old not in kept:
+                table.removeRow(row)
+                continue
+
+            file_index: int = kept[file_index_old]
+            for column in range(0, table.columnCount()):
+                item = table.item(row, column)
+                user_data: dict[str,] = item.data(Qt.UserRole)
+                user_data['file_index'] = file_index
+                item.setData(Qt.UserRole, user_data)  # mark
+
+                if user_data['tag'] == 'SourceFile':
+                    item.setText(self.data.get(file_index, 'SourceFile', default=''))
+                    # tasks pending were cancelled by reloading
+                    if item.data(Qt.DecorationRole) == None:
+                        GetPreviewTask(self.threading_flag, item, item.text(), self.configs.preview_size, self.configs.preview_precision)
+
+            if len(self.data.cache[file_index]) <= 1 and not self.data.is_ignored(file_index):
+                GetDataTask(self.threading_flag, file_index, self)
+
+        file_indexes_kept = set(kept.values())
+        for file_index in range(0, len(self.data.cache)):
+            if file_index not in file_indexes_kept:
+                row = table.rowCount()
+                table.insertRow(row)
+                self.set_row_for_group(row, file_index)
 
         table.blockSignals(False)
-        # ExifToolGUI.dataLocker.unlock()
 
-        # edit
         self.edit_table_for_group(initial=True)
 
     # def set_table_for_group(self, file_indexs: list[int] = None):
@@ -301,6 +388,7 @@ class ExifToolGUI(QObject):
 
     #     table.blockSignals(False)
 
+    @ExifToolGUIStats.Timed()
     def sort_table_for_group(self, column):
         table = self.table_for_group
 
@@ -309,7 +397,7 @@ class ExifToolGUI(QObject):
         order = table.horizontalHeader().sortIndicatorOrder()
 
         h_tag = table.horizontalHeaderItem(column).text()
-        is_datetime = self.data.is_datetime(h_tag)
+        sort_value = self.data.sort_key(h_tag)
 
         current_item = table.currentItem()
         selected_items = table.selectedItems()
@@ -324,19 +412,8 @@ class ExifToolGUI(QObject):
 
         table.clearSelection()
 
-        def sort_value(row: list[QTableWidgetItem]):
-            value = row[column].text()
-            assert (value != None)
-            if is_datetime:
-                file_index: int = row[column].data(Qt.UserRole)['file_index']
-                tag: str = row[column].data(Qt.UserRole)['tag']
-                dt, _ = self.data.get_datetime(file_index, tag, value, self.configs.default_timezone)
-                return dt if dt else datetime.min.replace(tzinfo=timezone.utc)
-            else:
-                return value
-
         rows.sort(
-            key=lambda row: sort_value(row),
+            key=lambda row: sort_value(row[column].data(Qt.UserRole)['file_index'], row[column].text()),
             reverse=(order == Qt.DescendingOrder)
         )
 
@@ -731,6 +808,185 @@ class ExifToolGUI(QObject):
             options[option] = state
         self.configs.exiftool_options = options
 
+    '''################################################################
+    Watcher
+    ################################################################'''
+
+    def init_watcher(self):
+        '''
+        Directories are watched by the system where possible, others are polled.
+        Events are collected for a while before handled, since a single write of ExifTool
+        (temp file and rename) fires several of them.
+        '''
+        self.watcher: QFileSystemWatcher = QFileSystemWatcher(self)
+        self.dirs_changed: set[str] = set()
+        self.dirs_polled: list[str] = []
+        self.scanning: bool = False  # files still being found, see ScanTask
+
+        self.timer_watcher: QTimer = QTimer(self)
+        self.timer_watcher.setSingleShot(True)
+        self.timer_watcher.setInterval(500)
+
+        self.timer_poller: QTimer = QTimer(self)
+        self.timer_poller.setInterval(int(self.configs.watch_interval * 1000))
+
+    def update_watcher(self):
+        dirs: set[str] = set()
+        if self.configs.watch:
+            dirs = set(ExifToolGUIDirIndex.Instance.dirs(self.configs.dirs, self.configs.recursive))
+
+        dirs_watched: set[str] = set(self.watcher.directories())
+        dirs_removed: list[str] = list(dirs_watched - dirs)
+        if dirs_removed:
+            self.watcher.removePaths(dirs_removed)
+
+        dirs_added: list[str] = list(dirs - dirs_watched - set(self.dirs_polled))
+        dirs_failed: list[str] = self.watcher.addPaths(dirs_added) if dirs_added else []
+
+        self.dirs_polled = [dir for dir in self.dirs_polled if dir in dirs] + dirs_failed
+        if self.dirs_polled and not self.timer_poller.isActive():
+            self.timer_poller.start()
+        elif not self.dirs_polled:
+            self.timer_poller.stop()
+
+    def apply_changes_of_dirs(self, dirs: set[str]):
+        '''
+        Apply files added and removed to the file list, and refresh files modified since loaded.
+        Unsaved edits are kept.
+        '''
+        dir_index = ExifToolGUIDirIndex.Instance
+        for dir in dirs:
+            dir_index.invalidate(dir)
+
+        # modified
+        dirs_n: set[str] = set(ExifToolGUIData.Normalise_Dir(dir) for dir in dirs)
+        file_indexes: list[int] = []
+        for file_index, metadata in enumerate(self.data.cache):
+            if len(metadata) <= 1:
+                continue  # not loaded yet
+            if ExifToolGUIData.Normalise_Dir(os.path.dirname(metadata['SourceFile'])) not in dirs_n:
+                continue
+            if self.data.is_modified(file_index):
+                file_indexes.append(file_index)
+                with QMutexLocker(GetPreviewTask.cache_locker):
+                    GetPreviewTask.cache_preview.pop(ExifToolGUIData.File_Key(metadata['SourceFile']), None)
+
+        files: list[str] = self.configs.files
+        files_listed: set[str] = set(metadata['SourceFile'] for metadata in self.data.cache)
+        files_removed: set[str] = files_listed - set(files)
+        files_added: list[str] = [file for file in files if file not in files_listed]
+
+        if (files_removed or files_added) and self.scanning:
+            # files not found by the scan yet would be added twice
+            self.reload_list_for_dirs(streaming=False)
+            return
+
+        if files_removed:
+            # file indexes shift, tasks holding them (and previews of rows removed) are cancelled,
+            # rows kept are loaded and previewed again where missing (previews cached hit)
+            self.cleanup_threading()
+            kept: dict[int, int] = self.data.remove_files(files_removed)
+            self.update_table_for_group(kept)
+            file_indexes = [kept[file_index] for file_index in file_indexes if file_index in kept]
+
+        if files_added:
+            self.append_rows_for_group(self.data.append_files(files_added))
+
+        if file_indexes:
+            self.reload_previews_for_group(file_indexes)
+            self.refresh_in_batches(file_indexes, force=True)
+            # table and tree are updated batch by batch, see on_batchLoaded
+
+    def init_stats(self):
+        '''
+        Stats of hot paths (see ExifToolGUIStats), in a panel docked and hidden, toggled by F12.
+        It's refreshed every second while shown.
+        '''
+        self.stats: ExifToolGUIStats = ExifToolGUIStats.Instance
+        self.stats.gauge('threads:data', GetDataTask.threadPool.activeThreadCount)
+        self.stats.gauge('threads:preview', GetPreviewTask.threadPool.activeThreadCount)
+        self.stats.gauge('cache:preview:files', lambda: len(GetPreviewTask.cache_preview))
+
+        self.dock_stats: QDockWidget = QDockWidget('Stats', self.main_window)
+        self.dock_stats.setObjectName('dock_stats')
+        widget: QWidget = QWidget(self.dock_stats)
+        layout: QVBoxLayout = QVBoxLayout(widget)
+
+        buttons: QHBoxLayout = QHBoxLayout()
+        self.checkBox_stats: QCheckBox = QCheckBox('Collect', widget)
+        self.checkBox_stats.setChecked(self.stats.enabled)
+        self.button_stats_reset: QPushButton = QPushButton('Reset', widget)
+        self.button_stats_dump: QPushButton = QPushButton('Dump', widget)
+        self.button_stats_dump.setToolTip(os.path.abspath(self.stats.file))
+        buttons.addWidget(self.checkBox_stats)
+        buttons.addStretch()
+        buttons.addWidget(self.button_stats_reset)
+        buttons.addWidget(self.button_stats_dump)
+        layout.addLayout(buttons)
+
+        self.text_stats: QPlainTextEdit = QPlainTextEdit(widget)
+        self.text_stats.setReadOnly(True)
+        self.text_stats.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.text_stats.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        layout.addWidget(self.text_stats)
+
+        self.dock_stats.setWidget(widget)
+        self.main_window.addDockWidget(Qt.RightDockWidgetArea, self.dock_stats)
+        self.dock_stats.hide()
+
+        self.shortcut_stats: QShortcut = QShortcut(QKeySequence(Qt.Key_F12), self.main_window)
+
+        self.timer_stats: QTimer = QTimer(self)
+        self.timer_stats.setInterval(1000)
+
+    def update_stats(self):
+        scroll: int = self.text_stats.verticalScrollBar().value()
+        self.text_stats.setPlainText(self.stats.report())
+        self.text_stats.verticalScrollBar().setValue(scroll)
+
+    def init_profiler(self):
+        '''
+        Pixmaps and Qt items are out of reach of tracemalloc, so they are measured for the profiler here,
+        on the UI thread, every 5 seconds while profiling.
+        '''
+        self.timer_profiler: QTimer = QTimer(self)
+        self.timer_profiler.setInterval(5000)
+        if self.profiler.started != None:
+            self.timer_profiler.start()
+
+    def measure_profiler(self):
+        with QMutexLocker(GetPreviewTask.cache_locker):
+            pixmaps: list[QPixmap] = list(GetPreviewTask.cache_preview.values())
+        self.profiler.measure('cache_preview:pixmaps', len(pixmaps))
+        self.profiler.measure('cache_preview:mb', round(sum(p.width() * p.height() * p.depth() for p in pixmaps) / 8 / 1024 / 1024, 2))
+
+        table: QTableWidget = self.table_for_group
+        self.profiler.measure('qt_items:table_for_group', table.rowCount() * table.columnCount())
+        count: int = 0
+        for tree in self.tab_for_single.findChildren(QTreeWidget):
+            it = QTreeWidgetItemIterator(tree)
+            while it.value():
+                count += 1
+                it += 1
+        self.profiler.measure('qt_items:tree_for_single', count)
+
+    def reload_previews_for_group(self, file_indexes: list[int]):
+        table: QTableWidget = self.table_for_group
+        file_indexes_s: set[int] = set(file_indexes)
+        for row in range(0, table.rowCount()):
+            for column in range(0, table.columnCount()):
+                item = table.item(row, column)
+                user_data: dict[str,] = item.data(Qt.UserRole)
+                if user_data['file_index'] not in file_indexes_s:
+                    break
+                if user_data['tag'] != 'SourceFile':
+                    continue
+
+                file: str = item.text()
+                with QMutexLocker(GetPreviewTask.cache_locker):
+                    GetPreviewTask.cache_preview.pop(ExifToolGUIData.File_Key(file), None)
+                GetPreviewTask(self.threading_flag, item, file, self.configs.preview_size, self.configs.preview_precision)
+
     '''################################################################
     Editting and Functions
     ################################################################'''
@@ -785,16 +1041,26 @@ class ExifToolGUI(QObject):
         table = self.table_for_group
         table.blockSignals(True)
 
+        # None means all
+        file_indexs_s: set[int] = set(file_indexs) if file_indexs != None else None
         for row in range(0, table.rowCount()):
+            if file_indexs_s != None and table.item(row, 0).data(Qt.UserRole)['file_index'] not in file_indexs_s:
+                continue
+
+            self.edit_row_for_group(row, initial=initial)
+
+        table.blockSignals(False)
+
+    def edit_row_for_group(self, row: int, initial: bool = False):
+        table = self.table_for_group
+
+        # a consistent snapshot of the row, while records are being swapped by tasks
+        with self.data.locker:
             for column in range(0, table.columnCount()):
                 item = table.item(row, column)
                 user_data: dict[str,] = item.data(Qt.UserRole)
                 file_index: int = user_data['file_index']
 
-                # None means all
-                if file_indexs != None and file_index not in file_indexs:
-                    break
-
                 tag: str = user_data['tag']
                 value = item.text()
 
@@ -806,8 +1072,6 @@ class ExifToolGUI(QObject):
                 else:
                     item.setBackground(QBrush())
 
-        table.blockSignals(False)
-
     def edit_current_tree_for_single(self, initial: bool = False):
         tab_wedget = self.tab_for_single
         title = tab_wedget.tabText(tab_wedget.currentIndex())
@@ -824,18 +1088,19 @@ class ExifToolGUI(QObject):
         file_index: int = currentTableItem.data(Qt.UserRole)['file_index']
 
         it = QTreeWidgetItemIterator(tree)
-        while it.value():
-            item = it.value()
-            if item.childCount() == 0:
-                tag: str = item.data(0, Qt.UserRole)
-                value = item.text(1)
-
-                show_value, colour = self.edit_tag(file_index, tag, value, strict, initial=initial)
-                if show_value != value:
-                    item.setText(1, show_value)
-                if colour:
-                    item.setBackground(1, QBrush(colour))
-            it += 1
+        with self.data.locker:
+            while it.value():
+                item = it.value()
+                if item.childCount() == 0:
+                    tag: str = item.data(0, Qt.UserRole)
+                    value = item.text(1)
+
+                    show_value, colour = self.edit_tag(file_index, tag, value, strict, initial=initial)
+                    if show_value != value:
+                        item.setText(1, show_value)
+                    if colour:
+                        item.setBackground(1, QBrush(colour))
+                it += 1
 
         tree.blockSignals(False)
 
@@ -903,8 +1168,23 @@ class ExifToolGUI(QObject):
         self.exiftool_options_editor_delete.clicked.connect(self.on_clicked_exiftool_options_editor_delete)
 
         self.metadataLoaded.connect(self.on_metadataLoaded)
+        self.batchLoaded.connect(self.on_batchLoaded)
+        self.filesFound.connect(self.on_filesFound)
+        self.statusMessage.connect(self.statusbar.showMessage)
         self.previewLoaded.connect(self.on_previewLoaded)
 
+        self.watcher.directoryChanged.connect(self.on_directoryChanged__watcher)
+        self.timer_watcher.timeout.connect(self.on_timeout__timer_watcher)
+        self.timer_poller.timeout.connect(self.on_timeout__timer_poller)
+
+        self.shortcut_stats.activated.connect(self.on_activated__shortcut_stats)
+        self.dock_stats.visibilityChanged.connect(self.on_visibility_changed__dock_stats)
+        self.checkBox_stats.toggled.connect(self.on_toggled__checkBox_stats)
+        self.button_stats_reset.clicked.connect(self.on_clicked__button_stats_reset)
+        self.button_stats_dump.clicked.connect(self.on_clicked__button_stats_dump)
+        self.timer_stats.timeout.connect(self.update_stats)
+        self.timer_profiler.timeout.connect(self.measure_profiler)
+
         self.app.aboutToQuit.connect(self.cleanup_threading)
 
     def on_clicked__button_add_dir(self, checked=False):
@@ -923,8 +1203,7 @@ class ExifToolGUI(QObject):
         self.reload_list_for_dirs()
 
     def on_clicked__button_save(self, checked=False):
-        with QMutexLocker(ExifToolGUI.dataLocker):
-            self.data.save()
+        self.data.save()
         self.edit_table_for_group(initial=False)
 
         self.reload_current_tree_for_single(initial=False)
@@ -933,8 +1212,7 @@ class ExifToolGUI(QObject):
     def on_clicked__button_reset(self):
         file_indexes: list[int] = self.get_selected_file_indexes()
         for file_index in file_indexes:
-            with QMutexLocker(ExifToolGUI.dataLocker):
-                self.data.reset(file_index)
+            self.data.reset(file_index)
         # self.set_table_for_group(file_indexes)
         self.edit_table_for_group(file_indexes, initial=True)
 
@@ -943,25 +1221,28 @@ class ExifToolGUI(QObject):
 
     def on_clicked__button_refresh(self):
         file_indexes: list[int] = self.get_selected_file_indexes()
-        for file_index in file_indexes:
-            with QMutexLocker(ExifToolGUI.dataLocker):
-                self.data.refresh(file_index)
-        # self.set_table_for_group(file_indexes)
-        self.edit_table_for_group(file_indexes, initial=False)
-
-        self.reload_current_tree_for_single(initial=False)
-        # reflect tags deleted and added for 'All', but bring extra cost for others
+        # files not modified since loaded are skipped, unless shift is held
+        force: bool = bool(QApplication.keyboardModifiers() & Qt.ShiftModifier)
+        self.refresh_in_batches(file_indexes, force=force)
+        # table and tree are updated batch by batch, see on_batchLoaded
 
     def on_clicked__button_rebuild(self):
         file_indexes: list[int] = self.get_selected_file_indexes()
-        for file_index in file_indexes:
-            self.data.rebuild(file_index)
-        # self.set_table_for_group(file_indexes)
-        self.edit_table_for_group(file_indexes, initial=False)
+        self.rebuild_in_batches(file_indexes)
+        # table and tree are updated batch by batch, see on_batchLoaded
 
-        self.reload_current_tree_for_single(initial=False)
-        # reflect tags deleted and added for 'All', but bring extra cost for others
+    def refresh_in_batches(self, file_indexes: list[int], force: bool = False):
+        def process(batch: list[int], errors: dict[int, str]) -> list[int]:
+            return self.data.refresh_batch(batch, force=force)
+        BatchTask(self.threading_flag, file_indexes, self, 'Refresh', process)
 
+    def rebuild_in_batches(self, file_indexes: list[int]):
+        def process(batch: list[int], errors: dict[int, str]) -> list[int]:
+            errors.update(self.data.rebuild_batch(batch))
+            return batch
+        BatchTask(self.threading_flag, file_indexes, self, 'Rebuild', process)
+
+    @ExifToolGUIStats.Timed()
     def on_current_item_changed__table_for_group(self, current: QTableWidgetItem, previous: QTableWidgetItem):
         # print(f"{current.row()}, {current.column()}")
         # print(f"{current.data(Qt.UserRole)}")
@@ -972,6 +1253,12 @@ class ExifToolGUI(QObject):
             return
         self.reload_current_tree_for_single(initial=True)  # nessary
 
+        # read partial metadata fully at once, ahead of the background ones
+        file_index: int = current.data(Qt.UserRole)['file_index']
+        if self.data.is_partial(file_index):
+            GetDataTask(self.threading_flag, file_index, self, complete=True, priority=1)
+
+    @ExifToolGUIStats.Timed()
     def on_item_changed__table_for_group(self, item: QTableWidgetItem):
         print(f"on_item_changed: {item.row(), item.column()}")
 
@@ -1134,6 +1421,7 @@ class ExifToolGUI(QObject):
 
     # threading
 
+    @ExifToolGUIStats.Timed()
     def on_metadataLoaded(self, file_index: int, flag: int):
 
         if flag != self.threading_flag:
@@ -1146,6 +1434,37 @@ class ExifToolGUI(QObject):
         self.reload_current_tree_for_single(ref=file_index, initial=True)
         # nessary, but bring extra cost when title is not 'All'
 
+    @ExifToolGUIStats.Timed()
+    def on_batchLoaded(self, file_indexes: list[int], flag: int):
+
+        if flag != self.threading_flag:
+            print("threading flag expired:  on_batchLoaded")
+            return
+
+        self.edit_table_for_group(file_indexes, initial=False)
+
+        current_item = self.table_for_group.currentItem()
+        if current_item and current_item.data(Qt.UserRole)['file_index'] in file_indexes:
+            self.reload_current_tree_for_single(initial=False)
+            # reflect tags deleted and added for 'All', but bring extra cost for others
+
+    @ExifToolGUIStats.Timed()
+    def on_filesFound(self, files: list[str], flag: int):
+
+        if flag != self.threading_flag:
+            print("threading flag expired:  on_filesFound")
+            return
+
+        if len(files) == 0:
+            # the end of the scan
+            self.scanning = False
+
+        self.append_rows_for_group(self.data.append_files(files))
+
+        # sub-directories found so far
+        self.update_watcher()
+
+    @ExifToolGUIStats.Timed()
     def on_previewLoaded(self, item: QTableWidgetItem, pixmap: QPixmap, flag: int):
 
         if flag != self.threading_flag:
@@ -1165,12 +1484,54 @@ class ExifToolGUI(QObject):
 
         item.tableWidget().blockSignals(False)
 
+    def on_directoryChanged__watcher(self, dir: str):
+        self.dirs_changed.add(dir)
+        self.timer_watcher.start()  # restart
+
+    def on_timeout__timer_poller(self):
+        self.dirs_changed.update(self.dirs_polled)
+        if not self.timer_watcher.isActive():
+            self.timer_watcher.start()
+
+    @ExifToolGUIStats.Timed()
+    def on_timeout__timer_watcher(self):
+        dirs_changed: set[str] = self.dirs_changed
+        self.dirs_changed = set()
+        self.apply_changes_of_dirs(dirs_changed)
+
+    # stats
+
+    def on_activated__shortcut_stats(self):
+        self.dock_stats.setVisible(not self.dock_stats.isVisible())
+
+    def on_visibility_changed__dock_stats(self, visible: bool):
+        if visible:
+            self.update_stats()
+            self.timer_stats.start()
+        else:
+            self.timer_stats.stop()
+
+    def on_toggled__checkBox_stats(self, checked: bool):
+        self.stats.enabled = checked
+        self.update_stats()
+
+    def on_clicked__button_stats_reset(self, checked=False):
+        self.stats.reset()
+        self.update_stats()
+
+    def on_clicked__button_stats_dump(self, checked=False):
+        self.stats.dump()
+        self.statusbar.showMessage(f"Stats: written to {os.path.abspath(self.stats.file)}")
+
     def cleanup_threading(self):
         self.threading_flag += 1
         print(self.threading_flag)
 
         GetDataTask.threadPool.clear()
         GetPreviewTask.threadPool.clear()
+        # tasks discarded never run to count themselves off, the ones running already did
+        ExifToolGUIStats.Instance.set_level('queue:data', 0)
+        ExifToolGUIStats.Instance.set_level('queue:preview', 0)
         print("done:    threadpool.clear()")
 
         GetDataTask.threadPool.waitForDone()
@@ -1192,30 +1553,117 @@ class GetDataTask(QRunnable):
     threadPool = QThreadPool()
     # threadPool.setMaxThreadCount(1)
 
-    def __init__(self, flag: int, file_index: int, gui: ExifToolGUI) -> None:
+    def __init__(self, flag: int, file_index: int, gui: ExifToolGUI, complete: bool = False, priority: int = 0) -> None:
         super().__init__()
         self.flag = flag
 
         self.file_index: int = file_index
         self.gui: ExifToolGUI = gui
+        self.complete: bool = complete  # read fully a file read partially before
 
-        GetDataTask.threadPool.start(self)
+        ExifToolGUIStats.Instance.level('queue:data', 1)
+        GetDataTask.threadPool.start(self, priority)
 
     def run(self):
+        ExifToolGUIStats.Instance.level('queue:data', -1)
 
         if self.flag != self.gui.threading_flag:
             print("threading flag expired:  GetDataTask.run()")
             return
 
-        with QMutexLocker(ExifToolGUI.dataLocker):
-            self.gui.data.refresh(self.file_index)
+        if self.complete:
+            if not self.gui.data.complete_batch([self.file_index]):
+                return  # completed already
+        else:
+            self.gui.data.refresh(self.file_index, fast=self.gui.configs.fast_read)
 
         self.gui.metadataLoaded.emit(self.file_index, self.flag)
 
+        if self.gui.data.is_partial(self.file_index):
+            # behind first reads of the other files
+            GetDataTask(self.flag, self.file_index, self.gui, complete=True, priority=-1)
+
+
+class BatchTask(QRunnable):
+    '''
+    Process files batch by batch, by `process(batch, errors)`, which is guarded by data itself.
+    It returns file indexes updated, and fills errors of files failed.
+    '''
+
+    def __init__(self, flag: int, file_indexes: list[int], gui: ExifToolGUI, process_name: str,
+                 process: Callable[[list[int], dict[int, str]], list[int]]) -> None:
+        super().__init__()
+        self.flag = flag
+
+        self.file_indexes: list[int] = file_indexes
+        self.gui: ExifToolGUI = gui
+        self.process_name: str = process_name
+        self.process: Callable[[list[int], dict[int, str]], list[int]] = process
+
+        ExifToolGUIStats.Instance.level('queue:data', 1)
+        GetDataTask.threadPool.start(self)
+
+    def run(self):
+        ExifToolGUIStats.Instance.level('queue:data', -1)
+        count = len(self.file_indexes)
+        batch_size = self.gui.configs.batch_size
+        count_updated: int = 0
+        errors: dict[int, str] = {}
+
+        for start in range(0, count, batch_size):
+
+            if self.flag != self.gui.threading_flag:
+                print(f"threading flag expired:  {type(self).__name__}.run()")
+                return
+
+            batch = self.file_indexes[start:start+batch_size]
+
+            updated = self.process(batch, errors)
+
+            count_updated += len(updated)
+            if updated:
+                self.gui.batchLoaded.emit(updated, self.flag)
+            self.gui.statusMessage.emit(
+                f"{self.process_name}: {start + len(batch)}/{count} files checked, "
+                f"{count_updated} updated, {len(errors)} failed (see log for details)")
+
+
+class ScanTask(QRunnable):
+
+    def __init__(self, flag: int, gui: ExifToolGUI) -> None:
+        super().__init__()
+        self.flag = flag
+
+        self.gui: ExifToolGUI = gui
+
+        ExifToolGUIStats.Instance.level('queue:data', 1)
+        GetDataTask.threadPool.start(self)
+
+    def run(self):
+        ExifToolGUIStats.Instance.level('queue:data', -1)
+        count: int = 0
+        files_chunks = self.gui.configs.iter_files()
+        try:
+            for files in files_chunks:
+
+                if self.flag != self.gui.threading_flag:
+                    print("threading flag expired:  ScanTask.run()")
+                    return
+
+                count += len(files)
+                self.gui.filesFound.emit(files, self.flag)
+                self.gui.statusMessage.emit(f"Scan: {count} files found, scanning...")
+        finally:
+            files_chunks.close()
+
+        # an empty chunk to mark the end, so that directories without files are watched too
+        self.gui.filesFound.emit([], self.flag)
+        self.gui.statusMessage.emit(f"Scan: {count} files found. {ExifToolGUIData.cache_pool.report()}")
+
 
 class GetPreviewTask(QRunnable):
 
-    cache_preview: dict[str, QPixmap] = {}
+    cache_preview: dict[tuple, QPixmap] = {}  # keyed by ExifToolGUIData.File_Key()
     cache_locker: QMutex = QMutex()
 
     signal_locker: QMutex = QMutex()
@@ -1226,6 +1674,10 @@ class GetPreviewTask(QRunnable):
     QImageReader.setAllocationLimit(0)
 
     def __init__(self, flag: int, item: QTableWidgetItem, file_path: str, size: int, precision: float = 1.0, load_embedded: bool = False) -> None:
+        '''
+        Started at once, the preview is emitted for the item.
+        Without an item (i.e. benchmarks), the task is not started, previews are taken by get_preview.
+        '''
         super().__init__()
         self.flag = flag
 
@@ -1235,12 +1687,26 @@ class GetPreviewTask(QRunnable):
         self.precision: float = precision
         self.load_embedded: bool = load_embedded
 
-        self.gui: ExifToolGUI = self.item.data(Qt.UserRole)["gui"]
-        self.pixel_ratio = self.gui.app.primaryScreen().physicalDotsPerInch()/96.0
+        self.data: ExifToolGUIData = ExifToolGUIData.Instance
+        self.gui: ExifToolGUI = self.item.data(Qt.UserRole)["gui"] if self.item != None else None
+        self.pixel_ratio = self.gui.app.primaryScreen().physicalDotsPerInch()/96.0 if self.gui != None else 1.0
+
+        if self.item != None:
+            ExifToolGUIStats.Instance.level('queue:preview', 1)
+            GetPreviewTask.threadPool.start(self)
+        else:
+            self.identify()
+
+    def identify(self) -> None:
+        self.file_key: tuple = ExifToolGUIData.File_Key(self.file_path)
 
-        GetPreviewTask.threadPool.start(self)
+        # decoders known not to fit are not probed
+        self.file_kind: str = ExifToolGUIFileTypes.Instance.classify(self.file_path)
 
     def run(self):
+        ExifToolGUIStats.Instance.level('queue:preview', -1)
+
+        self.identify()
 
         pixmap = self.get_preview(cache=True)
         self.set_preview(pixmap)
@@ -1264,50 +1730,57 @@ class GetPreviewTask(QRunnable):
 
     def get_preview(self, cache: bool = True, fast: bool = False) -> QPixmap:
 
-        if self.flag != self.gui.threading_flag:
+        if self.gui != None and self.flag != self.gui.threading_flag:
             print("threading flag expired:  GetPreviewTask.get_preview(...)")
             return
 
         pixmap: QPixmap = None
 
+        stats: ExifToolGUIStats = ExifToolGUIStats.Instance
+
         if cache:
             with QMutexLocker(GetPreviewTask.cache_locker):
-                pixmap = GetPreviewTask.cache_preview.get(self.file_path, None)
+                pixmap = GetPreviewTask.cache_preview.get(self.file_key, None)
+            stats.hit('cache:preview', pixmap != None)
             return pixmap
 
         # embedded
         if pixmap == None and fast == False:
-            if self.load_embedded:
-                b: bytes = self.data.load_thumbnail(self.file_path)
-                if b:
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(b)
+            if self.load_embedded and self.file_kind != ExifToolGUIFileTypes.IGNORED:
+                with stats.time('preview:embedded'):
+                    b: bytes = self.data.load_thumbnail(self.file_path)
+                    if b:
+                        pixmap = QPixmap()
+                        pixmap.loadFromData(b)
 
         # image
-        if pixmap == None and fast == False:
-            # QImageReader.setAllocationLimit(0)
-            image_reader = QImageReader(self.file_path)
-            image_reader.setAutoTransform(True)
-            if image_reader.canRead():
-                image: QImage = image_reader.read()
-                pixmap = QPixmap.fromImage(image)
+        if pixmap == None and fast == False and self.file_kind in (None, ExifToolGUIFileTypes.IMAGE):
+            with stats.time('preview:image'):
+                # QImageReader.setAllocationLimit(0)
+                image_reader = QImageReader(self.file_path)
+                image_reader.setAutoTransform(True)
+                if image_reader.canRead():
+                    image: QImage = image_reader.read()
+                    pixmap = QPixmap.fromImage(image)
 
         # video
-        if pixmap == None and fast == False:
-            import cv2
-            cap = cv2.VideoCapture(self.file_path)
-            if cap.isOpened():
-                ret, frame = cap.read()
-                if ret:
-                    height, width, channels = frame.shape
-                    image = QImage(frame.data, width, height, channels * width, QImage.Format_BGR888)
-                    pixmap = QPixmap.fromImage(image)
-            cap.release()
+        if pixmap == None and fast == False and self.file_kind in (None, ExifToolGUIFileTypes.VIDEO):
+            with stats.time('preview:video'):
+                import cv2
+                cap = cv2.VideoCapture(self.file_path)
+                if cap.isOpened():
+                    ret, frame = cap.read()
+                    if ret:
+                        height, width, channels = frame.shape
+                        image = QImage(frame.data, width, height, channels * width, QImage.Format_BGR888)
+                        pixmap = QPixmap.fromImage(image)
+                cap.release()
 
         # icon
         if pixmap == None and fast == True:
-            icon: QIcon = QFileIconProvider().icon(QFileInfo(self.file_path))
-            pixmap = icon.pixmap(icon.availableSizes()[0])
+            with stats.time('preview:icon'):
+                icon: QIcon = QFileIconProvider().icon(QFileInfo(self.file_path))
+                pixmap = icon.pixmap(icon.availableSizes()[0])
 
         if pixmap:
             precision = self.precision if self.precision >= 1.0 else 1.0
@@ -1316,7 +1789,7 @@ class GetPreviewTask(QRunnable):
 
             if fast == False:
                 with QMutexLocker(GetPreviewTask.cache_locker):
-                    GetPreviewTask.cache_preview[self.file_path] = pixmap
+                    GetPreviewTask.cache_preview[self.file_key] = pixmap
 
             return pixmap
 
@@ -0,0 +1,74 @@
+from contextlib import contextmanager
+import os
+import tempfile
+from typing import Iterator
+
+
+class ExifToolGUIArgs:
+    '''
+    Arguments are written to the pipe of the ExifTool process line by line, a huge payload (i.e. hundreds
+    of duplicated tags) could stall the pipe. Oversized lists of tags are split into chunks, one call each,
+    and large payloads are passed by an argfile ('-@') instead of the pipe.
+    '''
+
+    INLINE_BYTES: int = 16 * 1024  # larger payloads go through an argfile
+    CHUNK_BYTES: int = 256 * 1024  # payload limit of a single call
+
+    @staticmethod
+    def Size(args: list[str]) -> int:
+        return sum(len(arg.encode('utf-8', errors='replace')) + 1 for arg in args)
+
+    @staticmethod
+    def Chunk(args: list[str], size_fixed: int = 0, limit: int = None) -> list[list[str]]:
+        '''
+        Split args into chunks, each of which fits in the limit with the fixed part (params, files) of a call.
+        A chunk has one arg at least, even if it's oversized alone.
+        '''
+        limit = limit if limit != None else ExifToolGUIArgs.CHUNK_BYTES
+        chunks: list[list[str]] = [[]]
+        size: int = size_fixed
+        for arg in args:
+            size_arg = len(arg.encode('utf-8', errors='replace')) + 1
+            if len(chunks[-1]) > 0 and size + size_arg > limit:
+                chunks.append([])
+                size = size_fixed
+            chunks[-1].append(arg)
+            size += size_arg
+        return chunks
+
+    @staticmethod
+    def Is_Argfile_Safe(arg: str) -> bool:
+        # an argfile holds an arg per line, surrounding spaces are stripped, and '#' starts a comment
+        return arg != '' and '\n' not in arg and '\r' not in arg and not arg[0].isspace() and not arg[-1].isspace() and arg[0] != '#'
+
+    @staticmethod
+    @contextmanager
+    def Argfile(args: list[str]) -> Iterator[list[str]]:
+        '''
+        Yield args to be passed instead: args themselves if small enough, or if any of them is unable
+        to be written to an argfile (order of args matters, i.e. files and '-execute'), otherwise
+        '-@ <argfile>'. The argfile is removed afterwards.
+        '''
+        if ExifToolGUIArgs.Size(args) <= ExifToolGUIArgs.INLINE_BYTES \
+                or not all(ExifToolGUIArgs.Is_Argfile_Safe(arg) for arg in args):
+            yield args
+            return
+
+        fd, argfile = tempfile.mkstemp(prefix='exiftoolgui_', suffix='.args')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='\n') as f:
+                f.write('\n'.join(args) + '\n')
+            yield ['-@', argfile]
+        finally:
+            try:
+                os.remove(argfile)
+            except OSError:
+                pass
+
+
+if __name__ == "__main__":
+    tags = [f"-ZIP:ZIP:Other:Doc2:Copy{i}:ZIP::ID-15:ZipFileName" for i in range(608)]
+    chunks = ExifToolGUIArgs.Chunk(tags, limit=8 * 1024)
+    print(f"{len(tags)} tags, {ExifToolGUIArgs.Size(tags)} bytes -> {len(chunks)} chunks of {[len(c) for c in chunks]}")
+    with ExifToolGUIArgs.Argfile(tags) as args:
+        print(args)
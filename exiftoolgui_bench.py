@@ -0,0 +1,843 @@
+import argparse
+import base64
+import gc
+import json
+import os
+import random
+import re
+import shutil
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+
+
+class ExifToolGUIBenchCorpus:
+    '''
+    Synthetic media files with known tags, written under <root>/media:
+
+        JPEG: EXIF (IFD0, ExifIFD) and a thumbnail (IFD1) in APP1, over a tiny baseline image
+        TIFF: the same EXIF, over an uncompressed RGB strip of `tiff_size`, for previews to decode
+        MP4: ftyp and moov/mvhd (QuickTime dates and duration), no track
+        ZIP: `zip_entries` stored entries, which ExifTool lists as 8 tags each (608 for 76 entries)
+
+    Files are real, so that ExifTool reads them as well. Tags are also written as sidecars under
+    <root>/standin for ExifToolGUIStandIn. The same seed gives the same corpus.
+    '''
+
+    # 16x12 baseline JPEG (JFIF), used as the image of JPEG files and as their thumbnail
+    JPEG_BASE: bytes = base64.b64decode(
+        '/9j/4AAQSkZJRgABAQEAZABkAAD/2wBDABsSFBcUERsXFhceHBsgKEIrKCUlKFE6PTBCYFVlZF9VXVtqeJmBanGQc1tdhbWGkJ6jq62rZ4C8ybqm'
+        'x5moq6T/2wBDARweHigjKE4rK06kbl1upKSkpKSkpKSkpKSkpKSkpKSkpKSkpKSkpKSkpKSkpKSkpKSkpKSkpKSkpKSkpKSkpKT/wAARCAAMABAD'
+        'ASIAAhEBAxEB/8QAHwAAAQUBAQEBAQEAAAAAAAAAAAECAwQFBgcICQoL/8QAtRAAAgEDAwIEAwUFBAQAAAF9AQIDAAQRBRIhMUEGE1FhByJxFDKB'
+        'kaEII0KxwRVS0fAkM2JyggkKFhcYGRolJicoKSo0NTY3ODk6Q0RFRkdISUpTVFVWV1hZWmNkZWZnaGlqc3R1dnd4eXqDhIWGh4iJipKTlJWWl5iZ'
+        'mqKjpKWmp6ipqrKztLW2t7i5usLDxMXGx8jJytLT1NXW19jZ2uHi4+Tl5ufo6erx8vP09fb3+Pn6/8QAHwEAAwEBAQEBAQEBAQAAAAAAAAECAwQF'
+        'BgcICQoL/8QAtREAAgECBAQDBAcFBAQAAQJ3AAECAxEEBSExBhJBUQdhcRMiMoEIFEKRobHBCSMzUvAVYnLRChYkNOEl8RcYGRomJygpKjU2Nzg5'
+        'OkNERUZHSElKU1RVVldYWVpjZGVmZ2hpanN0dXZ3eHl6goOEhYaHiImKkpOUlZaXmJmaoqOkpaanqKmqsrO0tba3uLm6wsPExcbHyMnK0tPU1dbX'
+        '2Nna4uPk5ebn6Onq8vP09fb3+Pn6/9oADAMBAAIRAxEAPwDPitParcVp7VcijX0q3FGvpROsycLiGf/Z'
+    )
+
+    MAKES: list[tuple[str, str]] = [('Canon', 'Canon EOS R5'), ('NIKON CORPORATION', 'NIKON Z 6'), ('SONY', 'ILCE-7M3'), ('Apple', 'iPhone 13')]
+    QUICKTIME_EPOCH: datetime = datetime(1904, 1, 1, tzinfo=timezone.utc)
+
+    def __init__(self, root: str, count: int = 200, zips: int = 2, zip_entries: int = 76, tiff_size: tuple[int, int] = (320, 240), seed: int = 0) -> None:
+        self.root: str = os.path.abspath(root)
+        self.media: str = os.path.join(self.root, 'media')
+        self.standin: str = os.path.join(self.root, 'standin')
+        self.count: int = count
+        self.zips: int = zips
+        self.zip_entries: int = zip_entries
+        self.tiff_size: tuple[int, int] = tiff_size
+        self.seed: int = seed
+
+    def build(self) -> list[str]:
+        '''
+        Write the corpus, replacing any previous one. Return files written.
+        '''
+        for dir in (self.media, self.standin):
+            shutil.rmtree(dir, ignore_errors=True)
+            os.makedirs(dir)
+
+        rng = random.Random(self.seed)
+        strip: bytes = ExifToolGUIBenchCorpus.Strip(*self.tiff_size)
+        files: list[str] = []
+        for i in range(self.count):
+            kind: str = ('jpg', 'jpg', 'jpg', 'jpg', 'jpg', 'tif', 'tif', 'mp4', 'mp4', 'jpg')[i % 10]
+            file: str = os.path.join(self.media, f"IMG_{i:05d}.{kind}")
+            if kind == 'mp4':
+                b, tags = self.mp4(rng, i)
+            else:
+                b, tags = self.exif(rng, i, strip if kind == 'tif' else None)
+            self.write(file, b, tags)
+            files.append(file)
+
+        for i in range(self.zips):
+            file = os.path.join(self.media, f"ARCHIVE_{i:02d}.zip")
+            tags = self.zip(file, rng)
+            self.write(file, None, tags)
+            files.append(file)
+        return files
+
+    def write(self, file: str, b: bytes, tags: dict[str, str]) -> None:
+        if b != None:
+            with open(file, 'wb') as f:
+                f.write(b)
+        # files of the corpus share a fixed modification time, as if copied from a card
+        os.utime(file, (1700000000, 1700000000))
+        with open(ExifToolGUIStandIn.Sidecar(self.root, file), 'w', encoding='utf-8') as f:
+            json.dump(tags, f, ensure_ascii=False)
+
+    def random_datetime(self, rng: random.Random) -> datetime:
+        return datetime(2020, 1, 1) + timedelta(seconds=rng.randrange(0, 4 * 365 * 86400))
+
+    def exif(self, rng: random.Random, i: int, strip: bytes = None) -> tuple[bytes, dict[str, str]]:
+        '''
+        A JPEG, or a TIFF if a strip is given.
+        '''
+        make, model = self.MAKES[i % len(self.MAKES)]
+        dt: str = self.random_datetime(rng).strftime('%Y:%m:%d %H:%M:%S')
+        iso: int = rng.choice([100, 200, 400, 800, 1600, 3200])
+        artist: str = f"Photographer {i % 7}"
+
+        ifd0: dict[int, tuple[int, Any]] = {271: (2, make), 272: (2, model), 274: (3, 1), 306: (2, dt), 315: (2, artist), 34665: (4, 'exif')}
+        exif: dict[int, tuple[int, Any]] = {34855: (3, iso), 36868: (2, dt)}
+        tags: dict[str, str] = {
+            'EXIF:IFD0:Camera:Main:Make': make,
+            'EXIF:IFD0:Camera:Main:Model': model,
+            'EXIF:IFD0:Image:Main:Orientation': '1',
+            'EXIF:IFD0:Time:Main:ModifyDate': dt,
+            'EXIF:IFD0:Author:Main:Artist': artist,
+            'EXIF:ExifIFD:Camera:Main:ISO': str(iso),
+            'EXIF:ExifIFD:Time:Main:CreateDate': dt,
+        }
+        # some files lack the original date, so that conditional tags fall back
+        if i % 7 != 3:
+            exif[36867] = (2, dt)
+            tags['EXIF:ExifIFD:Time:Main:DateTimeOriginal'] = dt
+        if i % 5 == 0:
+            exif[36881] = (2, '+08:00')
+            tags['EXIF:ExifIFD:Time:Main:OffsetTimeOriginal'] = '+08:00'
+            exif[37521] = (2, f"{i % 1000:03d}")
+            tags['EXIF:ExifIFD:Time:Main:SubSecTimeOriginal'] = f"{i % 1000:03d}"
+
+        if strip != None:
+            width, height = self.tiff_size
+            ifd0.update({256: (4, width), 257: (4, height), 258: (3, [8, 8, 8]), 259: (3, 1), 262: (3, 2), 273: (4, 'strip'), 277: (3, 3), 278: (4, height), 279: (4, len(strip)), 284: (3, 1)})
+            tags.update({'EXIF:IFD0:Image:Main:ImageWidth': str(width), 'EXIF:IFD0:Image:Main:ImageHeight': str(height)})
+            return ExifToolGUIBenchCorpus.Tiff(ifd0, exif, blobs={'strip': strip}), tags
+
+        thumbnail: bytes = ExifToolGUIBenchCorpus.JPEG_BASE
+        ifd1: dict[int, tuple[int, Any]] = {259: (3, 6), 513: (4, 'thumbnail'), 514: (4, len(thumbnail))}
+        tags['EXIF:IFD1:Image:Main:ThumbnailImage'] = 'base64:' + base64.b64encode(thumbnail).decode('ascii')
+        tiff: bytes = ExifToolGUIBenchCorpus.Tiff(ifd0, exif, ifd1, blobs={'thumbnail': thumbnail})
+        # SOI, APP1 (Exif), then the image without its SOI and APP0 (JFIF)
+        app1: bytes = b'Exif\0\0' + tiff
+        return b'\xff\xd8\xff\xe1' + struct.pack('>H', len(app1) + 2) + app1 + ExifToolGUIBenchCorpus.JPEG_BASE[20:], tags
+
+    def mp4(self, rng: random.Random, i: int) -> tuple[bytes, dict[str, str]]:
+        dt: datetime = self.random_datetime(rng)
+        seconds: int = int((dt.replace(tzinfo=timezone.utc) - self.QUICKTIME_EPOCH).total_seconds())
+        duration: int = rng.randrange(1000, 600000)  # ms
+        mvhd: bytes = struct.pack('>I4sIIIII', 108, b'mvhd', 0, seconds, seconds, 1000, duration) + struct.pack('>IH10x', 0x00010000, 0x0100) \
+            + struct.pack('>9I', 0x00010000, 0, 0, 0, 0x00010000, 0, 0, 0, 0x40000000) + bytes(24) + struct.pack('>I', 2)
+        ftyp: bytes = struct.pack('>I4s4sI', 28, b'ftyp', b'isom', 0x200) + b'isomiso2mp41'
+        mdat: bytes = struct.pack('>I4s', 8 + 1024, b'mdat') + bytes(1024)
+        moov: bytes = struct.pack('>I4s', 8 + len(mvhd), b'moov') + mvhd
+        dt_s: str = dt.strftime('%Y:%m:%d %H:%M:%S')
+        return ftyp + moov + mdat, {
+            'QuickTime:QuickTime:Video:Main:MovieHeaderVersion': '0',
+            'QuickTime:QuickTime:Time:Main:CreateDate': dt_s,
+            'QuickTime:QuickTime:Time:Main:ModifyDate': dt_s,
+            'QuickTime:QuickTime:Video:Main:TimeScale': '1000',
+            'QuickTime:QuickTime:Video:Main:Duration': f"{duration / 1000:g}",
+        }
+
+    def zip(self, file: str, rng: random.Random) -> dict[str, str]:
+        with zipfile.ZipFile(file, 'w', zipfile.ZIP_STORED) as z:
+            for e in range(self.zip_entries):
+                info = zipfile.ZipInfo(f"docs/entry_{e:04d}.txt", (2021, 1 + e % 12, 1 + e % 28, 12, 0, 0))
+                z.writestr(info, f"entry {e} " * rng.randrange(1, 64))
+        tags: dict[str, str] = {}
+        with zipfile.ZipFile(file) as z:
+            for e, info in enumerate(z.infolist()):
+                group: str = f"ZIP:ZIP:Other:Doc{e + 1}"
+                tags.update({
+                    f"{group}:ZipRequiredVersion": str(info.extract_version),
+                    f"{group}:ZipBitFlag": f"0x{info.flag_bits:04x}",
+                    f"{group}:ZipCompression": str(info.compress_type),
+                    f"{group}:ZipModifyDate": '{:04d}:{:02d}:{:02d} {:02d}:{:02d}:{:02d}'.format(*info.date_time),
+                    f"{group}:ZipCRC": f"0x{info.CRC:08x}",
+                    f"{group}:ZipCompressedSize": str(info.compress_size),
+                    f"{group}:ZipUncompressedSize": str(info.file_size),
+                    f"{group}:ZipFileName": info.filename,
+                })
+        return tags
+
+    @staticmethod
+    def Strip(width: int, height: int) -> bytes:
+        row = bytearray()
+        for x in range(width):
+            row += bytes((x * 255 // max(1, width - 1), 128, 255 - x * 255 // max(1, width - 1)))
+        return b''.join(bytes(b ^ (y & 0xff) if c % 3 == 1 else b for c, b in enumerate(row)) for y in range(height))
+
+    @staticmethod
+    def Tiff(ifd0: dict[int, tuple[int, Any]], exif: dict[int, tuple[int, Any]], ifd1: dict[int, tuple[int, Any]] = None, blobs: dict[str, bytes] = None) -> bytes:
+        '''
+        Little-endian TIFF of IFD0 -> ExifIFD, and IFD1 if given. Entries are {tag: (type, value)}:
+        2 ASCII (str), 3 SHORT and 4 LONG (int or list of ints), 7 UNDEFINED (bytes).
+        A LONG value may name 'exif' or a blob, which is replaced by its offset.
+        '''
+        blobs = blobs if blobs else {}
+        ifds: list[dict[int, tuple[int, Any]]] = [ifd0, exif] + ([ifd1] if ifd1 else [])
+
+        offsets: list[int] = []
+        pos: int = 8
+        for ifd in ifds:
+            offsets.append(pos)
+            pos += 2 + 12 * len(ifd) + 4
+
+        def encode(type: int, value) -> tuple[int, bytes]:
+            if type == 2:
+                b = value.encode('utf-8') + b'\0'
+                return len(b), b
+            if type == 7:
+                return len(value), value
+            values = value if isinstance(value, list) else [value]
+            return len(values), b''.join(struct.pack('<H' if type == 3 else '<I', v) for v in values)
+
+        # values longer than 4 bytes follow the IFDs, blobs follow the values
+        values = bytearray()
+        entries: list[list[tuple[int, int, int, Any]]] = []
+        for ifd in ifds:
+            entries.append([])
+            for tag, (type, value) in sorted(ifd.items()):
+                if isinstance(value, str) and type == 4:
+                    entries[-1].append((tag, type, 1, value))
+                    continue
+                count, b = encode(type, value)
+                if len(b) <= 4:
+                    entries[-1].append((tag, type, count, b.ljust(4, b'\0')))
+                else:
+                    entries[-1].append((tag, type, count, pos + len(values)))
+                    values += b
+                    if len(values) % 2:
+                        values += b'\0'
+
+        pos_blobs: int = pos + len(values)
+        offsets_blob: dict[str, int] = {'exif': offsets[1]}
+        for name, blob in blobs.items():
+            offsets_blob[name] = pos_blobs
+            pos_blobs += len(blob)
+
+        out = bytearray(b'II*\0' + struct.pack('<I', offsets[0]))
+        for i, ifd_entries in enumerate(entries):
+            out += struct.pack('<H', len(ifd_entries))
+            for tag, type, count, value in ifd_entries:
+                if isinstance(value, str):
+                    value = struct.pack('<I', offsets_blob[value])
+                elif isinstance(value, int):
+                    value = struct.pack('<I', value)
+                out += struct.pack('<HHI', tag, type, count) + value
+            # IFD0 is chained to IFD1, ExifIFD is a sub-IFD
+            out += struct.pack('<I', offsets[2] if i == 0 and len(offsets) > 2 else 0)
+        out += values
+        for blob in blobs.values():
+            out += blob
+        return bytes(out)
+
+
+class ExifToolGUIStandIn:
+    '''
+    Deterministic stand-in for ExifTool, speaking its stay-open protocol (-stay_open True -@ -,
+    -executeNUM, -echoN with ${status}, -@ argfiles), for benchmarks on machines without Perl.
+
+    Tags come from the sidecars of ExifToolGUIBenchCorpus, File tags from the file system.
+    Reads honour -j, -b, tag and group filters. Writes update sidecars (FileName and Directory
+    move files, FileModifyDate sets the time), and touch files unless -P is given.
+    Option values and print conversion are not interpreted, output is always as with -n.
+    '''
+
+    VERSION: str = '13.10'
+
+    OPTIONS_WITH_ARG: set[str] = {
+        '-charset', '-sep', '-api', '-d', '-c', '-p', '-o', '-w', '-ext', '-x', '-if', '-fileorder', '-userparam', '-srcfile',
+        '-tagsfromfile', '-lang', '-echo1', '-echo2', '-echo3', '-echo4', '-stay_open', '-common_args'
+    }
+    RE_OPTION = re.compile(r'^-(?:[a-z]|[a-z]{1,2}\d?|g[\d:]*|G[\d:]*|overwrite_original\w*|fast2?|struct|nostruct|list\w*|ver|execute\d*|ee\d?|api)$', re.I)
+    RE_NUMBER = re.compile(r'^-?(?:\d|[1-9]\d+)(?:\.\d+)?(?:e[-+]?\d+)?$', re.I)
+    READONLY_GROUPS: set[str] = {'file', 'composite', 'exiftool', 'zip', 'system'}
+
+    FILE_TYPES: dict[str, tuple[str, str]] = {
+        'jpg': ('JPEG', 'image/jpeg'), 'jpeg': ('JPEG', 'image/jpeg'), 'tif': ('TIFF', 'image/tiff'), 'tiff': ('TIFF', 'image/tiff'),
+        'mp4': ('MP4', 'video/mp4'), 'mov': ('MOV', 'video/quicktime'), 'zip': ('ZIP', 'application/zip'),
+    }
+
+    # (group 0, group 1, group 2, name, type, writable), for -listx
+    TAGS: list[tuple[str, str, str, str, str, bool]] = [
+        ('EXIF', 'IFD0', 'Camera', 'Make', 'string', True),
+        ('EXIF', 'IFD0', 'Camera', 'Model', 'string', True),
+        ('EXIF', 'IFD0', 'Image', 'Orientation', 'int16u', True),
+        ('EXIF', 'IFD0', 'Time', 'ModifyDate', 'string', True),
+        ('EXIF', 'IFD0', 'Author', 'Artist', 'string', True),
+        ('EXIF', 'IFD0', 'Image', 'ImageWidth', 'int32u', True),
+        ('EXIF', 'IFD0', 'Image', 'ImageHeight', 'int32u', True),
+        ('EXIF', 'ExifIFD', 'Camera', 'ISO', 'int16u', True),
+        ('EXIF', 'ExifIFD', 'Time', 'DateTimeOriginal', 'string', True),
+        ('EXIF', 'ExifIFD', 'Time', 'CreateDate', 'string', True),
+        ('EXIF', 'ExifIFD', 'Time', 'OffsetTimeOriginal', 'string', True),
+        ('EXIF', 'ExifIFD', 'Time', 'OffsetTime', 'string', True),
+        ('EXIF', 'ExifIFD', 'Time', 'OffsetTimeDigitized', 'string', True),
+        ('EXIF', 'ExifIFD', 'Time', 'SubSecTimeOriginal', 'string', True),
+        ('EXIF', 'ExifIFD', 'Image', 'UserComment', 'undef', True),
+        ('EXIF', 'IFD1', 'Image', 'ThumbnailImage', 'undef', True),
+        ('QuickTime', 'QuickTime', 'Time', 'CreateDate', 'int32u', True),
+        ('QuickTime', 'QuickTime', 'Time', 'ModifyDate', 'int32u', True),
+        ('QuickTime', 'QuickTime', 'Video', 'Duration', 'int32u', False),
+        ('File', 'System', 'Other', 'FileName', 'string', True),
+        ('File', 'System', 'Other', 'Directory', 'string', True),
+        ('File', 'System', 'Time', 'FileModifyDate', 'string', True),
+        ('File', 'System', 'Other', 'FileSize', 'int64u', False),
+        ('ZIP', 'ZIP', 'Other', 'ZipFileName', 'string', False),
+    ]
+
+    def __init__(self, root: str) -> None:
+        self.root: str = os.path.abspath(root)
+        self.media: str = os.path.join(self.root, 'media')
+
+    @staticmethod
+    def Sidecar(root: str, file: str) -> str:
+        return os.path.join(root, 'standin', os.path.relpath(os.path.abspath(file), os.path.join(root, 'media')).replace(os.sep, '__') + '.json')
+
+    @staticmethod
+    def Install(root: str) -> str:
+        '''
+        Write an executable named exiftool running the stand-in over root. Return its directory, for PATH.
+        '''
+        if sys.platform == 'win32':
+            raise SystemExit("exiftoolgui_bench: the stand-in is not available on Windows, run with --exiftool")
+        bin_dir: str = os.path.join(os.path.abspath(root), 'bin')
+        os.makedirs(bin_dir, exist_ok=True)
+        executable: str = os.path.join(bin_dir, 'exiftool')
+        with open(executable, 'w', encoding='utf-8') as f:
+            f.write(
+                f"#!{sys.executable}\n"
+                f"import sys\n"
+                f"sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})\n"
+                f"from exiftoolgui_bench import ExifToolGUIStandIn\n"
+                f"sys.exit(ExifToolGUIStandIn({os.path.abspath(root)!r}).main(sys.argv[1:]))\n"
+            )
+        os.chmod(executable, 0o755)
+        return bin_dir
+
+    '''################################################################
+    Protocol
+    ################################################################'''
+
+    def main(self, argv: list[str]) -> int:
+        stdin = open(sys.stdin.fileno(), 'r', encoding='utf-8', newline='\n', closefd=False)
+        stdout = open(sys.stdout.fileno(), 'w', encoding='utf-8', newline='\n', closefd=False)
+        stderr = open(sys.stderr.fileno(), 'w', encoding='utf-8', newline='\n', closefd=False)
+
+        if argv[:4] != ['-stay_open', 'True', '-@', '-']:
+            out, err, status = self.execute(argv)
+            stdout.write(out)
+            stderr.write(err)
+            stdout.flush()
+            stderr.flush()
+            return status
+
+        args: list[str] = []
+        for line in stdin:
+            line = line.rstrip('\r\n')
+            if line.startswith('-execute'):
+                self.respond(args, line[len('-execute'):], stdout, stderr)
+                args = []
+            elif line == 'False' and args[-1:] == ['-stay_open']:
+                break
+            else:
+                args.append(line)
+        return 0
+
+    def respond(self, args: list[str], seq: str, stdout, stderr) -> None:
+        echoes: list[tuple[int, str]] = []
+        rest: list[str] = []
+        i: int = 0
+        while i < len(args):
+            if re.fullmatch(r'-echo[1-4]', args[i]) and i + 1 < len(args):
+                echoes.append((int(args[i][-1]), args[i + 1]))
+                i += 2
+                continue
+            rest.append(args[i])
+            i += 1
+
+        for n, text in echoes:
+            if n in (1, 2):
+                (stdout if n == 1 else stderr).write(text + '\n')
+        try:
+            out, err, status = self.execute(rest)
+        except Exception as e:
+            out, err, status = '', f"Error: {type(e).__name__}: {e}\n", 1
+        stdout.write(out)
+        stderr.write(err)
+        for n, text in echoes:
+            if n in (3, 4):
+                (stdout if n == 3 else stderr).write(text.replace('${status}', str(status)) + '\n')
+        stdout.write(f"{{ready{seq}}}\n")
+        stdout.flush()
+        stderr.flush()
+
+    def execute(self, args: list[str]) -> tuple[str, str, int]:
+        args = ExifToolGUIStandIn.Expand_Argfiles(args)
+        options: set[str] = set()
+        tags: list[str] = []
+        assignments: list[tuple[str, str]] = []
+        files: list[str] = []
+        i: int = 0
+        while i < len(args):
+            arg: str = args[i]
+            # short options are case-sensitive (-p and -P), long ones are not
+            option: str = arg if len(arg) <= 2 else arg.lower()
+            if option in ExifToolGUIStandIn.OPTIONS_WITH_ARG:
+                i += 2
+                continue
+            if arg.startswith('-') and '=' in arg:
+                tag, _, value = arg[1:].partition('=')
+                assignments.append((tag.rstrip('<+-'), value))
+            elif ExifToolGUIStandIn.RE_OPTION.match(arg):
+                options.add(option)
+            elif arg.startswith('-'):
+                tags.append(arg[1:])
+            elif arg:
+                files.append(arg)
+            i += 1
+
+        if '-ver' in options:
+            return f"{ExifToolGUIStandIn.VERSION}\n", '', 0
+        if '-listx' in options:
+            return self.listx(), '', 0
+        if assignments:
+            return self.write(files, assignments, '-P' in options)
+        return self.read(files, tags, '-b' in options)
+
+    @staticmethod
+    def Expand_Argfiles(args: list[str]) -> list[str]:
+        expanded: list[str] = []
+        i: int = 0
+        while i < len(args):
+            if args[i] == '-@' and i + 1 < len(args):
+                with open(args[i + 1], encoding='utf-8') as f:
+                    expanded.extend(ExifToolGUIStandIn.Expand_Argfiles([line.rstrip('\r\n') for line in f if line.strip() and not line.startswith('#')]))
+                i += 2
+                continue
+            expanded.append(args[i])
+            i += 1
+        return expanded
+
+    '''################################################################
+    Tags
+    ################################################################'''
+
+    def load(self, file: str) -> dict[str, str]:
+        try:
+            with open(ExifToolGUIStandIn.Sidecar(self.root, file), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def store(self, file: str, tags: dict[str, str]) -> None:
+        with open(ExifToolGUIStandIn.Sidecar(self.root, file), 'w', encoding='utf-8') as f:
+            json.dump(tags, f, ensure_ascii=False)
+
+    def metadata(self, file: str) -> dict[str, str]:
+        stat = os.stat(file)
+        extension: str = os.path.splitext(file)[1][1:].lower()
+        file_type, mime_type = ExifToolGUIStandIn.FILE_TYPES.get(extension, (extension.upper(), 'application/unknown'))
+        modified: datetime = datetime.fromtimestamp(stat.st_mtime).astimezone()
+        metadata: dict[str, str] = {
+            'SourceFile': file,
+            'ExifTool:ExifTool:ExifTool:Main:ExifToolVersion': ExifToolGUIStandIn.VERSION,
+            'File:System:Other:Main:FileName': os.path.basename(file),
+            'File:System:Other:Main:Directory': os.path.dirname(file) if os.path.dirname(file) else '.',
+            'File:System:Other:Main:FileSize': str(stat.st_size),
+            'File:System:Time:Main:FileModifyDate': modified.strftime('%Y:%m:%d %H:%M:%S%z')[:-2] + ':' + modified.strftime('%z')[-2:],
+            'File:File:Other:Main:FileType': file_type,
+            'File:File:Other:Main:FileTypeExtension': extension,
+            'File:File:Other:Main:MIMEType': mime_type,
+        }
+        metadata.update(self.load(file))
+        return metadata
+
+    @staticmethod
+    def Match(key: str, tag: str) -> bool:
+        if tag == '*' or tag.lower() == 'all':
+            return True
+        key_s: list[str] = key.lower().split(':')
+        tag_s: list[str] = tag.lower().split(':')
+        name: str = tag_s[-1]
+        if name not in ('all', '*', key_s[-1]):
+            return False
+        return all(group in key_s[:-1] for group in tag_s[:-1])
+
+    def read(self, files: list[str], tags: list[str], binary: bool) -> tuple[str, str, int]:
+        objects: list[str] = []
+        errors: list[str] = []
+        for file in files:
+            if not os.path.isfile(file):
+                errors.append(f"Error: File not found - {file}")
+                continue
+            metadata: dict[str, str] = self.metadata(file)
+            lines: list[str] = []
+            for key, value in metadata.items():
+                if key != 'SourceFile' and tags and not any(ExifToolGUIStandIn.Match(key, tag) for tag in tags):
+                    continue
+                if not binary and value.startswith('base64:'):
+                    value = f"(Binary data {len(base64.b64decode(value[7:]))} bytes, use -b option to extract)"
+                value_json: str = value if ExifToolGUIStandIn.RE_NUMBER.match(value) else json.dumps(value, ensure_ascii=False)
+                lines.append(f"  {json.dumps(key)}: {value_json}")
+            objects.append('{\n' + ',\n'.join(lines) + '\n}')
+        stdout: str = ('[' + ',\n'.join(objects) + ']\n') if objects else ''
+        return stdout, ''.join(error + '\n' for error in errors), 1 if errors else 0
+
+    def write(self, files: list[str], assignments: list[tuple[str, str]], preserve: bool) -> tuple[str, str, int]:
+        updated: int = 0
+        unchanged: int = 0
+        errors: list[str] = []
+        warnings: list[str] = []
+        for file in files:
+            if not os.path.isfile(file):
+                errors.append(f"Error: File not found - {file}")
+                continue
+            tags: dict[str, str] = self.load(file)
+            file_new: str = file
+            changed: bool = False
+            for tag, value in assignments:
+                name: str = tag.split(':')[-1].lower()
+                group: str = tag.split(':')[0].lower() if ':' in tag else ''
+                if name == 'filename':
+                    file_new = os.path.join(os.path.dirname(file_new), value)
+                    continue
+                if name == 'directory':
+                    file_new = os.path.join(value, os.path.basename(file_new))
+                    continue
+                if name == 'filemodifydate':
+                    os.utime(file, (time.time(), ExifToolGUIStandIn.Parse_Datetime(value).timestamp()))
+                    preserve = True
+                    changed = True
+                    continue
+                if group in ExifToolGUIStandIn.READONLY_GROUPS:
+                    warnings.append(f"Warning: Sorry, {tag} is not writable")
+                    continue
+
+                keys: list[str] = [key for key in tags if ExifToolGUIStandIn.Match(key, tag)]
+                if value == '':
+                    for key in keys:
+                        tags.pop(key)
+                    changed = changed or bool(keys)
+                    continue
+                if not keys:
+                    keys = [self.new_key(tag)]
+                for key in keys:
+                    if tags.get(key, None) != value:
+                        tags[key] = value
+                        changed = True
+
+            if file_new != file:
+                if os.path.exists(file_new):
+                    errors.append(f"Error: '{file_new}' already exists - {file}")
+                    continue
+                os.makedirs(os.path.dirname(file_new), exist_ok=True)
+                os.rename(file, file_new)
+                sidecar: str = ExifToolGUIStandIn.Sidecar(self.root, file)
+                if os.path.exists(sidecar):
+                    os.replace(sidecar, ExifToolGUIStandIn.Sidecar(self.root, file_new))
+                changed = True
+            if not changed:
+                unchanged += 1
+                continue
+            self.store(file_new, tags)
+            if not preserve:
+                os.utime(file_new)
+            updated += 1
+
+        stdout: str = ''
+        if updated:
+            stdout += f"    {updated} image files updated\n"
+        if unchanged:
+            stdout += f"    {unchanged} image files unchanged\n"
+        if errors:
+            stdout += f"    {len(errors)} files weren't updated due to errors\n"
+        return stdout, ''.join(line + '\n' for line in warnings + errors), 1 if errors else 0
+
+    def new_key(self, tag: str) -> str:
+        tag_s: list[str] = tag.split(':')
+        for g0, g1, g2, name, _, _ in ExifToolGUIStandIn.TAGS:
+            if name.lower() == tag_s[-1].lower() and (len(tag_s) == 1 or tag_s[0].lower() in (g0.lower(), g1.lower())):
+                return f"{g0}:{g1}:{g2}:Main:{name}"
+        group: str = tag_s[0] if len(tag_s) > 1 else 'XMP'
+        return f"{group}:{group}:Other:Main:{tag_s[-1]}"
+
+    @staticmethod
+    def Parse_Datetime(value: str) -> datetime:
+        match = re.match(r'(\d{4}):(\d{2}):(\d{2}) (\d{2}):(\d{2}):(\d{2})(?:\.\d+)?([-+]\d{2}:?\d{2})?', value)
+        if match == None:
+            raise ValueError(f"invalid date/time: {value}")
+        dt = datetime(*[int(g) for g in match.groups()[:6]])
+        if match.group(7):
+            sign: int = -1 if match.group(7)[0] == '-' else 1
+            hours, minutes = int(match.group(7)[1:3]), int(match.group(7)[-2:])
+            dt = dt.replace(tzinfo=timezone(sign * timedelta(hours=hours, minutes=minutes)))
+        return dt
+
+    def listx(self) -> str:
+        lines: list[str] = ["<?xml version='1.0' encoding='UTF-8'?>", '<taginfo>']
+        tables: dict[tuple[str, str, str], list[tuple]] = {}
+        for tag in ExifToolGUIStandIn.TAGS:
+            tables.setdefault(tag[:3], []).append(tag)
+        for (g0, g1, g2), tags in tables.items():
+            lines.append(f"<table name='{g0}::Main' g0='{g0}' g1='{g1}' g2='{g2}'>")
+            for _, _, _, name, type, writable in tags:
+                lines.append(f" <tag id='{name}' name='{name}' type='{type}' writable='{str(writable).lower()}'/>")
+            lines.append('</table>')
+        lines.append('</taginfo>')
+        return '\n'.join(lines) + '\n'
+
+
+class ExifToolGUIBench:
+    '''
+    Throughput of the data layer and previews over a synthetic corpus, by the stand-in ExifTool unless
+    --exiftool is given. Each step runs --repeat times, results are written as JSON, to be compared
+    across commits:
+
+        python exiftoolgui_bench.py [-n 200] [-r 3] [-o results.json]
+        python exiftoolgui_bench.py --compare base.json new.json
+
+    Settings come from configs/exiftoolgui_settings.json, options given override them for the run only.
+    '''
+
+    def __init__(self, argv: list[str] = None) -> None:
+        self.args: argparse.Namespace = ExifToolGUIBench.Parser().parse_args(argv)
+        self.output: str = os.path.abspath(self.args.output) if self.args.output else None
+        self.root: str = os.path.abspath(self.args.corpus) if self.args.corpus else tempfile.mkdtemp(prefix='exiftoolgui_bench_')
+        self.results: dict[str, dict[str, ]] = {}
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    @staticmethod
+    def Parser() -> argparse.ArgumentParser:
+        parser = argparse.ArgumentParser(prog='exiftoolgui_bench', description='Benchmark ExifToolGUI over a synthetic corpus.')
+        parser.add_argument('-n', '--files', type=int, default=200, help="media files in the corpus, besides ZIP files")
+        parser.add_argument('--zips', type=int, default=2, help="ZIP files of 608 tags each")
+        parser.add_argument('-r', '--repeat', type=int, default=3, help="runs of each step")
+        parser.add_argument('-o', '--output', help="results file (default: ./cache/bench/<time>-<commit>.json)")
+        parser.add_argument('--corpus', help="directory to build the corpus in, kept afterwards (default: a temporary one)")
+        parser.add_argument('--exiftool', action='store_true', help="use ExifTool on PATH instead of the stand-in")
+        parser.add_argument('--batch-size', type=int, help="files per ExifTool call")
+        parser.add_argument('--pipeline', type=int, help="exiftool_pipeline")
+        parser.add_argument('--processes', type=int, help="exiftool_processes")
+        parser.add_argument('--json-decoder', help="json_decoder")
+        parser.add_argument('--steps', help="comma-separated steps to run (default: all)")
+        parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help="compare two results files instead")
+        parser.add_argument('--threshold', type=float, default=0.10, help="slowdown reported as a regression by --compare")
+        return parser
+
+    def prepare(self) -> None:
+        '''
+        Build the corpus, and set up configs and ExifTool before data is created.
+        '''
+        corpus = ExifToolGUIBenchCorpus(self.root, self.args.files, self.args.zips)
+        started: float = time.perf_counter()
+        self.files: list[str] = corpus.build()
+        print(f"corpus: {len(self.files)} files in {corpus.media} ({time.perf_counter() - started:.1f}s)")
+
+        from exiftoolgui_configs import ExifToolGUIConfigs
+        self.configs: ExifToolGUIConfigs = ExifToolGUIConfigs.Instance
+
+        if not self.args.exiftool:
+            os.environ['PATH'] = ExifToolGUIStandIn.Install(self.root) + os.pathsep + os.environ.get('PATH', '')
+            # the stand-in's tag database and spilled records are kept away from the real ones
+            self.configs.raw['config_files']['exiftool_tag_defs'] = os.path.join(self.root, 'cache', 'exiftool_tag_defs_{version}.json')
+            self.configs.raw['config_files']['cache_pool_spill'] = os.path.join(self.root, 'cache', 'cache_pool_spill')
+
+        self.configs.user_settings['dirs'] = [corpus.media]  # for this run only
+        options: dict[str, ] = self.configs.user_settings['exiftoolgui_options']
+        options.update({'recursive': False, 'include_globs': [], 'exclude_globs': [], 'fast_read': 0, 'watch': False})
+        for name in ('batch_size', 'pipeline', 'processes', 'json_decoder'):
+            value = getattr(self.args, name)
+            if value != None:
+                options[name if name in ('batch_size', 'json_decoder') else f"exiftool_{name}"] = value
+
+        from exiftoolgui_data import ExifToolGUIData
+        self.data: ExifToolGUIData = ExifToolGUIData.Instance
+
+    '''################################################################
+    Steps
+    ################################################################'''
+
+    def measure(self, name: str, items: int, step: Callable[[int], Any], setup: Callable[[int], Any] = None) -> None:
+        if self.args.steps and name not in self.args.steps.split(','):
+            return
+        seconds: list[float] = []
+        for r in range(self.args.repeat):
+            if setup != None:
+                setup(r)
+            gc.collect()
+            started: float = time.perf_counter()
+            step(r)
+            seconds.append(time.perf_counter() - started)
+        best: float = min(seconds)
+        self.results[name] = {
+            'items': items,
+            'seconds': [round(s, 6) for s in seconds],
+            'best': round(best, 6),
+            'median': round(statistics.median(seconds), 6),
+            'per_item_ms': round(best / max(1, items) * 1000, 4),
+        }
+        print(f"{name:16s} {items:6d} items  best {best * 1000:9.1f} ms  median {statistics.median(seconds) * 1000:9.1f} ms  {best / max(1, items) * 1000:8.3f} ms/item", flush=True)
+
+    def reload(self, r: int) -> None:
+        self.data.reload(files=self.configs.files)
+
+    def load(self, r: int, force: bool = True) -> None:
+        count: int = len(self.data.cache)
+        batch_size: int = self.configs.batch_size
+        for start in range(0, count, batch_size):
+            self.data.refresh_batch(list(range(start, min(start + batch_size, count))), force=force)
+
+    def get_composite(self, r: int) -> None:
+        tags: list[str] = [tag for tag in self.configs.tags_for_group if tag.startswith('&')]
+        for file_index in range(0, len(self.data.cache)):
+            for tag in tags:
+                self.data.get(file_index, tag, default='')
+
+    def sort(self, tag: str) -> None:
+        '''
+        As sort_table_for_group (by the same key), over values instead of table items.
+        '''
+        sort_value = self.data.sort_key(tag)
+        rows: list[tuple[str, int]] = [(self.data.get(file_index, tag, default=''), file_index) for file_index in range(0, len(self.data.cache))]
+        rows.sort(key=lambda row: sort_value(row[1], row[0]))
+
+    def images(self) -> list[int]:
+        from exiftoolgui_file_types import ExifToolGUIFileTypes
+        return [file_index for file_index, metadata in enumerate(self.data.cache) if ExifToolGUIFileTypes.Instance.classify(metadata['SourceFile']) == ExifToolGUIFileTypes.IMAGE]
+
+    def edit_images(self, r: int) -> None:
+        # EXIF is not writable to videos and archives
+        for file_index in self.images():
+            self.data.edit(file_index, 'EXIF:Artist', f"Bench {r}")
+
+    def previews(self) -> tuple[list, Callable[[], Any]]:
+        '''
+        Preview tasks of image files, as GUI creates them but without table items, and a way to clear the preview cache.
+        '''
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        from PySide6.QtWidgets import QApplication
+        from exiftoolgui import GetPreviewTask
+        from exiftoolgui_file_types import ExifToolGUIFileTypes
+
+        self.app = QApplication.instance() if QApplication.instance() != None else QApplication([])
+        tasks: list = []
+        for metadata in self.data.cache:
+            file: str = metadata['SourceFile']
+            if ExifToolGUIFileTypes.Instance.classify(file) != ExifToolGUIFileTypes.IMAGE:
+                continue
+            tasks.append(GetPreviewTask(0, None, file, self.configs.preview_size, self.configs.preview_precision))
+        return tasks, GetPreviewTask.cache_preview.clear
+
+    def run(self) -> int:
+        if self.args.compare:
+            return ExifToolGUIBench.Compare(*self.args.compare, self.args.threshold)
+
+        try:
+            self.prepare()
+            count: int = len(self.files)
+
+            self.measure('reload', count, self.reload)
+            self.measure('load', count, self.load)
+            self.measure('load_unchanged', count, lambda r: self.load(r, force=False))
+            self.measure('get_composite', count, self.get_composite)
+            tag_datetime: str = next((tag for tag in self.configs.tags_for_group if self.data.is_datetime(tag)), '&EXIF:DateTimeOriginal')
+            self.measure('sort_datetime', count, lambda r: self.sort(tag_datetime))
+            self.measure('sort_text', count, lambda r: self.sort('File:FileName'))
+
+            try:
+                tasks, clear = self.previews()
+            except ImportError as e:
+                print(f"preview: skipped ({e})")
+            else:
+                self.measure('preview', len(tasks), lambda r: [task.get_preview(cache=False, fast=False) for task in tasks], lambda r: clear())
+                self.measure('preview_cached', len(tasks), lambda r: [task.get_preview(cache=True) for task in tasks])
+
+            # last, files are modified
+            self.measure('save', len(self.images()), lambda r: self.data.save(), self.edit_images)
+
+            self.write()
+        finally:
+            if not self.args.corpus:
+                shutil.rmtree(self.root, ignore_errors=True)
+        return 0
+
+    def write(self) -> None:
+        commit: str = ExifToolGUIBench.Commit()
+        results: dict[str, ] = {
+            'time': datetime.now().astimezone().isoformat(timespec='seconds'),
+            'commit': commit,
+            'python': sys.version.split()[0],
+            'platform': sys.platform,
+            'cpus': os.cpu_count(),
+            'exiftool': 'exiftool' if self.args.exiftool else 'stand-in',
+            'files': len(self.files),
+            'repeat': self.args.repeat,
+            'settings': {name: self.configs.user_settings['exiftoolgui_options'].get(name, None) for name in ('batch_size', 'exiftool_pipeline', 'exiftool_processes', 'json_decoder', 'cache_budget_mb')},
+            'results': self.results,
+        }
+        output: str = self.output
+        if output == None:
+            output = os.path.abspath(os.path.join('cache', 'bench', f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{commit if commit else 'unknown'}.json"))
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+        print(f"results: {output}")
+
+    @staticmethod
+    def Commit() -> str:
+        try:
+            commit: str = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+            dirty: str = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return commit + ('+dirty' if dirty else '')
+
+    @staticmethod
+    def Compare(file_base: str, file_new: str, threshold: float) -> int:
+        '''
+        Print best times of both, return 1 if any step is slower by more than threshold.
+        '''
+        with open(file_base, encoding='utf-8') as f:
+            base: dict[str, ] = json.load(f)
+        with open(file_new, encoding='utf-8') as f:
+            new: dict[str, ] = json.load(f)
+
+        print(f"base: {base.get('commit', None)} ({base.get('time', None)}, {base.get('exiftool', None)}, {base.get('files', None)} files)")
+        print(f"new:  {new.get('commit', None)} ({new.get('time', None)}, {new.get('exiftool', None)}, {new.get('files', None)} files)")
+        regressed: list[str] = []
+        for name, result in new['results'].items():
+            result_base = base['results'].get(name, None)
+            if result_base == None:
+                print(f"{name:16s} {'':>12s} {result['per_item_ms']:10.3f} ms/item  (new)")
+                continue
+            ratio: float = result['per_item_ms'] / result_base['per_item_ms'] if result_base['per_item_ms'] > 0 else 1.0
+            flag: str = ''
+            if ratio > 1 + threshold:
+                flag = '  REGRESSION'
+                regressed.append(name)
+            print(f"{name:16s} {result_base['per_item_ms']:10.3f} -> {result['per_item_ms']:10.3f} ms/item  x{ratio:5.2f}{flag}")
+        return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(ExifToolGUIBench(sys.argv[1:]).run())
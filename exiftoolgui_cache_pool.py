@@ -0,0 +1,202 @@
+from collections import OrderedDict
+import os
+import shelve
+import sys
+import threading
+from typing import Any, Callable
+
+
+class ExifToolGUICachePool:
+    '''
+    LRU mapping of file keys to metadata (or records), bounded by an estimated memory budget.
+
+    Entries pinned (files currently listed) are never evicted, neither are those refused by
+    `evictable` (i.e. files with unsaved edits). So the pool might stay over budget if pinned
+    ones alone exceed it.
+
+    Evicted entries are optionally spilled to a shelf on disk, which lives as long as the session,
+    and restored when accessed again.
+    '''
+
+    def __init__(self, budget: int = 0) -> None:
+        self._lock = threading.RLock()
+
+        self.entries: OrderedDict[tuple, dict[str, ]] = OrderedDict()
+        self.sizes: dict[tuple, int] = {}
+        self.size: int = 0
+
+        self.budget: int = budget  # in bytes, 0 for unbounded
+        self.size_stuck: int = 0  # size left after a shrinking that was unable to meet the budget
+        self.pinned: set[tuple] = set()
+        self.evictable: Callable[[tuple, Any], bool] = lambda key, value: True
+        self.on_evicted: Callable[[tuple, Any, bool], None] = None  # (key, value, spilled)
+        self.sizeof: Callable[[Any], int] = ExifToolGUICachePool.Sizeof
+
+        self.spill: shelve.Shelf = None
+        self.spill_file: str = None
+
+        self.count_evicted: int = 0
+        self.count_spilled: int = 0
+        self.count_restored: int = 0
+
+    def configure(self, budget: int, spill_file: str = None) -> None:
+        with self._lock:
+            self.budget = budget
+            self.size_stuck = 0
+
+            if self.spill != None:
+                self.spill.close()
+                self.spill = None
+            self.spill_file = spill_file
+            if spill_file:
+                os.makedirs(os.path.dirname(spill_file), exist_ok=True)
+                # a new shelf each session, since file identities are not reliable across sessions
+                self.spill = shelve.open(spill_file, flag='n')
+
+            self.shrink()
+
+    def close(self) -> None:
+        with self._lock:
+            if self.spill != None:
+                self.spill.close()
+                self.spill = None
+
+    @staticmethod
+    def Sizeof(metadata: dict[str, ]) -> int:
+        # shallow enough: values are str (or lists of str for a few tags)
+        size: int = sys.getsizeof(metadata)
+        for tag, value in metadata.items():
+            size += sys.getsizeof(tag) + sys.getsizeof(value)
+        return size
+
+    '''################################################################
+    Mapping
+    ################################################################'''
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: tuple) -> bool:
+        with self._lock:
+            return key in self.entries or (self.spill != None and repr(key) in self.spill)
+
+    def __getitem__(self, key: tuple) -> dict[str, ]:
+        metadata = self.get(key, None)
+        if metadata == None:
+            raise KeyError(key)
+        return metadata
+
+    def __setitem__(self, key: tuple, metadata: dict[str, ]) -> None:
+        with self._lock:
+            self.discard(key)
+            self.entries[key] = metadata
+            self.sizes[key] = self.sizeof(metadata)
+            self.size += self.sizes[key]
+            self.shrink()
+
+    def get(self, key: tuple, default=None) -> dict[str, ]:
+        with self._lock:
+            metadata = self.entries.get(key, None)
+            if metadata != None:
+                self.entries.move_to_end(key)
+                return metadata
+
+            if self.spill != None:
+                metadata = self.spill.pop(repr(key), None)
+                if metadata != None:
+                    self.count_restored += 1
+                    self[key] = metadata
+                    return metadata
+
+            return default
+
+    def pop(self, key: tuple, default=None) -> dict[str, ]:
+        with self._lock:
+            metadata = self.get(key, None)
+            self.discard(key)
+            return metadata if metadata != None else default
+
+    def discard(self, key: tuple) -> None:
+        with self._lock:
+            if self.entries.pop(key, None) != None:
+                self.size -= self.sizes.pop(key)
+
+    '''################################################################
+    Eviction
+    ################################################################'''
+
+    def pin(self, keys: set[tuple]) -> None:
+        '''
+        Replace keys pinned, entries no longer pinned become evictable.
+        '''
+        with self._lock:
+            self.pinned = keys
+            self.size_stuck = 0
+            self.shrink()
+
+    def shrink(self) -> None:
+        with self._lock:
+            if self.budget <= 0 or self.size <= max(self.budget, self.size_stuck):
+                return
+
+            # from the least recently used, usually only the first few are walked through
+            victims: list[tuple] = []
+            size: int = self.size
+            for key in self.entries:
+                if size <= self.budget:
+                    break
+                if key in self.pinned or not self.evictable(key, self.entries[key]):
+                    continue
+                victims.append(key)
+                size -= self.sizes[key]
+
+            for key in victims:
+                self.evict(key)
+
+            # the rest are pinned or protected, don't walk through them again until the pool grows notably
+            self.size_stuck = self.size + self.budget // 10 if self.size > self.budget else 0
+
+    def evict(self, key: tuple) -> None:
+        metadata = self.entries[key]
+        self.discard(key)
+        self.count_evicted += 1
+
+        spilled: bool = False
+        if self.spill != None:
+            self.spill[repr(key)] = metadata
+            self.count_spilled += 1
+            spilled = True
+
+        if self.on_evicted != None:
+            self.on_evicted(key, metadata, spilled)
+
+    '''################################################################
+    Report
+    ################################################################'''
+
+    def report(self) -> str:
+        budget: str = f"{self.budget / 2**20:.1f} MB" if self.budget > 0 else "unbounded"
+        report: str = f"Cache: {len(self.entries)} files, {self.size / 2**20:.1f} MB of {budget}, {self.count_evicted} evicted"
+        if self.spill != None:
+            report += f", {len(self.spill)} spilled to disk, {self.count_restored} restored"
+        return report
+
+
+if __name__ == "__main__":
+    import time
+
+    pool = ExifToolGUICachePool(budget=64 * 2**20)
+
+    def fake_metadata(i: int) -> dict[str, ]:
+        metadata = {'SourceFile': f"/photos/{i:06d}.jpg"}
+        for t in range(200):
+            metadata[f"EXIF:IFD0:Main:Tag{t}"] = f"value {i:06d}-{t:03d}"
+        return metadata
+
+    elapsed: float = 0
+    for i in range(20000):
+        metadata = fake_metadata(i)
+        start = time.perf_counter()
+        pool[(0, i)] = metadata
+        elapsed += time.perf_counter() - start
+    print(f"{elapsed:.2f}s in pool, {pool.report()}")
@@ -0,0 +1,205 @@
+import argparse
+from glob import glob
+import os
+import sys
+import time
+
+
+class ExifToolGUICLI:
+    '''
+    Headless entry point: list files, then batch by batch load them, run a function of ExifToolGUIFuncs
+    over them (the same way as over files selected in GUI), save and release them, so that memory
+    stays bounded by the batch size. Functions relating files to each other (WHOLE_SET) are run over
+    all files at once instead.
+
+        python -m exiftoolgui_cli <dirs, files or globs> [-f function -p name=value ...]
+
+    Settings come from configs/exiftoolgui_settings.json as for GUI, options given here override
+    them for this run only, and are never saved.
+    '''
+
+    WHOLE_SET: set[str] = {'reverse_order'}
+
+    def __init__(self, argv: list[str] = None) -> None:
+        self.args: argparse.Namespace = ExifToolGUICLI.Parser().parse_args(argv)
+        self.started: float = time.perf_counter()
+
+        # paths given are relative to where it's called, configs are relative to the program
+        self.paths: list[str] = [os.path.abspath(path) for path in self.args.paths]
+        self.ref: str = os.path.abspath(self.args.ref) if self.args.ref else None
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+        from exiftoolgui_configs import ExifToolGUIConfigs
+        from exiftoolgui_data import ExifToolGUIData
+        from exiftoolgui_functions import ExifToolGUIFuncs
+
+        self.configs: ExifToolGUIConfigs = ExifToolGUIConfigs.Instance
+        self.override_configs()
+        self.data: ExifToolGUIData = ExifToolGUIData.Instance
+        self.funcs: ExifToolGUIFuncs = ExifToolGUIFuncs.Instance
+
+    @staticmethod
+    def Parser() -> argparse.ArgumentParser:
+        parser = argparse.ArgumentParser(
+            prog='exiftoolgui_cli',
+            description='Run ExifToolGUI functions over files without GUI.'
+        )
+        parser.add_argument('paths', nargs='*', help="directories, files or glob patterns (default: dirs in settings)")
+        parser.add_argument('-f', '--function', help="function to run: rename, set_value, copy_value, shift_datetime, reverse_order")
+        parser.add_argument('-p', '--param', action='append', default=[], metavar='NAME=VALUE', help="parameter of the function, defaults from configs")
+        parser.add_argument('--ref', help="reference file of the function (default: the first file)")
+        parser.add_argument('-r', '--recursive', action='store_true', default=None, help="scan sub-directories")
+        parser.add_argument('--include', action='append', metavar='GLOB', help="only files matching (repeatable)")
+        parser.add_argument('--exclude', action='append', metavar='GLOB', help="skip files and directories matching (repeatable)")
+        parser.add_argument('--batch-size', type=int, help="files per ExifTool call")
+        parser.add_argument('-n', '--dry-run', action='store_true', help="print edits instead of saving them")
+        parser.add_argument('-q', '--quiet', action='store_true', help="no progress")
+        return parser
+
+    def override_configs(self) -> None:
+        options: dict[str, ] = self.configs.user_settings['exiftoolgui_options']
+        if self.args.recursive != None:
+            options['recursive'] = self.args.recursive
+        if self.args.include != None:
+            options['include_globs'] = self.args.include
+        if self.args.exclude != None:
+            options['exclude_globs'] = self.args.exclude
+        if self.args.batch_size != None:
+            options['batch_size'] = self.args.batch_size
+        # every file is read fully, there is no background to complete partial ones
+        options['fast_read'] = 0
+
+    def progress(self, message: str) -> None:
+        if not self.args.quiet:
+            print(f"[{time.perf_counter() - self.started:8.1f}s] {message}", file=sys.stderr, flush=True)
+
+    '''################################################################
+    Steps
+    ################################################################'''
+
+    def list_files(self) -> list[str]:
+        dirs: list[str] = []
+        files: list[str] = []
+        for path in self.paths:
+            if os.path.isdir(path):
+                dirs.append(path)
+            elif os.path.isfile(path):
+                files.append(path)
+            else:
+                files.extend(sorted(file for file in glob(path, recursive=True) if os.path.isfile(file)))
+
+        if len(self.paths) == 0:
+            dirs = self.configs.dirs
+        if dirs:
+            self.configs.user_settings['dirs'] = dirs  # for this run only
+            files.extend(self.configs.files)
+
+        # in order, without duplicates
+        return list(dict.fromkeys(os.path.normpath(file) for file in files))
+
+    def load(self, file_indexes: list[int]) -> int:
+        '''
+        Load files batch by batch. Return the count of files loaded.
+        '''
+        batch_size: int = self.configs.batch_size
+        for start in range(0, len(file_indexes), batch_size):
+            self.data.refresh_batch(file_indexes[start:start + batch_size])
+            if len(file_indexes) > batch_size:
+                self.progress(f"Load: {min(start + batch_size, len(file_indexes))}/{len(file_indexes)} files")
+        return sum(1 for file_index in file_indexes if len(self.data.cache[file_index]) > 1)
+
+    def function_args(self, file_indexes: list[int]) -> dict[str, ]:
+        param_defs: dict[str, dict[str, ]] = self.configs.functions[self.args.function]
+
+        args: dict[str, ] = {name: param_def['default'] for name, param_def in param_defs.items()}
+        for param in self.args.param:
+            name, sep, value = param.partition('=')
+            if sep == '' or name not in param_defs:
+                raise SystemExit(f"exiftoolgui_cli: unknown parameter '{param}' of {self.args.function}, expected: {', '.join(param_defs.keys())}")
+            if param_defs[name]['type'] == 'bool':
+                args[name] = value.strip().lower() in ('1', 'true', 'yes', 'on')
+            else:
+                args[name] = value
+
+        ref: int = file_indexes[0]
+        if self.ref != None:
+            files: list[str] = [os.path.normpath(metadata['SourceFile']) for metadata in self.data.cache]
+            if self.ref not in files:
+                raise SystemExit(f"exiftoolgui_cli: reference file is not listed: {self.ref}")
+            ref = files.index(self.ref)
+
+        args['file_indexes'] = file_indexes
+        args['ref'] = ref
+        return args
+
+    def save(self, file_indexes: list[int]) -> None:
+        batch_size: int = self.configs.batch_size
+        for start in range(0, len(file_indexes), batch_size):
+            self.data.save(file_indexes[start:start + batch_size])
+            if len(file_indexes) > batch_size:
+                self.progress(f"Save: {min(start + batch_size, len(file_indexes))}/{len(file_indexes)} files")
+
+    def batches(self, file_indexes: list[int], ref: int) -> list[list[int]]:
+        if self.args.function in ExifToolGUICLI.WHOLE_SET:
+            return [file_indexes]
+        # the reference comes last, since functions read it before editing files (i.e. shift_datetime)
+        if ref != None:
+            file_indexes = [file_index for file_index in file_indexes if file_index != ref] + [ref]
+        batch_size: int = self.configs.batch_size
+        return [file_indexes[start:start + batch_size] for start in range(0, len(file_indexes), batch_size)]
+
+    def run(self) -> int:
+        if self.args.function != None and self.args.function not in self.funcs.funcs:
+            raise SystemExit(f"exiftoolgui_cli: unknown function '{self.args.function}', expected: {', '.join(self.funcs.funcs.keys())}")
+
+        files: list[str] = self.list_files()
+        self.progress(f"List: {len(files)} files")
+        self.data.reload(files=files)
+        file_indexes: list[int] = [file_index for file_index in range(len(self.data.cache)) if not self.data.is_ignored(file_index)]
+
+        args: dict[str, ] = None
+        if self.args.function != None and file_indexes:
+            args = self.function_args(file_indexes)
+            self.data.refresh(args['ref'])
+
+        loaded: int = 0
+        edited: int = 0
+        failed: int = 0
+        done: int = 0
+        for batch in self.batches(file_indexes, args['ref'] if args != None else None):
+            loaded += self.load(batch)
+
+            edited_batch: list[int] = []
+            if args != None:
+                self.funcs.Exec(self.args.function, {**args, 'file_indexes': list(batch)})
+                edited_batch = [file_index for file_index in batch if self.data.cache_edited[file_index]]
+
+            if self.args.dry_run:
+                for file_index in edited_batch:
+                    print(f"{self.data.cache[file_index]['SourceFile']}: {dict(self.data.cache_edited[file_index])}")
+            elif edited_batch:
+                self.save(edited_batch)
+
+            for file_index in edited_batch:
+                if self.data.cache_failed[file_index]:
+                    print(f"failed: {self.data.cache[file_index]['SourceFile']}: {dict(self.data.cache_failed[file_index])}", file=sys.stderr)
+                    failed += 1
+            edited += len(edited_batch)
+
+            if self.args.dry_run:
+                for file_index in edited_batch:
+                    self.data.reset(file_index)
+            self.data.release_files(batch)
+            done += len(batch)
+            self.progress(f"Batch: {done}/{len(file_indexes)} files, {edited} edited" + (f" by {self.args.function}" if args != None else ""))
+
+        print(
+            f"{len(files)} files listed, {loaded} loaded, {len(files) - len(file_indexes)} ignored, "
+            f"{edited} edited, {0 if self.args.dry_run else edited - failed} saved, {failed} failed, "
+            f"{len(self.data.quarantine)} quarantined in {time.perf_counter() - self.started:.1f}s (see {os.path.abspath(self.data.log.source_file)})"
+        )
+        return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(ExifToolGUICLI(sys.argv[1:]).run())
@@ -1,8 +1,11 @@
 from collections import OrderedDict
 import json
+from typing import Iterator
 
 import os
 
+from exiftoolgui_dir_index import ExifToolGUIDirIndex
+
 
 class ExifToolGUIConfigs:
     _instance: 'ExifToolGUIConfigs' = None
@@ -31,21 +34,34 @@ class ExifToolGUIConfigs:
     def file_exiftool_option_defs(self) -> str:
         return self.raw['config_files']['exiftool_option_defs']
 
+    @property
+    def file_exiftool_tag_defs(self) -> str:
+        return self.raw['config_files']['exiftool_tag_defs']
+
+    @property
+    def file_cache_pool_spill(self) -> str:
+        return self.raw['config_files']['cache_pool_spill']
+
+    @property
+    def file_service(self) -> str:
+        return self.raw['config_files']['service']
+
+    @property
+    def file_stats(self) -> str:
+        return self.raw['config_files']['stats']
+
     @property
     def dirs(self) -> list:
         return self.user_settings['dirs']
 
     @property
     def files(self) -> list:
-        all_files: list = []
-        for top in self.dirs:
-            for root, dirs, files in os.walk(top):
-                for file in files:
-                    file_path: str = os.path.join(root, file).replace('\\', '/')
-                    # file_path = os.path.normpath(file_path)
-                    all_files.append(file_path)
-                break
-        return all_files
+        # listings are cached, and rescanned only when directories change
+        return ExifToolGUIDirIndex.Instance.files(self.dirs, self.recursive, self.max_depth, self.include_globs, self.exclude_globs)
+
+    def iter_files(self) -> Iterator[list[str]]:
+        # stream files in chunks while directories are being scanned
+        return ExifToolGUIDirIndex.Instance.walk(self.dirs, self.recursive, self.max_depth, self.include_globs, self.exclude_globs, self.batch_size)
 
     '''################################################################
     exiftool_options
@@ -92,6 +108,103 @@ class ExifToolGUIConfigs:
     def preview_precision(self) -> int:
         return self.user_settings['exiftoolgui_options']['preview_precision']
 
+    @property
+    def batch_size(self) -> int:
+        # number of files handled by a single ExifTool call in batched operations
+        return self.user_settings['exiftoolgui_options'].get('batch_size', 100)
+
+    @property
+    def recursive(self) -> bool:
+        return self.user_settings['exiftoolgui_options'].get('recursive', False)
+
+    @property
+    def max_depth(self) -> int:
+        # levels of sub-directories to scan in recursive mode, negative for no limit
+        return self.user_settings['exiftoolgui_options'].get('max_depth', -1)
+
+    @property
+    def include_globs(self) -> list[str]:
+        return self.user_settings['exiftoolgui_options'].get('include_globs', [])
+
+    @property
+    def exclude_globs(self) -> list[str]:
+        return self.user_settings['exiftoolgui_options'].get('exclude_globs', [])
+
+    @property
+    def prefilter(self) -> bool:
+        # classify files by extension and magic bytes, see file_types
+        return self.user_settings['exiftoolgui_options'].get('prefilter', True)
+
+    @property
+    def watch(self) -> bool:
+        # refresh files changed by other programs
+        return self.user_settings['exiftoolgui_options'].get('watch', True)
+
+    @property
+    def watch_interval(self) -> float:
+        # seconds between polls, for directories the system is unable to watch
+        return self.user_settings['exiftoolgui_options'].get('watch_interval', 5)
+
+    @property
+    def exiftool_timeout(self) -> float:
+        # seconds an ExifTool call is allowed to take before the process is restarted, 0 for no limit
+        return self.user_settings['exiftoolgui_options'].get('exiftool_timeout', 60)
+
+    @property
+    def exiftool_pipeline(self) -> int:
+        # requests kept in flight on an asynchronous ExifTool process, 0 to wait for each call
+        return self.user_settings['exiftoolgui_options'].get('exiftool_pipeline', 0)
+
+    @property
+    def exiftool_processes(self) -> int:
+        # ExifTool processes sharing calls, for concurrent callers (i.e. the service)
+        return self.user_settings['exiftoolgui_options'].get('exiftool_processes', 1)
+
+    @property
+    def stats(self) -> bool:
+        # collect timers and counters of hot paths, see ExifToolGUIStats
+        return self.user_settings['exiftoolgui_options'].get('stats', False)
+
+    @property
+    def stats_interval(self) -> float:
+        # seconds between snapshots written to the stats file, 0 for none
+        return self.user_settings['exiftoolgui_options'].get('stats_interval', 60)
+
+    @property
+    def profile(self) -> bool:
+        # sample stacks of threads and snapshot memory, reports are written next to the log, see ExifToolGUIProfiler
+        return self.user_settings['exiftoolgui_options'].get('profile', False)
+
+    @property
+    def profile_interval(self) -> float:
+        # seconds between memory snapshots and reports written
+        return self.user_settings['exiftoolgui_options'].get('profile_interval', 60)
+
+    @property
+    def json_decoder(self) -> str:
+        # decoder of ExifTool's JSON output: auto, stdlib or msgspec
+        return self.user_settings['exiftoolgui_options'].get('json_decoder', 'auto')
+
+    @property
+    def cache_budget_mb(self) -> float:
+        # memory for metadata of files, files listed and files with unsaved edits are always kept, 0 for no limit
+        return self.user_settings['exiftoolgui_options'].get('cache_budget_mb', 1024)
+
+    @property
+    def cache_spill(self) -> bool:
+        # spill metadata evicted to disk instead of dropping it
+        return self.user_settings['exiftoolgui_options'].get('cache_spill', False)
+
+    @property
+    def fast_read(self) -> int:
+        # tier of the first read of files listed: 0 full, 1 '-fast', 2 '-fast2', partial ones are read fully later
+        return self.user_settings['exiftoolgui_options'].get('fast_read', 0)
+
+    @property
+    def binary_cache_mb(self) -> float:
+        # memory for binary values fetched on demand (i.e. previews), 0 for no caching
+        return self.user_settings['exiftoolgui_options'].get('binary_cache_mb', 64)
+
     @property
     def tags_for_group(self) -> list:
         return self.user_settings['tags_for_group']
@@ -128,6 +241,10 @@ class ExifToolGUIConfigs:
     def conditional_tags(self) -> dict[str, dict[str, dict[str, str]]]:
         return self.raw['conditional_tags']
 
+    @property
+    def file_types(self) -> dict[str, dict[str, list]]:
+        return self.raw.get('file_types', {})
+
     '''################################################################
     IO
     ################################################################'''
@@ -1,4 +1,6 @@
-from typing import Union, Any
+from typing import Union, Any, Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import ExitStack
 import json
 
 import base64
@@ -9,13 +11,26 @@ from datetime import datetime, timezone
 import os
 import atexit
 import locale
+import queue
+import threading
+import warnings
 
 # import exiftool
 from exiftool.helper import ExifToolHelper, ExifToolExecuteError
 
+from exiftool_tag_defs import ExifToolTagDefs
 from exiftoolgui_aide import ExifToolGUIAide
+from exiftoolgui_args import ExifToolGUIArgs
+from exiftoolgui_cache_pool import ExifToolGUICachePool
 from exiftoolgui_configs import ExifToolGUIConfigs
+from exiftoolgui_dir_index import ExifToolGUIDirIndex
+from exiftoolgui_driver import ExifToolGUIDriver
+from exiftoolgui_file_types import ExifToolGUIFileTypes
+from exiftoolgui_json import ExifToolGUIJson
 from exiftoolgui_log import ExifToolGUILog
+from exiftoolgui_record import ExifToolGUIBinary, ExifToolGUIFileRecord, ExifToolGUIMetadata, ExifToolGUIRecordView
+from exiftoolgui_stats import ExifToolGUIStats
+from exiftoolgui_watchdog import ExifToolGUIWatchdog, ExifToolTimeoutError
 
 
 class ExifToolGUIData:
@@ -32,17 +47,92 @@ class ExifToolGUIData:
     Cache
     ################################################################'''
 
-    cache_pool: dict[str, dict[str, ]] = {}
-    cache_pool_edited: dict[str, dict[str, ]] = {}
-    cache_pool_failed: dict[str, dict[str, ]] = {}
+    '''
+    Pools are keyed by file identity instead of path, so that renaming or moving files
+    does not force a reload. The path each key was last seen at is kept as an alias.
+    Record pool is bounded, records of files not listed and without unsaved edits are evicted.
+    '''
+    cache_pool: ExifToolGUICachePool = ExifToolGUICachePool()  # {key: ExifToolGUIFileRecord}
+    cache_pool_alias: dict[str, tuple] = {}
+    cache_pool_stat: dict[tuple, tuple[int, int]] = {}  # (size, mtime) when loaded
+
+    '''
+    Binary values are kept out of metadata (see ExifToolGUIBinary), bytes fetched are kept in a pool
+    of their own, keyed along with size and mtime of the file, so that modified files miss.
+    '''
+    binary_pool: ExifToolGUICachePool = ExifToolGUICachePool()  # {(key, size, mtime, tag): bytes}
 
     @staticmethod
-    def Get_Metadata(cache_pool: dict[str, dict[str, ]], file: str) -> dict[str, ]:
-        metadata = cache_pool.get(file, None)
-        if metadata == None:
-            metadata = {}
-            cache_pool[file] = metadata
-        return metadata
+    def Binary_Key(file: str, tag: str) -> tuple:
+        try:
+            stat = os.stat(file)
+        except OSError:
+            return None
+        return (ExifToolGUIData.File_Key(file, stat), stat.st_size, stat.st_mtime_ns, tag)
+
+    @staticmethod
+    def File_Key(file: str, stat: os.stat_result = None) -> tuple:
+        try:
+            stat = stat if stat != None else os.stat(file)
+        except OSError:
+            return (file,)
+
+        # device + inode (file index on windows)
+        if stat.st_ino:
+            return (stat.st_dev, stat.st_ino)
+
+        # some file systems (i.e. network shares) don't provide inode
+        return (os.path.normcase(os.path.abspath(file)), stat.st_size, stat.st_mtime_ns)
+
+    @staticmethod
+    def Get_Key(file: str, stat: os.stat_result = None) -> tuple:
+        key = ExifToolGUIData.File_Key(file, stat)
+        ExifToolGUIData.cache_pool_alias[file] = key
+        return key
+
+    @staticmethod
+    def Get_Record(key: tuple, file: str) -> ExifToolGUIFileRecord:
+        record: ExifToolGUIFileRecord = ExifToolGUIData.cache_pool.get(key, None)
+        if record == None:
+            record = ExifToolGUIFileRecord(ExifToolGUIMetadata({'SourceFile': file}))
+            ExifToolGUIData.cache_pool[key] = record
+        return record
+
+    @staticmethod
+    def Move_Metadata(file_old: str, file_new: str) -> tuple:
+        '''
+        Update the alias of a renamed, moved or rewritten file.
+        Pool, pin and stat entries of the old key are moved to the new key, if it changed.
+        '''
+        key_old = ExifToolGUIData.cache_pool_alias.pop(file_old, None)
+        key_new = ExifToolGUIData.Get_Key(file_new)
+
+        if key_old != None and key_old != key_new:
+            if key_old in ExifToolGUIData.cache_pool.pinned:
+                ExifToolGUIData.cache_pool.pinned.discard(key_old)
+                ExifToolGUIData.cache_pool.pinned.add(key_new)
+            for cache_pool in (ExifToolGUIData.cache_pool, ExifToolGUIData.cache_pool_stat):
+                value = cache_pool.pop(key_old, None)
+                if value != None:
+                    cache_pool[key_new] = value
+
+        return key_new
+
+    @staticmethod
+    def Is_Stale(key: tuple, stat: os.stat_result) -> bool:
+        stat_loaded = ExifToolGUIData.cache_pool_stat.get(key, None)
+        if stat_loaded == None or stat == None:
+            return False
+        return stat_loaded != (stat.st_size, stat.st_mtime_ns)
+
+    @staticmethod
+    def On_Evicted(key: tuple, record: ExifToolGUIFileRecord, spilled: bool) -> None:
+        # stat is kept for spilled ones, to tell whether they are still valid when restored
+        if not spilled:
+            ExifToolGUIData.cache_pool_stat.pop(key, None)
+            file = record.metadata.get('SourceFile', None)
+            if ExifToolGUIData.cache_pool_alias.get(file, None) == key:
+                ExifToolGUIData.cache_pool_alias.pop(file)
 
     '''################################################################
     Init
@@ -106,8 +196,10 @@ class ExifToolGUIData:
         see:
             [https://github.com/sylikc/pyexiftool/issues/76]
             [https://sylikc.github.io/pyexiftool/faq.html#pyexiftool-json-turns-some-text-fields-into-numbers]
+        The decoder is pluggable ("json_decoder"), a faster parser is used if installed, see ExifToolGUIJson.
         '''
-        self.exiftool.set_json_loads(json.loads, parse_float=str, parse_int=str)
+        ExifToolGUIData.Json_Loads = ExifToolGUIJson.Get(ExifToolGUIConfigs.Instance.json_decoder)
+        self.exiftool.set_json_loads(ExifToolGUIData.Json_Loads)
 
         '''
         Notice:
@@ -121,74 +213,463 @@ class ExifToolGUIData:
 
         self.configs: ExifToolGUIConfigs = ExifToolGUIConfigs.Instance
         self.log: ExifToolGUILog = ExifToolGUILog.Instance
+        self.stats: ExifToolGUIStats = ExifToolGUIStats.Instance
+
+        '''
+        With "exiftool_pipeline" > 0, reading and writing go through an asynchronous driver on a process
+        of its own, which keeps that many requests in flight instead of waiting for each one.
+        With "exiftool_processes" > 1, there is a driver per process, and each call goes to the least busy one,
+        so that concurrent callers (i.e. clients of the service) are not serialised on a single process.
+        The helper above is still used for the tag database.
+        '''
+        self.drivers: list[ExifToolGUIDriver] = []
+        self.drivers_load: list[int] = []  # calls running on each driver
+        self.drivers_locker = threading.Lock()
+        if self.configs.exiftool_pipeline > 0 or self.configs.exiftool_processes > 1:
+            for i in range(max(1, self.configs.exiftool_processes)):
+                driver = ExifToolGUIDriver(self.exiftool.executable, self.exiftool.encoding, max(1, self.configs.exiftool_pipeline))
+                atexit.register(driver.terminate)
+                self.drivers.append(driver)
+                self.drivers_load.append(0)
+            self.stats.gauge('queue:exiftool', lambda: sum(self.drivers_load))
+
+        # edits are kept after saving, only unsaved ones protect a record
+        ExifToolGUIData.cache_pool.evictable = lambda key, record: len(ExifToolGUIData.Unsaved(record)) == 0
+        ExifToolGUIData.cache_pool.on_evicted = ExifToolGUIData.On_Evicted
+        ExifToolGUIData.cache_pool.sizeof = ExifToolGUIFileRecord.Sizeof
+        ExifToolGUIData.cache_pool.configure(
+            int(self.configs.cache_budget_mb * 2**20),
+            self.configs.file_cache_pool_spill if self.configs.cache_spill else None
+        )
+        atexit.register(ExifToolGUIData.cache_pool.close)
+
+        ExifToolGUIData.binary_pool.sizeof = len
+        ExifToolGUIData.binary_pool.configure(int(self.configs.binary_cache_mb * 2**20))
 
-        self.cache: list[dict[str, ]] = []
-        self.cache_edited: list[dict[str, ]] = []
-        self.cache_failed: list[dict[str, ]] = []
+        self.stats.gauge('cache:metadata:files', lambda: len(ExifToolGUIData.cache_pool))
+        self.stats.gauge('cache:metadata:mb', lambda: round(ExifToolGUIData.cache_pool.size / 2**20, 2))
+        self.stats.gauge('cache:metadata:evicted', lambda: ExifToolGUIData.cache_pool.count_evicted)
+        self.stats.gauge('cache:binary:mb', lambda: round(ExifToolGUIData.binary_pool.size / 2**20, 2))
+        self.stats.gauge('files:listed', lambda: len(self.records))
+        self.stats.gauge('files:quarantined', lambda: len(self.quarantine))
+
+        # loaded in the background, since building it costs a few seconds for the first time
+        self.tag_defs: ExifToolTagDefs = ExifToolTagDefs.Instance
+        self.tag_defs_tried: bool = False
+
+        self.file_types: ExifToolGUIFileTypes = ExifToolGUIFileTypes.Instance
+
+        '''
+        Concurrency:
+            - io_locker serialises calls to the ExifTool process, and is held during them only.
+            - locker guards the file list, pools and publishing of records. It is never held
+              during ExifTool calls, and is never taken while io_locker is held by the same thread.
+        Loaded metadata is published by swapping record.metadata as a whole, never modified in place,
+        so a metadata object is a consistent snapshot. Hold locker to read several of them consistently.
+        '''
+        self.io_locker = threading.RLock()
+        self.locker = threading.RLock()
+
+        '''
+        A file making ExifTool hang (i.e. a zip file with hundreds of duplicated tags) would block
+        every call queued behind it. Calls run under a deadline, the process is killed and restarted
+        when it passes, and the file is quarantined until it's modified:
+            {key: (size, mtime)}
+        '''
+        self.watchdog: ExifToolGUIWatchdog = ExifToolGUIWatchdog(self.kill_exiftool)
+        self.spawner: queue.Queue = None  # of futures, see start_exiftool
+        self.submitter: ThreadPoolExecutor = None  # see submit_read_tags
+        self.count_started: int = 0
+        self.quarantine: dict[tuple, tuple[int, int]] = {}
+
+        # encoding of non-utf8 values found per camera and per directory, see fix_non_utf8_values_batch
+        self.non_utf8_encoding_hits: dict[tuple, str] = {}
+
+        # saved, edited and failed state of listed files, also viewed as parallel lists
+        self.records: list[ExifToolGUIFileRecord] = []
+        self.cache = ExifToolGUIRecordView(self.records, 'metadata')
+        self.cache_edited = ExifToolGUIRecordView(self.records, 'edited')
+        self.cache_failed = ExifToolGUIRecordView(self.records, 'failed')
+
+        # per-directory index of lower-cased file names (on disk and pending) -> owner file_index (-1: not loaded)
+        self.name_index: dict[str, dict[str, int]] = {}
+        self.name_index_suffix: dict[tuple[str, str], int] = {}
+        self.name_index_pending: dict[int, tuple[str, str, tuple[str, str], int]] = {}  # (dir, name, suffix key, suffix)
 
     @property
     def cache_unsaved(self) -> list[dict[str, ]]:
-        unsaved: list[dict[str, ]] = []
-        for file_index in range(0, len(self.cache_edited)):
-            unsaved.append({})
-            edited = self.cache_edited[file_index]
-            for tag_edited, value_edited in edited.items():
-                value_saved = ExifToolGUIData.Get(self.cache[file_index], tag_edited, default='')
-                value_failed = ExifToolGUIData.Get(self.cache_failed[file_index], tag_edited)
-                if value_edited != str(value_saved) and value_edited != value_failed:
-                    unsaved[file_index][tag_edited] = value_edited
+        return [ExifToolGUIData.Unsaved(record) for record in list(self.records)]
+
+    @staticmethod
+    def Unsaved(record: ExifToolGUIFileRecord) -> dict[str, ]:
+        '''
+        Edits of a file neither saved (equal to the saved value) nor failed.
+        '''
+        unsaved: dict[str, ] = {}
+        for tag_edited, value_edited in record.edited.items():
+            value_saved = ExifToolGUIData.Get(record.metadata, tag_edited, default='')
+            value_failed = ExifToolGUIData.Get(record.failed, tag_edited)
+            if value_edited != str(value_saved) and value_edited != value_failed:
+                unsaved[tag_edited] = value_edited
         return unsaved
 
     '''################################################################
     Load
     ################################################################'''
 
-    def reload(self):
-        self.cache.clear()
-        self.cache_edited.clear()
-        self.cache_failed.clear()
+    def reload(self, files: list[str] = None) -> dict[int, int]:
+        '''
+        Rebuild the file list from directories, or from files given (i.e. an empty list to be appended later).
+        Return the diff against the last listing as {old file_index: new file_index} of files kept,
+        files not in it are gone, and new file indexes not in its values are added.
+        '''
+        files = self.configs.files if files == None else files
+
+        with self.locker:
+            records_old = list(self.records)  # keep them alive, so that ids are not reused during reloading
+            indexes_old: dict[int, int] = {id(record): file_index for file_index, record in enumerate(records_old)}
+
+            self.records.clear()
+
+            self.append_files(files)
+
+            # files no longer listed become evictable
+            ExifToolGUIData.cache_pool.pin(set(ExifToolGUIData.cache_pool_alias.get(metadata['SourceFile'], None) for metadata in self.cache))
+
+            kept: dict[int, int] = {}
+            for file_index, record in enumerate(self.records):
+                file_index_old = indexes_old.get(id(record), None)
+                if file_index_old != None:
+                    kept[file_index_old] = file_index
+            return kept
+
+    def remove_files(self, files: set[str]) -> dict[int, int]:
+        '''
+        Remove files from the file list, metadata stays in pools (evictable).
+        Return {old file_index: new file_index} of files kept, as reload does.
+        '''
+        with self.locker:
+            self.clear_name_index()
+
+            kept: dict[int, int] = {}
+            records: list[ExifToolGUIFileRecord] = []
+            for file_index, record in enumerate(self.records):
+                if record.metadata['SourceFile'] in files:
+                    continue
+                kept[file_index] = len(records)
+                records.append(record)
+            self.records[:] = records  # in place, viewed by cache, cache_edited and cache_failed
+
+            ExifToolGUIData.cache_pool.pin(set(ExifToolGUIData.cache_pool_alias.get(metadata['SourceFile'], None) for metadata in self.cache))
+            return kept
+
+    def release_files(self, file_indexes: list[int]) -> None:
+        '''
+        Drop metadata of files, which stay listed as if never loaded (i.e. processed batch by batch).
+        Files with unsaved edits are kept. Reload them by refresh.
+        '''
+        with self.locker:
+            for file_index in file_indexes:
+                record: ExifToolGUIFileRecord = self.records[file_index]
+                if len(ExifToolGUIData.Unsaved(record)) > 0:
+                    continue
+
+                file: str = record.metadata['SourceFile']
+                record = ExifToolGUIFileRecord(ExifToolGUIMetadata({'SourceFile': file}))
+                key = ExifToolGUIData.cache_pool_alias.get(file, None)
+                if key != None:
+                    ExifToolGUIData.cache_pool[key] = record
+                    ExifToolGUIData.cache_pool_stat.pop(key, None)
+                self.records[file_index] = record
+
+    def append_files(self, files: list[str]) -> list[int]:
+        '''
+        Append files to the file list, reusing metadata cached for them. Return their file indexes.
+        '''
+        # stated afresh, files modified in place keep the mtime of their directory (and its listing)
+        stats: list[os.stat_result] = []
+        for file in files:
+            try:
+                stats.append(os.stat(file))
+            except OSError:
+                stats.append(None)
+
+        with self.locker:
+            self.clear_name_index()
+
+            file_indexes: list[int] = []
+            for file, stat in zip(files, stats):
+                key = ExifToolGUIData.Get_Key(file, stat)
+                ExifToolGUIData.cache_pool.pinned.add(key)
+
+                record: ExifToolGUIFileRecord = ExifToolGUIData.cache_pool.get(key, None)
+                if record != None and ExifToolGUIData.Is_Stale(key, stat):
+                    # modified since loaded, i.e. while evicted or unlisted, edits are kept
+                    record.metadata = ExifToolGUIMetadata({'SourceFile': file})
+                self.stats.hit('cache:metadata', record != None and len(record.metadata) > 1)
+                if record != None and record.metadata.get('SourceFile', file) != file:
+                    # renamed or moved since cached
+                    self.relocate_record(key, record, file)
+
+                self.records.append(ExifToolGUIData.Get_Record(key, file))
+                file_indexes.append(len(self.records) - 1)
+            return file_indexes
+
+    def relocate_record(self, key: tuple, record: ExifToolGUIFileRecord, file: str) -> None:
+        size_cached = ExifToolGUIData.Get(record.metadata, 'File:FileSize')
+        if size_cached != None and str(size_cached) != str(os.path.getsize(file)):
+            # the key is reused by another file (i.e. inode of a deleted file)
+            ExifToolGUIData.cache_pool.pop(key, None)
+            return
+
+        metadata = record.metadata.copy()
+        metadata['SourceFile'] = file
+        ExifToolGUIData.Set(metadata, 'File:FileName', os.path.basename(file))
+        ExifToolGUIData.Set(metadata, 'File:Directory', os.path.dirname(file))
+        record.metadata = metadata
+
+    FAST_PARAMS: dict[int, list[str]] = {1: ['-fast'], 2: ['-fast2']}
+
+    def refresh(self, file_index: int, fast: int = 0) -> None:
+        self.refresh_batch([file_index], fast=fast)
+
+    def refresh_batch(self, file_indexes: list[int], force: bool = True, fast: int = 0) -> list[int]:
+        '''
+        Reload files by a single ExifTool call.
+        Unless forced, files not modified since last loaded are skipped.
+        Files of ignored types are always skipped.
+        Return file indexes reloaded.
+        ExifTool is called without holding locker, results are published to records afterwards.
+
+        With a fast tier (1: '-fast', 2: '-fast2'), ExifTool stops before the end of large files
+        (i.e. trailers, or the rest of a video once its header is read), and records are marked
+        partial, to be read fully later, see complete_batch.
+        '''
+        file_indexes = [file_index for file_index in file_indexes if not self.is_ignored(file_index)]
+        if not force:
+            count: int = len(file_indexes)
+            file_indexes = [file_index for file_index in file_indexes if self.is_modified(file_index)]
+            self.stats.hit('cache:unchanged', True, count - len(file_indexes))
+            self.stats.hit('cache:unchanged', False, len(file_indexes))
+        if len(file_indexes) == 0:
+            return file_indexes
+
+        with self.locker:
+            records = [self.records[file_index] for file_index in file_indexes]
+        files = [record.metadata['SourceFile'] for record in records]
+
+        results = self.load_batch(files, fast=fast)
+        metadatas = [ExifToolGUIMetadata(results[file]) for file in files]
+
+        file_indexes_published: list[int] = []
+        with self.locker:
+            for file_index, record, file, metadata in zip(file_indexes, records, files, metadatas):
+                if record.metadata['SourceFile'] != file:
+                    # renamed meanwhile, the result is outdated
+                    continue
+                record.metadata = metadata  # swapped as a whole
+                record.partial = fast > 0
+                # the key changes if the file was rewritten (new inode, or new size and mtime without inodes)
+                key = ExifToolGUIData.Move_Metadata(file, file)
+                ExifToolGUIData.cache_pool[key] = record  # also re-measured
+                ExifToolGUIData.Record_Stat(key, file)
+                file_indexes_published.append(file_index)
+        return file_indexes_published
+
+    def complete_batch(self, file_indexes: list[int]) -> list[int]:
+        '''
+        Read fully the files still partial. Return file indexes reloaded.
+        '''
+        with self.locker:
+            file_indexes = [file_index for file_index in file_indexes if self.records[file_index].partial]
+        if len(file_indexes) == 0:
+            return file_indexes
+        return self.refresh_batch(file_indexes)
 
-        for file in self.configs.files:
-            metadata = ExifToolGUIData.Get_Metadata(ExifToolGUIData.cache_pool, file)
-            self.cache.append(metadata)
-            if len(metadata) == 0:
-                metadata['SourceFile'] = file
+    def is_partial(self, file_index: int) -> bool:
+        return self.records[file_index].partial
 
-            self.cache_edited.append(ExifToolGUIData.Get_Metadata(ExifToolGUIData.cache_pool_edited, file))
-            self.cache_failed.append(ExifToolGUIData.Get_Metadata(ExifToolGUIData.cache_pool_failed, file))
+    @staticmethod
+    def Record_Stat(key: tuple, file: str) -> None:
+        try:
+            stat = os.stat(file)
+            ExifToolGUIData.cache_pool_stat[key] = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            ExifToolGUIData.cache_pool_stat.pop(key, None)
 
-    def refresh(self, file_index: int) -> None:
+    def is_modified(self, file_index: int) -> bool:
         file = self.cache[file_index]['SourceFile']
-        metadata = self.load(file)
-        self.cache[file_index] = metadata
-        ExifToolGUIData.cache_pool[file] = metadata
+        stat_loaded = ExifToolGUIData.cache_pool_stat.get(ExifToolGUIData.cache_pool_alias.get(file, None), None)
+        if stat_loaded == None:
+            return True
+        try:
+            stat = os.stat(file)
+        except OSError:
+            return True
+        return stat_loaded != (stat.st_size, stat.st_mtime_ns)
+
+    def is_ignored(self, file_index: int) -> bool:
+        return self.file_types.is_ignored(self.cache[file_index]['SourceFile'])
 
     def reset(self, file_index: int) -> None:
-        self.cache_edited[file_index].clear()
-        self.cache_failed[file_index].clear()
+        with self.locker:
+            self.cache_edited[file_index].clear()
+            self.cache_failed[file_index].clear()
+            self.release_file_name(file_index)
 
     def rebuild(self, file_index: int):
+        self.rebuild_batch([file_index])
+
+    def rebuild_batch(self, file_indexes: list[int]) -> dict[int, str]:
+        '''
+        Rebuild metadata of files by a single ExifTool call, and reload them by another one.
+        Return errors of files failed.
+        '''
         commd: str = '-exif:all= -tagsfromfile @ -all:all -unsafe -charset filename=utf8'
         params = commd.split(' ')
-        file = self.cache[file_index]['SourceFile']
-        self.execute(file, params)
-        self.refresh(file_index)
+        with self.locker:
+            file_indexes = [file_index for file_index in file_indexes if not self.is_ignored(file_index)]
+            files = [self.cache[file_index]['SourceFile'] for file_index in file_indexes]
+        errors = self.execute_batch(files, params, 'rebuild')
+        self.refresh_batch(file_indexes)
+        return {file_index: errors[file] for file_index, file in zip(file_indexes, files) if file in errors}
+
+    def load(self, file: str, tags: list[str] = None, fast: int = 0) -> dict[str, ]:
+        return self.load_batch([file], tags, fast)[file]
 
-    def load(self, file: str, tags: list[str] = None) -> dict[str, ]:
+    def load_batch(self, files: list[str], tags: list[str] = None, fast: int = 0) -> dict[str, dict[str, ]]:
 
-        # load from file
-        result: dict[str,] = self.read_tags(file, tags, self.configs.exiftool_params, 'load', fix_non_utf8=True)
+        # load from files
+        params: list[str] = self.configs.exiftool_params + ExifToolGUIData.FAST_PARAMS.get(fast, [])
+        results = self.read_tags_batch(files, tags, params, 'load', fix_non_utf8=True)
 
         # handle ExifTool:Warning
-        for tag_w, warning in ExifToolGUIData.Get_Item(result, 'ExifTool:Warning', findall=True).items():
-            self.log.append('ExifTool:Warning:load', result['SourceFile'], warning)
-            result.pop(tag_w)
+        for result in results.values():
+            for tag_w, warning in ExifToolGUIData.Get_Item(result, 'ExifTool:Warning', findall=True).items():
+                self.log.append('ExifTool:Warning:load', result['SourceFile'], warning)
+                result.pop(tag_w)
+            ExifToolGUIBinary.Bind(result)
 
-        return result
+        return results
+
+    def iter_metadata(
+        self, paths: Iterable[str], tags: list[str] = None, batch_size: int = None, fast: int = 0, prefetch: int = 1
+    ) -> Iterator[tuple[str, dict[str, ]]]:
+        '''
+        Yield (file, metadata) for files of paths, loaded batch by batch as load_batch does (warnings,
+        binary handles, non-utf8 repair), without listing them or caching their metadata.
+
+        Paths are consumed lazily, files are taken as they are and directories are walked by the settings
+        ("recursive", "max_depth" and globs). Files of ignored types are skipped.
+
+        Up to `prefetch` batches are queued while the caller consumes the current one, and one more is
+        read meanwhile, waiting to be queued, so that memory holds (prefetch + 2) batches at most.
+        With prefetch 0, a batch is read only when asked for.
+        '''
+        batch_size = batch_size if batch_size else self.configs.batch_size
+        batches = self.iter_batches(paths, batch_size)
+
+        if prefetch <= 0:
+            for files in batches:
+                results = self.load_batch(files, tags, fast)
+                for file in files:
+                    yield file, results[file]
+            return
+
+        loaded: queue.Queue = queue.Queue(maxsize=prefetch)  # (files, results), an exception, or None at the end
+        stopped = threading.Event()
+
+        def put(item) -> bool:
+            while not stopped.is_set():
+                try:
+                    loaded.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def read() -> None:
+            try:
+                for files in batches:
+                    if not put((files, self.load_batch(files, tags, fast))):
+                        return
+                put(None)
+            except Exception as e:
+                put(e)
+            finally:
+                batches.close()
+
+        thread = threading.Thread(target=read, name='ExifToolGUIData.iter_metadata', daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = loaded.get()
+                if item == None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                files, results = item
+                for file in files:
+                    yield file, results[file]
+        finally:
+            # also reached when the caller stops early, the batch being read is dropped
+            stopped.set()
+            thread.join()
+
+    def iter_batches(self, paths: Iterable[str], batch_size: int) -> Iterator[list[str]]:
+        batch: list[str] = []
+        for file in self.iter_files(paths):
+            if self.file_types.is_ignored(file):
+                continue
+            batch.append(file)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def iter_files(self, paths: Iterable[str]) -> Iterator[str]:
+        '''
+        Files of paths, directories walked depth first, holding a listing of a single directory at a time
+        (unlike ExifToolGUIDirIndex, which keeps listings to be reused).
+        '''
+        include: list[str] = self.configs.include_globs
+        exclude: list[str] = self.configs.exclude_globs
+        for path in paths:
+            if not os.path.isdir(path):
+                yield path
+                continue
+
+            stack: list[tuple[str, int]] = [(path, 0)]
+            while stack:
+                dir, depth = stack.pop()
+                try:
+                    with os.scandir(dir) as it:
+                        entries: list[os.DirEntry] = sorted(it, key=lambda entry: entry.name)
+                except OSError as e:
+                    self.log.append(f'ExifToolGUI:Error:{type(e).__name__}:iter_files', dir, str(e))
+                    continue
+
+                subdirs: list[str] = []
+                for entry in entries:
+                    if exclude and ExifToolGUIDirIndex.Match(entry.path, path, exclude):
+                        continue
+                    if entry.is_dir():
+                        subdirs.append(entry.path)
+                    elif not include or ExifToolGUIDirIndex.Match(entry.path, path, include):
+                        yield entry.path
+                if self.configs.recursive and (self.configs.max_depth < 0 or depth < self.configs.max_depth):
+                    stack.extend((subdir, depth + 1) for subdir in reversed(subdirs))
 
     def load_thumbnail(self, file_index: int) -> bytes:
         file = self.cache[file_index]['SourceFile'] if (type(file_index) == int) else file_index
 
+        key = ExifToolGUIData.Binary_Key(file, '(thumbnail)')
+        b: bytes = ExifToolGUIData.binary_pool.get(key, None) if key != None else None
+        self.stats.hit('cache:binary', b != None)
+        if b != None:
+            return b
+
         # ref: https://exiftool.org/forum/index.php?topic=4216
         tag_thum: list[str] = [
             "ThumbnailImage",
@@ -202,12 +683,37 @@ class ExifToolGUIData:
         result = self.read_tags(file, tag_thum, ['-b'], 'load_thumbnail')
         result.pop('SourceFile')
 
-        for key in result:
-            s: str = result[key]
+        for key_t in result:
+            s: str = result[key_t]
             if s.startswith('base64:'):
-                b: bytes = base64.b64decode(s[7:])
+                b = base64.b64decode(s[7:])
+                self.keep_binary(key, b)
                 return b
 
+    def load_binary(self, handle: ExifToolGUIBinary, file: str = None) -> bytes:
+        '''
+        Bytes of a binary value, by its handle in metadata.
+        Pass the file if it's been renamed since the handle was made.
+        '''
+        file = file if file != None else handle.file
+        key = ExifToolGUIData.Binary_Key(file, handle.tag)
+        b: bytes = ExifToolGUIData.binary_pool.get(key, None) if key != None else None
+        self.stats.hit('cache:binary', b != None)
+        if b != None:
+            return b
+
+        result = self.read_tags(file, [ExifToolGUIData.Normalise_Tag(handle.tag)], self.configs.exiftool_params + ['-b'], 'load_binary')
+        value = result.get(handle.tag, None)
+        if not isinstance(value, str) or not value.startswith('base64:'):
+            return None
+        b = base64.b64decode(value[7:])
+        self.keep_binary(key, b)
+        return b
+
+    def keep_binary(self, key: tuple, b: bytes) -> None:
+        if key != None and self.configs.binary_cache_mb > 0:
+            ExifToolGUIData.binary_pool[key] = b
+
     '''################################################################
     Edit and Save
     ################################################################'''
@@ -249,27 +755,33 @@ class ExifToolGUIData:
         metadata[tag_n] = value
         self.log.append('ExifToolGUI:Info:Edit', self.cache[file_index]['SourceFile'], {tag: value})
 
-    def anti_duplicate_file_name(self, file_index: int, value: str, suffix='_') -> str:
-        tag_n = ExifToolGUIData.Normalise_Tag('File:FileName')
-        file_name, ext = os.path.splitext(value)
-
-        i = 0
-        duplicated: bool = True
-        while duplicated:
-            for file_index_ in range(len(self.cache_edited)):
-                if file_index_ == file_index:
-                    duplicated = False
-                    continue
+        # flag it as failed without bothering ExifTool, if it's known to be unsavable
+        self.preflight(file_index, {tag_n: value})
 
-                metadata = self.cache_edited[file_index_]
-                if value.lower() == metadata.get(tag_n, '').lower():
-                    duplicated = True
-                    i += 1
-                    value = file_name + suffix + str(i) + ext
+    def anti_duplicate_file_name(self, file_index: int, value: str, suffix='_') -> str:
+        directory = self.get_file_directory(file_index)
+        name_index = self.get_name_index(directory)
+
+        # the name claimed by the last editing of this file is free again
+        self.release_file_name(file_index)
+
+        value_l = value.lower()
+        key_suffix: tuple[str, str] = None
+        i: int = 0
+        if name_index.get(value_l, file_index) != file_index:
+            # continue from the last suffix assigned to this name (lowered when one is released),
+            # so that a batch renaming costs O(1) per file
+            file_name, ext = os.path.splitext(value)
+            key_suffix = (ExifToolGUIData.Normalise_Dir(directory), value_l)
+            i = self.name_index_suffix.get(key_suffix, 0)
+            while True:
+                i += 1
+                value = file_name + suffix + str(i) + ext
+                if name_index.get(value.lower(), file_index) == file_index:
                     break
-                else:
-                    duplicated = False
+            self.name_index_suffix[key_suffix] = i
 
+        self.claim_file_name(file_index, directory, value, key_suffix, i)
         return value
 
     def edit_composite(self, file_index: int, tag: str, value):
@@ -282,12 +794,22 @@ class ExifToolGUIData:
         if tag_r:
             self.edit(file_index, tag_r, value, save=False)
 
-    def save(self):
-        unsaved = self.cache_unsaved
-        for file_index in range(0, len(unsaved)):
+    def save(self, file_indexes: list[int] = None):
+        '''
+        Write unsaved edits file by file, of all files or the ones given. ExifTool is called without
+        holding locker, the metadata read back is published by swapping it into the record.
+        '''
+        with self.locker:
+            unsaved = self.cache_unsaved
+        for file_index in (file_indexes if file_indexes != None else range(0, len(unsaved))):
+            self.preflight(file_index, unsaved[file_index])
             if len(unsaved[file_index]) == 0:
                 continue
-            file = self.cache[file_index]['SourceFile']
+            with self.locker:
+                record = self.records[file_index]
+                file = record.metadata['SourceFile']
+                directory_old = ExifToolGUIData.Get(record.metadata, 'File:Directory')
+                filename_old = ExifToolGUIData.Get(record.metadata, 'File:FileName')
             self.log.append('ExifToolGUI:Info:Save', file, str(unsaved[file_index]))
             # set tags to file
 
@@ -298,8 +820,6 @@ class ExifToolGUIData:
             directory_new: str = ExifToolGUIData.Get(unsaved[file_index], 'File:Directory')
             filename_new: str = ExifToolGUIData.Get(unsaved[file_index], 'File:FileName')
             if filename_new != None or directory_new != None:
-                directory_old = ExifToolGUIData.Get(self.cache[file_index], 'File:Directory')
-                filename_old = ExifToolGUIData.Get(self.cache[file_index], 'File:FileName')
                 file_new = os.path.join(
                     directory_new if directory_new != None else directory_old,
                     filename_new if filename_new != None else filename_old
@@ -314,48 +834,176 @@ class ExifToolGUIData:
                 list(unsaved[file_index].keys()) + ['ExifTool:Warning']
             )
 
-            # update source_file
-            if file_new != file:
-                file_return: str = result.pop('SourceFile')
-                assert os.path.samefile(file_return, file_new)
-                file_new = file_return
-                self.cache[file_index]['SourceFile'] = file_new
+            with self.locker:
+                # modify a copy, readers keep seeing the old metadata until it's swapped
+                metadata = record.metadata.copy()
+
+                # update source_file
+                if file_new != file:
+                    file_return: str = result.pop('SourceFile')
+                    assert os.path.samefile(file_return, file_new)
+                    file_new = file_return
+                    metadata['SourceFile'] = file_new
+
+                # check result
+                for tag_unsaved in unsaved[file_index]:
 
-            # check result
-            for tag_unsaved in unsaved[file_index]:
+                    items_return = ExifToolGUIData.Get_Item(result, tag_unsaved, findall=True)  # tags with full path
+                    item_cache = ExifToolGUIData.Get_Item(metadata, tag_unsaved, findall=True)  # tags with full path
 
-                items_return = ExifToolGUIData.Get_Item(result, tag_unsaved, findall=True)  # tags with full path
-                item_cache = ExifToolGUIData.Get_Item(self.cache[file_index], tag_unsaved, findall=True)  # tags with full path
+                    # assert len(item_cache) > 0 # not true when a tag is newly added
+                    value_edited = unsaved[file_index][tag_unsaved]
 
-                # assert len(item_cache) > 0 # not true when a tag is newly added
-                value_edited = unsaved[file_index][tag_unsaved]
+                    failed: bool = False
 
-                failed: bool = False
+                    # update cache
+                    for tag_cache_full in item_cache.keys():
+                        if tag_cache_full not in items_return.keys():
+                            metadata.pop(tag_cache_full)
 
-                # update cache
-                for tag_cache_full in item_cache.keys():
-                    if tag_cache_full not in items_return.keys():
-                        self.cache[file_index].pop(tag_cache_full)
+                    for tag_return_full, value_return in items_return.items():
+                        metadata[tag_return_full] = value_return
 
-                for tag_return_full, value_return in items_return.items():
-                    self.cache[file_index][tag_return_full] = value_return
+                        # check
+                        if str(value_return) != value_edited:
+                            # failed to:
+                            # modify the existing tag or
+                            # set tag value to '' (delete tag)
+                            failed = True
 
                     # check
-                    if str(value_return) != value_edited:
-                        # failed to:
-                        # modify the existing tag or
-                        # set tag value to '' (delete tag)
-                        failed = True
-
-                # check
-                if len(items_return) == 0:
-                    if value_edited != "":
-                        # failed to add a new tag
-                        failed = True
-                    # else:  # successed to delete tag
-
-                if failed:
-                    self.cache_failed[file_index][tag_unsaved] = value_edited
+                    if len(items_return) == 0:
+                        if value_edited != "":
+                            # failed to add a new tag
+                            failed = True
+                        # else:  # successed to delete tag
+
+                    if failed:
+                        record.failed[tag_unsaved] = value_edited
+
+                record.metadata = metadata
+
+                # keep pools reachable by the new path (and new mtime, if it's a part of the key)
+                key = ExifToolGUIData.Move_Metadata(file, file_new)
+                # as loaded, so that the write isn't taken as a modification by others (i.e. the watcher)
+                ExifToolGUIData.Record_Stat(key, file_new)
+                ExifToolGUIData.cache_pool[key] = record  # re-measured, and evictable once saved
+
+        # files on disk may have been renamed
+        with self.locker:
+            self.clear_name_index()
+
+    def load_tag_defs(self) -> bool:
+        '''
+        Start loading the tag database in the background (once), return whether it's loaded.
+        Building it runs '-listx' (seconds, megabytes of output), so it runs on an ExifTool process
+        of its own, leaving the shared one to loads and the calling thread (i.e. UI) free.
+        '''
+        if not self.tag_defs_tried:
+            self.tag_defs_tried = True
+            threading.Thread(target=self.run_tag_defs_loader, name='ExifToolGUIData.tag_defs', daemon=True).start()
+        return self.tag_defs.loaded
+
+    def run_tag_defs_loader(self) -> None:
+        try:
+            # started and terminated by this thread, see start_exiftool
+            with ExifToolHelper(executable=self.exiftool.executable, common_args=None, encoding='utf-8') as exiftool:
+                self.tag_defs.load(exiftool)
+        except Exception as e:
+            self.log.append(f'ExifToolGUI:Error:{type(e).__name__}:load_tag_defs', '', str(e))
+
+    def preflight(self, file_index: int, tags: dict[str, ]) -> None:
+        '''
+        Check edited values against the tag database.
+        Unsavable ones are marked as failed and removed from tags.
+        Skipped until the database is loaded, see load_tag_defs.
+        '''
+        if not self.load_tag_defs():
+            return
+
+        numeric: bool = '-n' in self.configs.exiftool_params
+        for tag, value in list(tags.items()):
+            reason = self.tag_defs.check(tag, value, numeric=numeric)
+            if reason:
+                tags.pop(tag)
+                with self.locker:
+                    self.cache_failed[file_index][tag] = value
+                self.log.append('ExifToolGUI:Error:Preflight', self.cache[file_index]['SourceFile'], reason)
+
+    '''################################################################
+    File Name Index
+    ################################################################'''
+
+    @staticmethod
+    def Normalise_Dir(directory: str) -> str:
+        return os.path.normcase(os.path.abspath(directory))
+
+    def clear_name_index(self) -> None:
+        self.name_index.clear()
+        self.name_index_suffix.clear()
+        self.name_index_pending.clear()
+
+    def get_file_directory(self, file_index: int) -> str:
+        directory_edited: str = ExifToolGUIData.Get(self.cache_edited[file_index], 'File:Directory')
+        if directory_edited:
+            return directory_edited
+        return os.path.dirname(self.cache[file_index]['SourceFile'])
+
+    def get_name_index(self, directory: str) -> dict[str, int]:
+        key_dir = ExifToolGUIData.Normalise_Dir(directory)
+        name_index = self.name_index.get(key_dir, None)
+        if name_index != None:
+            return name_index
+
+        name_index = {}
+        self.name_index[key_dir] = name_index
+
+        # existing files, including the ones not loaded
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    name_index[entry.name.lower()] = -1
+        except OSError:
+            pass
+
+        # loaded files own their current names
+        files_to_dir: list[int] = []
+        for file_index, metadata in enumerate(self.cache):
+            file: str = metadata['SourceFile']
+            if ExifToolGUIData.Normalise_Dir(os.path.dirname(file)) == key_dir:
+                name_index[os.path.basename(file).lower()] = file_index
+            if ExifToolGUIData.Normalise_Dir(self.get_file_directory(file_index)) == key_dir:
+                files_to_dir.append(file_index)
+
+        # pending renames
+        for file_index in files_to_dir:
+            filename_edited: str = ExifToolGUIData.Get(self.cache_edited[file_index], 'File:FileName')
+            if filename_edited:
+                self.claim_file_name(file_index, directory, filename_edited)
+
+        return name_index
+
+    def claim_file_name(self, file_index: int, directory: str, file_name: str, key_suffix: tuple[str, str] = None, suffix: int = 0) -> None:
+        key_dir = ExifToolGUIData.Normalise_Dir(directory)
+        file_name_l = file_name.lower()
+        name_index = self.name_index[key_dir]
+        if name_index.get(file_name_l, None) == file_index:
+            # current name of the file
+            return
+        name_index[file_name_l] = file_index
+        self.name_index_pending[file_index] = (key_dir, file_name_l, key_suffix, suffix)
+
+    def release_file_name(self, file_index: int) -> None:
+        pending = self.name_index_pending.pop(file_index, None)
+        if pending == None:
+            return
+        key_dir, file_name_l, key_suffix, suffix = pending
+        name_index = self.name_index.get(key_dir, None)
+        if name_index != None and name_index.get(file_name_l, None) == file_index:
+            name_index.pop(file_name_l)
+            # the suffix is free again, i.e. for editing the same file once more
+            if key_suffix != None and self.name_index_suffix.get(key_suffix, 0) >= suffix:
+                self.name_index_suffix[key_suffix] = suffix - 1
 
     '''################################################################
     Get and Set
@@ -374,6 +1022,12 @@ class ExifToolGUIData:
     def Get_Item(metadata: dict[str, ], tag: str, strict: bool = False, findall: bool = False) -> dict[str,]:
         result: dict[str,] = {}
         tag_n: str = tag if strict else ExifToolGUIData.Normalise_Tag(tag)
+
+        if not strict and isinstance(metadata, ExifToolGUIMetadata):
+            # normalised keys are indexed once per schema
+            items = metadata.find(tag_n, ExifToolGUIData.Normalise_Tag)
+            return dict(items if findall else items[:1])
+
         for tag_source, value in metadata.items():
             tag_source_n = tag_source if strict else ExifToolGUIData.Normalise_Tag(tag_source)
             if tag_source_n == tag_n:
@@ -617,6 +1271,21 @@ class ExifToolGUIData:
         detatime_tag_def = ExifToolGUIData.Get(self.configs.datetime_tags, tag)
         return (detatime_tag_def != None)
 
+    def sort_key(self, tag: str) -> Callable[[int, str], Any]:
+        '''
+        Key of (file_index, value displayed) to sort files by a tag: datetimes in time order, others as text.
+        '''
+        is_datetime: bool = self.is_datetime(tag)
+
+        def sort_value(file_index: int, value: str):
+            if is_datetime:
+                dt, _ = self.get_datetime(file_index, tag, value, self.configs.default_timezone)
+                return dt if dt else datetime.min.replace(tzinfo=timezone.utc)
+            else:
+                return value
+
+        return sort_value
+
     def normalise_datetime(self, file_index: int, tag: str, value: str = None) -> str:
         dt_ = self.get_datetime(file_index, tag, value)
         value_r = self.resolve_datetime(file_index, tag, dt_)
@@ -723,33 +1392,350 @@ class ExifToolGUIData:
     IO and Log
     ################################################################'''
 
+    def call_exiftool(self, call: Callable[[], Any]) -> Any:
+        '''
+        Run a call to the ExifTool process, serialised, under the deadline of "exiftool_timeout".
+        On timeout, ExifToolTimeoutError is raised after the process is restarted.
+        '''
+        with self.io_locker:
+            self.start_exiftool()
+            try:
+                with self.watchdog.guard(self.configs.exiftool_timeout):
+                    return call()
+            except ExifToolTimeoutError:
+                self.start_exiftool()
+                raise
+
+    def run_exiftool(self, args: list[str]) -> tuple[str, str]:
+        '''
+        (stdout, stderr) of a call, by a driver if pipelined or pooled, otherwise by the helper.
+        Raise ExifToolExecuteError if the exit status is not 0, or ExifToolTimeoutError.
+        '''
+        return self.submit_exiftool(args).result()
+
+    def submit_exiftool(self, args: list[str]) -> Future:
+        '''
+        Future of (stdout, stderr) of a call, as run_exiftool. A driver keeps the calls submitted in flight
+        (up to "exiftool_pipeline" each), the helper runs a call at once, before returning its future done.
+        Files of args (i.e. argfiles) are to be kept until the future is done.
+        '''
+        if self.drivers:
+            with self.drivers_locker:
+                i = min(range(len(self.drivers)), key=self.drivers_load.__getitem__)
+                self.drivers_load[i] += 1
+
+            def done(future: Future) -> None:
+                with self.drivers_locker:
+                    self.drivers_load[i] -= 1
+
+            # a driver runs its own deadline, and restarts its process
+            self.drivers[i].timeout = self.configs.exiftool_timeout
+            future = self.drivers[i].submit_execute(args)
+            future.add_done_callback(done)
+            return future
+
+        def call() -> tuple[str, str]:
+            stdout = self.exiftool.execute(*args)
+            return stdout, self.exiftool.last_stderr
+        future = Future()
+        try:
+            future.set_result(self.call_exiftool(call))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    Json_Loads: Callable[[str], Any] = ExifToolGUIJson.Loads_Stdlib
+
+    def run_exiftool_json(self, args: list[str]) -> list[dict[str, ]]:
+        # decoded by the calling thread, meanwhile the driver's process works on requests behind
+        stdout, stderr = self.run_exiftool(['-j', *args])
+        return ExifToolGUIData.Json_Loads(stdout) if stdout.strip() else []
+
+    def kill_exiftool(self) -> None:
+        '''
+        Called by the watchdog thread, while the hung call is blocked on reading.
+        '''
+        process = self.exiftool._process
+        if process == None:
+            return
+        process.kill()
+        process.wait()
+        # a killed process leaves the reading loop spinning on EOF, closed pipes make it raise
+        for pipe in (process.stdin, process.stdout, process.stderr):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+    def start_exiftool(self) -> None:
+        '''
+        Start the process if it's not running (not started yet, killed, or died).
+
+        On Linux, PyExifTool has the process killed when the thread starting it exits (PR_SET_PDEATHSIG
+        applies to the thread, not the program), so a process started by a worker thread (i.e. of a
+        thread pool, or reading ahead for iter_metadata) would die with it, and leave the next call
+        hanging. Processes are started by a thread living as long as the program instead.
+        '''
+        with self.io_locker:
+            with warnings.catch_warnings():
+                # "ExifTool process was previously running but died"
+                warnings.simplefilter('ignore')
+                running = self.exiftool.running
+            if running:
+                return
+
+            if self.spawner == None:
+                self.spawner = queue.Queue()
+                threading.Thread(target=self.run_spawner, name='ExifToolGUIData.spawner', daemon=True).start()
+            future = Future()
+            self.spawner.put(future)
+            future.result()
+
+            if self.count_started > 0:
+                self.log.append('ExifToolGUI:Warning:Restart', '', 'ExifTool process restarted')
+            self.count_started += 1
+
+    def run_spawner(self) -> None:
+        while True:
+            future: Future = self.spawner.get()
+            try:
+                self.exiftool.run()
+                future.set_result(None)
+            except Exception as e:
+                future.set_exception(e)
+
+    def is_quarantined(self, file: str) -> bool:
+        if len(self.quarantine) == 0:
+            return False
+        try:
+            stat = os.stat(file)
+        except OSError:
+            return False
+        key = ExifToolGUIData.File_Key(file, stat)
+        with self.io_locker:
+            stat_quarantined = self.quarantine.get(key, None)
+            if stat_quarantined == None:
+                return False
+            if stat_quarantined != (stat.st_size, stat.st_mtime_ns):
+                # modified since, give it another chance
+                self.quarantine.pop(key)
+                return False
+            return True
+
+    def quarantine_file(self, file: str, reason: str) -> None:
+        try:
+            stat = os.stat(file)
+        except OSError:
+            return
+        with self.io_locker:
+            self.quarantine[ExifToolGUIData.File_Key(file, stat)] = (stat.st_size, stat.st_mtime_ns)
+        self.stats.count('exiftool:quarantined')
+        self.log.append('ExifToolGUI:Error:Quarantine', file, f"skipped until modified, {reason}")
+
     def execute(self, file: str, params: list):
-        params.append(file)
-        self.exiftool.execute(*params)
+        self.execute_batch([file], params, 'execute')
+
+    def execute_batch(self, files: list[str], params: list[str], process_name) -> dict[str, str]:
+        errors_q: dict[str, str] = {file: 'quarantined' for file in files if self.is_quarantined(file)}
+        if errors_q:
+            files = [file for file in files if file not in errors_q]
+            if len(files) == 0:
+                return errors_q
+
+        stderr: str = None
+        try:
+            with ExifToolGUIArgs.Argfile(files) as args, self.stats.time(f'exiftool:execute:{process_name}'):
+                stdout, stderr = self.run_exiftool([*params, *args])
+        except ExifToolTimeoutError as e:
+            if len(files) == 1:
+                self.quarantine_file(files[0], f"{process_name}: {e}")
+                errors_q[files[0]] = str(e)
+                return errors_q
+            # the rest are retried one by one, only the offending one(s) hang again
+            for file in files:
+                errors_q.update(self.execute_batch([file], params, process_name))
+            return errors_q
+        except ExifToolExecuteError as e:
+            stderr = e.stderr
+        except Exception as e:  # UnicodeEncodeError
+            for file in files:
+                self.log.append(f'ExifToolGUI:Error:{type(e).__name__}:Execute:{process_name}', file, str(e))
+            return {file: str(e) for file in files}
+
+        errors = ExifToolGUIData.Parse_Stderr(stderr, files)
+        for file, error in errors.items():
+            self.log.append(f'ExifTool:Error:Execute:{process_name}', file, error)
+        errors.update(errors_q)
+        return errors
+
+    @staticmethod
+    def Parse_Stderr(stderr: str, files: list[str]) -> dict[str, str]:
+        '''
+        Pick up errors of each file from stderr of a call on multiple files.
+        ExifTool reports them like "Error: <message> - <file>".
+        '''
+        errors: dict[str, str] = {}
+        if not stderr:
+            return errors
+
+        files_set = set(files)
+        for line in stderr.splitlines():
+            match = re.match(r"^Error: (?P<message>.*) - (?P<file>.+)$", line.strip())
+            if match and match.group('file') in files_set:
+                file = match.group('file')
+                errors[file] = (errors[file] + '\n' + match.group('message')) if file in errors else match.group('message')
+        return errors
+
+    def get_tags(self, files: list[str], tags: list[str], params: list[str]) -> list[dict[str, ]]:
+        '''
+        Like ExifToolHelper.get_tags, but an oversized list of tags is split into chunks,
+        each read by a call through an argfile, and results of chunks are merged per file.
+        '''
+        args_tags: list[str] = [f"-{tag}" for tag in tags] if tags else []
+        size_fixed: int = ExifToolGUIArgs.Size(params) + ExifToolGUIArgs.Size(files)
+        if size_fixed + ExifToolGUIArgs.Size(args_tags) <= ExifToolGUIArgs.INLINE_BYTES:
+            return self.run_exiftool_json([*params, *args_tags, *files])
+
+        merged: dict[str, dict[str, ]] = {}
+        error: ExifToolExecuteError = None
+        with ExitStack() as argfiles:
+            # every chunk is submitted before results are taken, so that drivers keep them in flight,
+            # and a chunk is decoded while the ones behind are being read
+            futures: list[Future] = []
+            try:
+                for chunk in ExifToolGUIArgs.Chunk(args_tags, size_fixed):
+                    args = argfiles.enter_context(ExifToolGUIArgs.Argfile(chunk + files))
+                    futures.append(self.submit_exiftool(['-j', *params, *args]))
+
+                for future in futures:
+                    results: list[dict[str, ]] = None
+                    try:
+                        stdout, stderr = future.result()
+                        results = ExifToolGUIData.Json_Loads(stdout) if stdout.strip() else []
+                    except ExifToolExecuteError as e:
+                        # keep going, files failed fail in every chunk
+                        error = error if error != None else e
+                        try:
+                            results = ExifToolGUIData.Json_Loads(e.stdout) if e.stdout else None
+                        except ValueError:
+                            pass
+                    for result in (results if results else []):
+                        merged.setdefault(result['SourceFile'], {}).update(result)
+            finally:
+                # argfiles are removed once no call reads them
+                wait(futures)
+
+        results_l: list[dict[str, ]] = list(merged.values())
+        if error != None:
+            raise ExifToolExecuteError(error.returncode, json.dumps(results_l), error.stderr, error.cmd)
+        return results_l
+
+    def set_tags(self, file: str, tags: dict[str, Any], params: list[str]) -> str:
+        '''
+        Like ExifToolHelper.set_tags, but a large payload is passed through an argfile.
+        Never split, so that a file is written by a single call.
+        '''
+        args_tags: list[str] = []
+        for tag, value in tags.items():
+            # a list sets multiple values, i.e. Keywords
+            for item in (value if isinstance(value, list) else [value]):
+                args_tags.append(f"-{tag}={item}")
+        with ExifToolGUIArgs.Argfile(args_tags + [file]) as args:
+            stdout, stderr = self.run_exiftool([*params, *args])
+        return stdout
+
+    def submit_read_tags(self, files: list[str], tags: list[str], params: list[str], process_name, fix_non_utf8: bool = False) -> Future:
+        '''
+        Future of read_tags_batch (quarantine, chunks and argfiles included), so that a single caller keeps
+        several calls in flight, pipelined by drivers. Awaitable by asyncio.wrap_future.
+        '''
+        return self.get_submitter().submit(self.read_tags_batch, files, tags, params, process_name, fix_non_utf8)
+
+    def submit_write_tags(self, file: str, tags: dict[str, Any], params: list[str], process_name) -> Future:
+        '''
+        Future of write_tags, as submit_read_tags.
+        '''
+        return self.get_submitter().submit(self.write_tags, file, tags, params, process_name)
+
+    def get_submitter(self) -> ThreadPoolExecutor:
+        # a thread per call in flight, each waiting on its call, more would only queue in drivers
+        with self.io_locker:
+            if self.submitter == None:
+                workers: int = sum(driver.depth for driver in self.drivers) if self.drivers else 1
+                self.submitter = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ExifToolGUIData.submitter')
+            return self.submitter
 
     def read_tags(self, file: str, tags: list[str], params: list[str], process_name, fix_non_utf8: bool = False) -> dict[str, ]:
-        result: dict[str,] = None
+        return self.read_tags_batch([file], tags, params, process_name, fix_non_utf8)[file]
+
+    def read_tags_batch(self, files: list[str], tags: list[str], params: list[str], process_name, fix_non_utf8: bool = False) -> dict[str, dict[str, ]]:
+        files_q: list[str] = [file for file in files if self.is_quarantined(file)]
+        if files_q:
+            results_q = {file: {'SourceFile': file} for file in files_q}
+            files_r = [file for file in files if file not in results_q]
+            if files_r:
+                results_q.update(self.read_tags_batch(files_r, tags, params, process_name, fix_non_utf8))
+            return {file: results_q[file] for file in files}
+
+        results_l: list[dict[str, ]] = None
+        self.stats.count(f'exiftool:read:{process_name}:files', len(files))
         try:
-            result = self.exiftool.get_tags(file, tags, params)[0]
+            with self.stats.time(f'exiftool:read:{process_name}'):
+                results_l = self.get_tags(files, tags, params)
+        except ExifToolTimeoutError as e:
+            if len(files) == 1:
+                self.quarantine_file(files[0], f"{process_name}: {e}")
+                return {files[0]: {'SourceFile': files[0]}}
+            # the rest are retried one by one, only the offending one(s) hang again
+            results: dict[str, dict[str, ]] = {}
+            for file in files:
+                results.update(self.read_tags_batch([file], tags, params, process_name, fix_non_utf8))
+            return results
         except ExifToolExecuteError as e:
-            self.log.append(f'ExifTool:Error:{type(e).__name__}:Read:{process_name}', file, e.stderr)
+            # some of the files failed, the others are still returned
+            errors = ExifToolGUIData.Parse_Stderr(e.stderr, files)
+            for file in files:
+                if len(files) == 1 or file in errors:
+                    self.log.append(f'ExifTool:Error:{type(e).__name__}:Read:{process_name}', file, errors.get(file, e.stderr))
+            try:
+                results_l = ExifToolGUIData.Json_Loads(e.stdout) if e.stdout else None
+            except ValueError:
+                pass
         except Exception as e:  # UnicodeEncodeError
-            self.log.append(f'ExifToolGUI:Error:{type(e).__name__}:Read:{process_name}', file, str(e))
+            for file in files:
+                self.log.append(f'ExifToolGUI:Error:{type(e).__name__}:Read:{process_name}', file, str(e))
 
-        if fix_non_utf8 and result:
-            self.fix_non_utf8_values(file, result)
+        # SourceFile returned could be in a different form, i.e. with '/' instead of '\\'
+        results_n: dict[str, dict[str, ]] = {}
+        for result in (results_l if results_l else []):
+            results_n[os.path.normcase(os.path.normpath(result['SourceFile']))] = result
 
-        return result if result else {'SourceFile': file}
+        results: dict[str, dict[str, ]] = {}
+        for file in files:
+            result = results_n.get(os.path.normcase(os.path.normpath(file)), None)
+            results[file] = result if result else {'SourceFile': file}
+
+        if fix_non_utf8:
+            self.fix_non_utf8_values_batch({file: result for file, result in results.items() if len(result) > 1})
+
+        return results
 
     def write_tags(self, file: str, tags: dict[str, Any], params: list[str], process_name) -> bool:
         if not tags:
             return True
 
+        if self.is_quarantined(file):
+            self.log.append(f'ExifToolGUI:Error:Quarantine:Write:{process_name}', file, 'quarantined')
+            return False
+
         try:
-            r = self.exiftool.set_tags(file, tags, params)
+            with self.stats.time(f'exiftool:write:{process_name}'):
+                r = self.set_tags(file, tags, params)
             if r:
                 self.log.append(f'ExifTool:Info:Write:{process_name}', file, r)
             return True
+        except ExifToolTimeoutError as e:
+            self.quarantine_file(file, f"{process_name}: {e}")
         except ExifToolExecuteError as e:
             self.log.append(f'ExifTool:Error:{type(e).__name__}:Write:{process_name}', file, e.stderr)
         except Exception as e:  # UnicodeEncodeError UnicodeDecodeError
@@ -758,6 +1744,9 @@ class ExifToolGUIData:
         return False
 
     def fix_non_utf8_values(self, file: str, metadata: dict[str, str], encodings: list[str] = None) -> None:
+        self.fix_non_utf8_values_batch({file: metadata}, encodings)
+
+    def fix_non_utf8_values_batch(self, metadatas: dict[str, dict[str, str]], encodings: list[str] = None) -> None:
         '''
         If non-utf8 values exist, Exiftool will not recode these values from local encoding 
         to UTF-8 before passing them to json. That could causes non-utf8 values to be garbled.
@@ -776,11 +1765,16 @@ class ExifToolGUIData:
 
         Here is a way to fix this problem to keep the compatibility of reading non-utf-8 values 
         existing in metadata.
+
+        Garbled values of all the files are re-read by a single call (the union of their tags).
+        The encoding found is remembered per camera (make and model) and per directory, and is
+        tried first for the following files of them, see non_utf8_encodings_for.
         '''
-        garbled: dict[str, str] = {}
-        for tag, value in metadata.items():
-            if isinstance(value, str) and '??' in value:  # how about non str value?
-                garbled[tag] = value
+        garbled: dict[str, dict[str, str]] = {}  # {file: {tag: value}}
+        for file, metadata in metadatas.items():
+            for tag, value in metadata.items():
+                if isinstance(value, str) and '??' in value:  # how about non str value?
+                    garbled.setdefault(file, {})[tag] = value
 
         if len(garbled) <= 0:
             return
@@ -793,26 +1787,30 @@ class ExifToolGUIData:
         cmd_params with too huge size could cause reading fdout unresponsive.
         os.read(fd, block_size) freezed at the very first block.
 
-        (should also let reading funcion split a single call into batches?)
+        (oversized lists of tags are also split into chunks and passed by argfiles, see get_tags)
         '''
-        tags_garbled_n: list = []
-        for tag in garbled.keys():
-            tag_n = ExifToolGUIData.Normalise_Tag(tag)
-            if tag_n not in tags_garbled_n:
-                tags_garbled_n.append(tag_n)
-
-        result_b: dict[str, ] = self.read_tags(
-            file,
-            tags_garbled_n,
+        tags_garbled_n: dict[str, None] = {}  # ordered set
+        for garbled_f in garbled.values():
+            for tag in garbled_f.keys():
+                tags_garbled_n[ExifToolGUIData.Normalise_Tag(tag)] = None
+
+        results_b: dict[str, dict[str, ]] = self.read_tags_batch(
+            list(garbled.keys()),
+            list(tags_garbled_n.keys()),
             self.configs.exiftool_params + ['-b'],
             'fix_non_utf8_values'
         )
 
-        if not result_b:
-            return
+        for file, garbled_f in garbled.items():
+            result_b = results_b.get(file, None)
+            if not result_b or len(result_b) <= 1:
+                continue
+            self.fix_non_utf8_values_decode(file, metadatas[file], garbled_f, result_b, encodings)
 
+    def fix_non_utf8_values_decode(self, file: str, metadata: dict[str, str], garbled: dict[str, str], result_b: dict[str, ], encodings: list[str] = None) -> None:
+        hints: list[tuple] = self.non_utf8_hints(file, metadata)
         if (encodings == None):
-            encodings = self.configs.non_utf8_encodings
+            encodings = self.non_utf8_encodings_for(hints)
 
         # encoding candidates to decode the original value
         for tag_garbled, value_garbled in garbled.items():
@@ -847,6 +1845,8 @@ class ExifToolGUIData:
                 self.log.append('ExifToolGUI:Warning:Non-UTF8:', file, f"{tag_garbled}: unknown encoding")
             else:
                 self.log.append('ExifToolGUI:Warning:Non-UTF8:', file, f"{tag_garbled}: {encoding} value found")
+                for hint in hints:
+                    self.non_utf8_encoding_hits[hint] = encoding
 
             if fixed == value_garbled:
                 # Is it possible?
@@ -856,6 +1856,30 @@ class ExifToolGUIData:
             else:
                 ExifToolGUIData.Set(metadata, tag_garbled, fixed, strict=True)
 
+    def non_utf8_hints(self, file: str, metadata: dict[str, ]) -> list[tuple]:
+        '''
+        Keys the encoding found is remembered by, the most specific first.
+        '''
+        hints: list[tuple] = []
+        make = ExifToolGUIData.Get(metadata, 'EXIF:Make')
+        model = ExifToolGUIData.Get(metadata, 'EXIF:Model')
+        if make != None or model != None:
+            hints.append(('camera', str(make), str(model)))
+        hints.append(('dir', ExifToolGUIData.Normalise_Dir(os.path.dirname(file))))
+        return hints
+
+    def non_utf8_encodings_for(self, hints: list[tuple]) -> list[str]:
+        '''
+        Configured encodings, with the ones found before for the hints moved to the front.
+        '''
+        encodings: list[str] = list(self.configs.non_utf8_encodings)
+        for hint in reversed(hints):
+            encoding = self.non_utf8_encoding_hits.get(hint, None)
+            if encoding in encodings:
+                encodings.remove(encoding)
+                encodings.insert(0, encoding)
+        return encodings
+
 
 if __name__ == "__main__":
     # data:ExifToolGUIData = ExifToolGUIData.Instance
@@ -0,0 +1,203 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from fnmatch import fnmatchcase
+import os
+import threading
+import time
+from typing import Iterator
+
+
+class ExifToolGUIDirIndex:
+    _instance: 'ExifToolGUIDirIndex' = None
+
+    @classmethod
+    @property
+    def Instance(cls) -> 'ExifToolGUIDirIndex':
+        if cls._instance == None:
+            cls._instance = cls()
+        return cls._instance
+
+    '''
+    Some file systems (i.e. FAT, some NAS) record mtime in seconds or even coarser, a directory changed
+    within this period after its mtime might keep the same mtime. Listings as young as that are not trusted.
+    '''
+    racy_period_ns: int = 2 * 1000 * 1000 * 1000
+
+    # directories scanned at the same time when walking recursively
+    max_workers: int = min(8, (os.cpu_count() or 1) + 4)
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+        '''
+        Listings of directories, reused until the mtime of a directory changes:
+            {dir: (mtime_ns, trusted, [file], [subdir])}
+        Names only, since modifying a file in place doesn't change the mtime of its directory,
+        stats of files would go stale unnoticed.
+        '''
+        self.index: dict[str, tuple[int, bool, list[str], list[str]]] = {}
+
+    def scan(self, dir: str) -> list[str]:
+        return self.scan_dir(dir)[0]
+
+    def scan_dir(self, dir: str) -> tuple[list[str], list[str]]:
+        '''
+        Return files and sub-directories of a directory, sorted by name.
+        '''
+        try:
+            mtime: int = os.stat(dir).st_mtime_ns
+        except OSError:
+            self.invalidate(dir)
+            return [], []
+
+        with self._lock:
+            listing = self.index.get(dir, None)
+        if listing != None and listing[0] == mtime and listing[1]:
+            return listing[2], listing[3]
+
+        files: list[str] = []
+        subdirs: list[str] = []
+        try:
+            with os.scandir(dir) as it:
+                for entry in it:
+                    path: str = os.path.join(dir, entry.name).replace('\\', '/')
+                    if entry.is_dir(follow_symlinks=False):
+                        # links to directories are not followed, no loop
+                        subdirs.append(path)
+                    elif entry.is_file():
+                        files.append(path)
+        except OSError:
+            pass
+        files.sort()
+        subdirs.sort()
+
+        trusted: bool = (time.time_ns() - mtime) > ExifToolGUIDirIndex.racy_period_ns
+        with self._lock:
+            self.index[dir] = (mtime, trusted, files, subdirs)
+        return files, subdirs
+
+    @staticmethod
+    def Match(path: str, top: str, patterns: list[str]) -> bool:
+        '''
+        Case-insensitive glob matching.
+        Patterns containing '/' are matched against the path relative to the top directory, others against the name.
+        '''
+        path_l: str = path.lower()
+        name: str = path_l.rsplit('/', 1)[-1]
+        path_rel: str = path_l[len(top.rstrip('/')) + 1:]
+        for pattern in patterns:
+            pattern_l: str = pattern.lower()
+            if fnmatchcase(path_rel if '/' in pattern_l else name, pattern_l):
+                return True
+        return False
+
+    def walk(
+        self, dirs: list[str], recursive: bool = False, max_depth: int = -1,
+        include: list[str] = None, exclude: list[str] = None, chunk_size: int = 100
+    ) -> Iterator[list[str]]:
+        '''
+        Yield files under directories in chunks, as soon as they are found.
+        Files come in a fixed order: dirs in the order given, each followed by its sub-directories level by level.
+        In recursive mode sub-directories are scanned ahead in parallel, but still consumed in that order.
+        A negative max_depth means no limit. Exclusion applies to both files and sub-directories, inclusion to files only.
+        The first chunk is yielded without waiting for it to be full.
+        '''
+        include = include or []
+        exclude = exclude or []
+
+        chunk: list[str] = []
+        yielded: bool = False
+        seen: set[str] = set()
+
+        # a single directory each, nothing to scan ahead
+        executor = ThreadPoolExecutor(max_workers=ExifToolGUIDirIndex.max_workers) if recursive else None
+        pending: deque[tuple[Future, str, str, int]] = deque()  # (future, dir, top, depth), in order of consuming
+
+        def submit(dir: str, top: str, depth: int):
+            dir_n: str = os.path.normcase(os.path.abspath(dir))
+            if dir_n in seen:
+                return
+            seen.add(dir_n)
+            pending.append((executor.submit(self.scan_dir, dir) if executor != None else None, dir, top, depth))
+
+        try:
+            for top in dirs:
+                submit(top, top, 0)
+
+            while pending:
+                future, dir, top, depth = pending.popleft()
+                files, subdirs = future.result() if future != None else self.scan_dir(dir)
+
+                for file in files:
+                    if include and not ExifToolGUIDirIndex.Match(file, top, include):
+                        continue
+                    if exclude and ExifToolGUIDirIndex.Match(file, top, exclude):
+                        continue
+                    chunk.append(file)
+
+                if recursive and (max_depth < 0 or depth < max_depth):
+                    for subdir in subdirs:
+                        if exclude and ExifToolGUIDirIndex.Match(subdir, top, exclude):
+                            continue
+                        submit(subdir, top, depth + 1)
+
+                while len(chunk) >= chunk_size or (chunk and not yielded):
+                    yield chunk[:chunk_size]
+                    chunk = chunk[chunk_size:]
+                    yielded = True
+        finally:
+            # also reached when the consumer stops early
+            if executor != None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        if chunk:
+            yield chunk
+
+    def files(self, dirs: list[str], recursive: bool = False, max_depth: int = -1, include: list[str] = None, exclude: list[str] = None) -> list[str]:
+        all_files: list[str] = []
+        for chunk in self.walk(dirs, recursive, max_depth, include, exclude):
+            all_files.extend(chunk)
+        return all_files
+
+    def dirs(self, tops: list[str], recursive: bool = False) -> list[str]:
+        '''
+        Return existing directories of tops, and in recursive mode the sub-directories walked into so far.
+        '''
+        all_dirs: list[str] = list(tops)
+        if recursive:
+            with self._lock:
+                indexed: list[str] = list(self.index)
+            for top in tops:
+                prefix: str = top.rstrip('/') + '/'
+                all_dirs.extend(dir for dir in indexed if dir.startswith(prefix))
+        return [dir for dir in dict.fromkeys(all_dirs) if os.path.isdir(dir)]
+
+    def invalidate(self, dir: str = None) -> None:
+        with self._lock:
+            if dir == None:
+                self.index.clear()
+                return
+            self.index.pop(dir, None)
+
+
+if __name__ == "__main__":
+    from exiftoolgui_configs import ExifToolGUIConfigs
+
+    dirs = ExifToolGUIConfigs.Instance.dirs
+    dir_index = ExifToolGUIDirIndex.Instance
+
+    start = time.perf_counter()
+    files = dir_index.files(dirs)
+    print(f"first scan:  {len(files)} files, {time.perf_counter() - start:.4f}s")
+
+    start = time.perf_counter()
+    files = dir_index.files(dirs)
+    print(f"second scan: {len(files)} files, {time.perf_counter() - start:.4f}s")
+
+    dir_index.invalidate()
+    start = time.perf_counter()
+    for chunk in dir_index.walk(dirs, recursive=True):
+        print(f"first chunk: {len(chunk)} files, {time.perf_counter() - start:.4f}s")
+        break
+    files = dir_index.files(dirs, recursive=True)
+    print(f"recursive scan: {len(files)} files, {time.perf_counter() - start:.4f}s")
@@ -0,0 +1,326 @@
+import asyncio
+from concurrent.futures import Future
+import re
+import subprocess
+import sys
+import threading
+from typing import Any, Callable
+
+from exiftool.exceptions import ExifToolExecuteError
+
+from exiftoolgui_json import ExifToolGUIJson
+from exiftoolgui_watchdog import ExifToolTimeoutError
+
+
+class ExifToolGUIRequest:
+    __slots__ = ('seq', 'args', 'future', 'stdout', 'stderr', 'status', 'started')
+
+    def __init__(self, seq: int, args: list[str], future: asyncio.Future) -> None:
+        self.seq: int = seq
+        self.args: list[str] = args
+        self.future: asyncio.Future = future
+        self.stdout: bytes = None
+        self.stderr: bytes = None
+        self.status: int = None
+        self.started: float = None  # loop time it became the head, i.e. ExifTool started working on it
+
+
+class ExifToolGUIDriver:
+    '''
+    Asynchronous driver over the stay-open protocol of ExifTool.
+
+    Requests are numbered ('-execute<seq>') and written without waiting for the previous ones, up to
+    `depth` in flight, so that ExifTool is working on the next request while Python is parsing the last
+    one. ExifTool handles requests in order, and responses are matched back by their numbers:
+        stdout: <output>{ready<seq>}
+        stderr: <errors>{status<seq>:<exit status>}
+
+    The event loop runs in a thread of its own. Coroutines are meant for that loop, `submit_*` return
+    concurrent futures for any other thread.
+
+    The head request (the one ExifTool is working on) is given `timeout` seconds. When it passes, the
+    request fails with ExifToolTimeoutError, the process is restarted, and requests behind it are resent.
+    '''
+
+    RE_READY = re.compile(rb'(?:^|\n)\{ready(\d+)\}\r?\n')
+    RE_STATUS = re.compile(rb'(?:^|\n)\{status(\d+):(-?\d+)\}\r?\n')
+
+    def __init__(self, executable: str = 'exiftool', encoding: str = 'utf-8', depth: int = 4, json_loads: Callable[[str], Any] = ExifToolGUIJson.Loads_Stdlib) -> None:
+        self.executable: str = executable
+        self.encoding: str = encoding
+        self.depth: int = max(1, depth)
+        self.json_loads: Callable[[str], Any] = json_loads
+        self.timeout: float = 0  # seconds for the head request, 0 for no limit
+
+        self.loop: asyncio.AbstractEventLoop = None
+        self._thread: threading.Thread = None
+        self._thread_locker = threading.Lock()
+
+        # loop side
+        self._process: asyncio.subprocess.Process = None
+        self._readers: list[asyncio.Task] = []
+        self._watcher: asyncio.Task = None
+        self._pending: dict[int, ExifToolGUIRequest] = {}  # in order of seq
+        self._seq: int = 0
+        self._slots: asyncio.Semaphore = None
+        self._write_locker: asyncio.Lock = None
+        self._changed: asyncio.Event = None
+
+        self.count_restarted: int = 0
+
+    '''################################################################
+    Thread
+    ################################################################'''
+
+    def start(self) -> None:
+        with self._thread_locker:
+            if self._thread != None:
+                return
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self.loop.run_forever, name='ExifToolGUIDriver', daemon=True)
+            self._thread.start()
+            asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+
+    def terminate(self) -> None:
+        with self._thread_locker:
+            if self._thread == None:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._terminate(), self.loop).result(timeout=10)
+            except Exception as e:
+                print(f"ExifToolGUIDriver:Error:{type(e).__name__}: {e}")
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def submit(self, coroutine) -> Future:
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def submit_execute(self, args: list[str]) -> Future:
+        '''
+        Future of (stdout, stderr).
+        '''
+        return self.submit(self.execute(args))
+
+    def submit_read_tags(self, files: list[str], tags: list[str], params: list[str]) -> Future:
+        return self.submit(self.read_tags(files, tags, params))
+
+    def submit_write_tags(self, file: str, tags: dict[str, Any], params: list[str]) -> Future:
+        return self.submit(self.write_tags(file, tags, params))
+
+    '''################################################################
+    Requests
+    ################################################################'''
+
+    async def execute(self, args: list[str]) -> tuple[str, str]:
+        '''
+        Return (stdout, stderr), raise ExifToolExecuteError if the exit status is not 0.
+        '''
+        async with self._slots:
+            async with self._write_locker:
+                self._seq += 1
+                request = ExifToolGUIRequest(self._seq, args, self.loop.create_future())
+                if len(self._pending) == 0:
+                    request.started = self.loop.time()
+                self._pending[request.seq] = request
+                self._write(request)
+                await self._process.stdin.drain()
+                if self.timeout > 0:
+                    self._changed.set()
+
+            await request.future
+
+        stdout: str = request.stdout.decode(self.encoding)
+        stderr: str = request.stderr.decode(self.encoding)
+        if request.status != 0:
+            raise ExifToolExecuteError(request.status, stdout, stderr, args)
+        return stdout, stderr
+
+    async def read_tags(self, files: list[str], tags: list[str], params: list[str]) -> list[dict[str, ]]:
+        args: list[str] = ['-j', *params, *[f"-{tag}" for tag in (tags if tags else [])], *files]
+        stdout, stderr = await self.execute(args)
+        return self.json_loads(stdout) if stdout.strip() else []
+
+    async def write_tags(self, file: str, tags: dict[str, Any], params: list[str]) -> str:
+        args: list[str] = [*params]
+        for tag, value in tags.items():
+            # a list sets multiple values, i.e. Keywords
+            for item in (value if isinstance(value, list) else [value]):
+                args.append(f"-{tag}={item}")
+        args.append(file)
+        stdout, stderr = await self.execute(args)
+        return stdout
+
+    '''################################################################
+    Process
+    ################################################################'''
+
+    async def _start(self) -> None:
+        self._slots = asyncio.Semaphore(self.depth)
+        self._write_locker = asyncio.Lock()
+        self._changed = asyncio.Event()
+        await self._spawn()
+        self._watcher = self.loop.create_task(self._watch())
+
+    async def _spawn(self) -> None:
+        kwargs: dict[str, ] = {}
+        if sys.platform == 'win32':
+            kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+        self._process = await asyncio.create_subprocess_exec(
+            self.executable, '-stay_open', 'True', '-@', '-',
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+            **kwargs
+        )
+        self._readers = [
+            self.loop.create_task(self._read(self._process.stdout, ExifToolGUIDriver.RE_READY, 'stdout')),
+            self.loop.create_task(self._read(self._process.stderr, ExifToolGUIDriver.RE_STATUS, 'stderr')),
+        ]
+
+    async def _kill(self) -> None:
+        for reader in self._readers:
+            reader.cancel()
+        self._readers = []
+        if self._process != None and self._process.returncode == None:
+            self._process.kill()
+            await self._process.wait()
+
+    async def _terminate(self) -> None:
+        if self._watcher != None:
+            self._watcher.cancel()
+        if self._process != None and self._process.returncode == None:
+            try:
+                self._process.stdin.write(b"-stay_open\nFalse\n")
+                await self._process.stdin.drain()
+                await asyncio.wait_for(self._process.wait(), 5)
+            except (asyncio.TimeoutError, OSError):
+                pass
+        await self._kill()
+        for request in self._pending.values():
+            if not request.future.done():
+                request.future.set_exception(ExifToolExecuteError(-1, '', 'ExifTool terminated', request.args))
+        self._pending.clear()
+
+    def _write(self, request: ExifToolGUIRequest) -> None:
+        lines: list[str] = [*request.args, '-echo4', f"{{status{request.seq}:${{status}}}}", f"-execute{request.seq}"]
+        self._process.stdin.write(('\n'.join(lines) + '\n').encode(self.encoding))
+
+    async def _read(self, stream: asyncio.StreamReader, pattern: re.Pattern, field: str) -> None:
+        buffer = bytearray()
+        scanned: int = 0  # bytes of buffer searched already, minus a margin for a sentinel split across blocks
+        while True:
+            block = await stream.read(65536)
+            if not block:
+                # the process died by itself (readers are cancelled before killing it)
+                head = next(iter(self._pending.values()), None)
+                if field == 'stdout' and head != None:
+                    self.loop.create_task(self._restart(head, ExifToolExecuteError(-1, '', 'ExifTool process died', head.args)))
+                return
+            buffer += block
+
+            while True:
+                match = pattern.search(buffer, scanned)
+                if match == None:
+                    scanned = max(0, len(buffer) - 32)
+                    break
+                seq = int(match.group(1))
+                request = self._pending.get(seq, None)
+                if request != None:
+                    setattr(request, field, bytes(buffer[:match.start()]))
+                    if field == 'stderr':
+                        request.status = int(match.group(2))
+                    self._complete(request)
+                del buffer[:match.end()]
+                scanned = 0
+
+    def _complete(self, request: ExifToolGUIRequest) -> None:
+        if request.stdout == None or request.stderr == None:
+            return
+        self._pending.pop(request.seq, None)
+        head = next(iter(self._pending.values()), None)
+        if head != None and head.started == None:
+            head.started = self.loop.time()
+        if not request.future.done():
+            request.future.set_result(None)
+        if self.timeout > 0:
+            self._changed.set()
+
+    async def _watch(self) -> None:
+        while True:
+            head = next(iter(self._pending.values()), None)
+            if head == None or self.timeout <= 0:
+                self._changed.clear()
+                await self._changed.wait()
+                continue
+
+            remaining = head.started + self.timeout - self.loop.time()
+            if remaining > 0:
+                self._changed.clear()
+                try:
+                    await asyncio.wait_for(self._changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._restart(head, ExifToolTimeoutError(self.timeout))
+
+    async def _restart(self, head: ExifToolGUIRequest, error: Exception) -> None:
+        '''
+        Fail the head request, and resend the ones behind it to a new process.
+        '''
+        async with self._write_locker:
+            if self._pending.pop(head.seq, None) == None:
+                # completed meanwhile
+                return
+            if not head.future.done():
+                head.future.set_exception(error)
+
+            await self._kill()
+            await self._spawn()
+            self.count_restarted += 1
+
+            for request in self._pending.values():
+                request.stdout = request.stderr = request.status = request.started = None
+                self._write(request)
+            head = next(iter(self._pending.values()), None)
+            if head != None:
+                head.started = self.loop.time()
+            await self._process.stdin.drain()
+
+
+if __name__ == "__main__":
+    '''
+    Throughput of reading files one per call, by the synchronous helper against the driver
+    with requests in flight. Usage: python exiftoolgui_driver.py <dir> [rounds]
+    '''
+    import os
+    import time
+    from exiftool.helper import ExifToolHelper
+
+    dir: str = sys.argv[1] if len(sys.argv) > 1 else '.'
+    rounds: int = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    files: list[str] = [e.path for e in os.scandir(dir) if e.is_file()] * rounds
+    params: list[str] = ['-G:0:1:2:3:4:5:6:7', '-a', '-s', '-charset', 'filename=utf8']
+    json_loads = ExifToolGUIJson.Get()
+
+    helper = ExifToolHelper(common_args=None)
+    helper.set_json_loads(json_loads)
+    helper.run()
+    start = time.perf_counter()
+    for file in files:
+        helper.get_tags([file], None, params)
+    elapsed_sync = time.perf_counter() - start
+    helper.terminate()
+    print(f"helper        {len(files)} calls: {elapsed_sync:.2f}s, {len(files) / elapsed_sync:.1f} files/s")
+
+    for depth in (1, 4, 16):
+        driver = ExifToolGUIDriver(depth=depth)
+        driver.start()
+        start = time.perf_counter()
+        # json is decoded by the consumer, meanwhile ExifTool works on the requests behind
+        futures = [driver.submit_execute(['-j', *params, file]) for file in files]
+        for future in futures:
+            json_loads(future.result()[0])
+        elapsed = time.perf_counter() - start
+        driver.terminate()
+        print(f"driver({depth:2d})    {len(files)} calls: {elapsed:.2f}s, {len(files) / elapsed:.1f} files/s, x{elapsed_sync / elapsed:.2f}")
@@ -0,0 +1,119 @@
+from fnmatch import fnmatchcase
+import os
+import threading
+
+from exiftoolgui_configs import ExifToolGUIConfigs
+
+
+class ExifToolGUIFileTypes:
+    _instance: 'ExifToolGUIFileTypes' = None
+
+    @classmethod
+    @property
+    def Instance(cls) -> 'ExifToolGUIFileTypes':
+        if cls._instance == None:
+            cls._instance = cls()
+        return cls._instance
+
+    IMAGE: str = 'image'
+    VIDEO: str = 'video'
+    IGNORED: str = 'ignored'
+
+    def __init__(self) -> None:
+        self.configs: ExifToolGUIConfigs = ExifToolGUIConfigs.Instance
+        self._lock = threading.Lock()
+
+        '''
+        Kinds found by magic bytes, for files whose extension is unknown:
+            {file: kind}
+        '''
+        self.cache: dict[str, str] = {}
+
+        self.load()
+
+    def load(self) -> None:
+        '''
+        Build lookup tables from definitions:
+            {kind: {"names": [glob], "extensions": [ext], "magic": [{offset: hex}]}}
+        '''
+        self.names_ignored: list[str] = [n.lower() for n in self.file_types.get(ExifToolGUIFileTypes.IGNORED, {}).get('names', [])]
+
+        self.extensions: dict[str, str] = {}
+        self.magic: list[tuple[str, list[tuple[int, bytes]]]] = []
+        magic_length: int = 0
+        for kind, type_def in self.file_types.items():
+            for ext in type_def.get('extensions', []):
+                self.extensions[ext.lower()] = kind
+            for signature in type_def.get('magic', []):
+                parts = [(int(offset), bytes.fromhex(hex)) for offset, hex in signature.items()]
+                self.magic.append((kind, parts))
+                magic_length = max([magic_length] + [offset + len(b) for offset, b in parts])
+        self.magic_length: int = magic_length
+
+        with self._lock:
+            self.cache.clear()
+
+    @property
+    def file_types(self) -> dict[str, dict[str, list]]:
+        return self.configs.file_types
+
+    @property
+    def enabled(self) -> bool:
+        return self.configs.prefilter
+
+    def is_ignored(self, file: str) -> bool:
+        '''
+        Decided by name only, cheap enough for the UI thread.
+        '''
+        if not self.enabled:
+            return False
+
+        name: str = os.path.basename(file).lower()
+        for pattern in self.names_ignored:
+            if fnmatchcase(name, pattern):
+                return True
+        return self.extensions.get(os.path.splitext(name)[1], None) == ExifToolGUIFileTypes.IGNORED
+
+    def classify(self, file: str) -> str:
+        '''
+        Return one of IMAGE, VIDEO, IGNORED, or None if unknown (to be probed as usual).
+        Extension decides if known, otherwise magic bytes of the file header.
+        '''
+        if not self.enabled:
+            return None
+
+        if self.is_ignored(file):
+            return ExifToolGUIFileTypes.IGNORED
+
+        kind = self.extensions.get(os.path.splitext(file)[1].lower(), None)
+        if kind != None:
+            return kind
+
+        with self._lock:
+            if file in self.cache:
+                return self.cache[file]
+
+        kind = self.match_magic(file)
+        with self._lock:
+            self.cache[file] = kind
+        return kind
+
+    def match_magic(self, file: str) -> str:
+        try:
+            with open(file, 'rb') as f:
+                header: bytes = f.read(self.magic_length)
+        except OSError:
+            return None
+
+        # the first matched wins, so more specific signatures go first
+        for kind, parts in self.magic:
+            if all(header[offset:offset+len(b)] == b for offset, b in parts):
+                return kind
+        return None
+
+
+if __name__ == "__main__":
+    file_types = ExifToolGUIFileTypes.Instance
+
+    for file in ExifToolGUIConfigs.Instance.files:
+        print(file_types.classify(file), file)
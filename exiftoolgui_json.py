@@ -0,0 +1,140 @@
+import json
+import re
+from typing import Any, Callable, Union
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+class ExifToolGUIJson:
+    '''
+    Decoders of ExifTool's JSON output, all keeping numbers as their original strings
+    (ExifTool leaves number-like values unquoted, and trailing zeros would be lost otherwise).
+
+        stdlib: json with str as number hooks, by a decoder built once instead of per call.
+        msgspec: optional, faster. Floats are passed to a hook as their original text, integers are
+            turned back into strings, which is exact since JSON integers have a single form (but "-0").
+            The gain is modest, since the C scanner of stdlib does well with str as hooks.
+
+    "auto" picks the fastest one installed. A decoder falls back to stdlib whenever it fails.
+    '''
+
+    decoder_stdlib = json.JSONDecoder(parse_float=str, parse_int=str)
+    RE_NEGATIVE_ZERO = re.compile(r'-0\s*[,\]}]')
+    decoder_msgspec = msgspec.json.Decoder(float_hook=str) if msgspec != None else None
+
+    decoders: dict[str, Callable[[str], Any]] = {}
+
+    @staticmethod
+    def Register(name: str, loads: Callable[[str], Any]) -> None:
+        ExifToolGUIJson.decoders[name] = loads
+
+    @staticmethod
+    def Get(name: str = 'auto') -> Callable[[str], Any]:
+        if name == 'auto':
+            for name_ in ('msgspec', 'stdlib'):
+                if name_ in ExifToolGUIJson.decoders:
+                    return ExifToolGUIJson.decoders[name_]
+        decoder = ExifToolGUIJson.decoders.get(name, None)
+        if decoder == None:
+            print(f"ExifToolGUIJson: decoder '{name}' is not available, stdlib is used")
+            return ExifToolGUIJson.decoders['stdlib']
+        return decoder
+
+    @staticmethod
+    def Loads_Stdlib(s: str) -> Any:
+        return ExifToolGUIJson.decoder_stdlib.decode(s)
+
+    @staticmethod
+    def Loads_Msgspec(s: str) -> Any:
+        try:
+            o = ExifToolGUIJson.decoder_msgspec.decode(s)
+        except (msgspec.DecodeError, ValueError):
+            return ExifToolGUIJson.Loads_Stdlib(s)
+        if type(o) is not list and type(o) is not dict:
+            return ExifToolGUIJson.Loads_Stdlib(s)
+        if ExifToolGUIJson.Stringify_Ints(o) and ExifToolGUIJson.RE_NEGATIVE_ZERO.search(s):
+            # "-0" came back as "0"
+            return ExifToolGUIJson.Loads_Stdlib(s)
+        return o
+
+    @staticmethod
+    def Stringify_Ints(o: Union[list, dict]) -> bool:
+        '''
+        Turn ints in o into strings in place, return whether any zero is found.
+        '''
+        zero: bool = False
+        for k, v in (o.items() if type(o) is dict else enumerate(o)):
+            t = type(v)
+            if t is str:
+                continue
+            if t is int:
+                o[k] = str(v)
+                if v == 0:
+                    zero = True
+            elif t is dict or t is list:
+                if ExifToolGUIJson.Stringify_Ints(v):
+                    zero = True
+        return zero
+
+
+ExifToolGUIJson.Register('stdlib', ExifToolGUIJson.Loads_Stdlib)
+if msgspec != None:
+    ExifToolGUIJson.Register('msgspec', ExifToolGUIJson.Loads_Msgspec)
+
+
+if __name__ == "__main__":
+    '''
+    Conformance of every decoder against stdlib, then decoding speed.
+    Usage: python exiftoolgui_json.py [recorded.json ...]
+    Record outputs by i.e.: exiftool -j -G:0:1:2:3:4:5:6:7 -a -s -struct <dir> > recorded.json
+    '''
+    import sys
+    import timeit
+
+    # tricky cases, besides recorded outputs
+    samples: list[str] = [
+        '[{"SourceFile": "a.jpg", "EXIF:FNumber": 2.80, "EXIF:ISO": 100, "EXIF:Exp": -0.30, "EXIF:Big": 1.5e+10, "EXIF:Zero": 0}]',
+        '[{"SourceFile": "b.jpg", "XMP:Subject": [1, "b", 2.50], "XMP:Struct": {"A": 10, "B": [{"C": 3.0, "D": -7}]}}]',
+        '[{"SourceFile": "c.jpg", "EXIF:Comment": "ratio: 1, 2", "EXIF:Note": "x\\": 5, \\"y", "EXIF:List": "[1,2]"}]',
+        '[{"SourceFile": "d.jpg", "EXIF:Artist": "\\u00e9\\u4e2d", "EXIF:Bool": true, "EXIF:None": null, "EXIF:Empty": ""}]',
+        '[{"SourceFile": "e.jpg",\n  "EXIF:NegZero": -0,\n  "EXIF:Huge": 123456789012345678901234567890}]',
+        '[{"SourceFile": "f.jpg",\n  "EXIF:Version": 0230,\n  "EXIF:Ok": 1}]',  # invalid JSON, all should fail alike
+    ]
+    for file in sys.argv[1:]:
+        with open(file, encoding='utf-8') as f:
+            samples.append(f.read())
+
+    def decode(loads: Callable[[str], Any], s: str) -> Any:
+        try:
+            return loads(s)
+        except ValueError as e:
+            return ValueError
+
+    failed: int = 0
+    for name, loads in ExifToolGUIJson.decoders.items():
+        for i, s in enumerate(samples):
+            expected = decode(ExifToolGUIJson.Loads_Stdlib, s)
+            result = decode(loads, s)
+            if result != expected:
+                failed += 1
+                print(f"{name}: sample {i} differs\n  expected {str(expected)[:200]}\n  got      {str(result)[:200]}")
+    print(f"conformance: {'OK' if failed == 0 else f'{failed} failed'}, decoders {list(ExifToolGUIJson.decoders.keys())}")
+
+    # a full dump of a file, when nothing recorded is given
+    if len(sys.argv) <= 1:
+        metadata = {'SourceFile': '/photos/IMG_0001.jpg'}
+        for t in range(300):
+            metadata[f"EXIF:IFD0:Image:Main:Tag{t}"] = [f"text value {t}", f"Canon EOS {t}", f"{t}.50", f"2024:01:01 10:00:{t % 60:02d}-05:00", f"{t % 5}", f"{t} mm"][t % 6]
+        s = json.dumps([metadata], indent=2)
+        s = re.sub(r'"(-?[0-9]+(?:\.[0-9]+)?)"', r'\1', s)  # unquote numbers, like ExifTool
+        samples = [s]
+
+    size: int = sum(len(s) for s in samples)
+    candidates: dict[str, Callable[[str], Any]] = {'json.loads (before)': lambda s: json.loads(s, parse_float=str, parse_int=str)}
+    candidates.update(ExifToolGUIJson.decoders)
+    for name, loads in candidates.items():
+        elapsed = min(timeit.repeat(lambda: [decode(loads, s) for s in samples], number=100, repeat=5)) / 100
+        print(f"{name:20s} {size / 2**10:8.1f} KB: {elapsed * 1000:8.3f} ms, {size / 2**20 / elapsed:6.1f} MB/s")
@@ -0,0 +1,353 @@
+from collections import Counter, deque
+import ast
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+
+class ExifToolGUIProfiler:
+    '''
+    Sampling profiler of all threads, and memory snapshots grouped by subsystem, for bug reports.
+
+    Turned on by "profile" or the environment variable EXIFTOOLGUI_PROFILE (which wins, "0" turns it off).
+    Reports are written next to exiftoolgui.log every "profile_interval" seconds and on exit:
+        exiftoolgui_profile.txt      threads, UI stalls, top functions, memory by subsystem
+        exiftoolgui_profile.folded   stacks in the folded format of flame graph tools (i.e. speedscope)
+
+    Stacks are sampled every SAMPLE_INTERVAL by wall clock, so waiting (on ExifTool, on a lock) counts.
+    The UI thread is idle while its innermost frame is the one calling the event loop, see mark_idle.
+    Busy stretches of the UI thread longer than STALL are kept as stalls, with their most sampled stack.
+
+    Memory is traced by tracemalloc, and allocations are grouped by the innermost frame matching SUBSYSTEMS.
+    Pixmaps and Qt items live in memory Python doesn't trace, so the GUI measures them, see measure.
+    '''
+    _instance: 'ExifToolGUIProfiler' = None
+
+    @classmethod
+    @property
+    def Instance(cls) -> 'ExifToolGUIProfiler':
+        if cls._instance == None:
+            cls._instance = cls()
+        return cls._instance
+
+    SAMPLE_INTERVAL: float = 0.01
+    STALL: float = 0.2
+    MAX_DEPTH: int = 64
+    TRACE_FRAMES: int = 10
+
+    # (subsystem, file, function qualname prefix), '' for any function of the file, the first matching wins.
+    # Matched by the functions allocating what a subsystem holds (i.e. values decoded from ExifTool's output
+    # end up in the pool), the rest of GUI and data fall into "gui:other" and "data:other", anything else "other"
+    SUBSYSTEMS: list[tuple[str, str, str]] = [
+        ('cache_preview', 'exiftoolgui.py', 'GetPreviewTask.'),
+        ('qt_items', 'exiftoolgui.py', 'ExifToolGUI.set_row_for_group'),
+        ('qt_items', 'exiftoolgui.py', 'ExifToolGUI.edit_row_for_group'),
+        ('qt_items', 'exiftoolgui.py', 'ExifToolGUI.reload_tree_for_single'),
+        ('cache_pool', 'exiftoolgui_cache_pool.py', ''),
+        ('cache_pool', 'exiftoolgui_record.py', ''),
+        ('cache_pool', 'exiftoolgui_json.py', 'ExifToolGUIJson.Loads'),
+        ('cache_pool', 'exiftoolgui_data.py', 'ExifToolGUIData.File_Key'),
+        ('cache_pool', 'exiftoolgui_data.py', 'ExifToolGUIData.Get_Key'),
+        ('cache_pool', 'exiftoolgui_data.py', 'ExifToolGUIData.Get_Record'),
+        ('cache_pool', 'exiftoolgui_data.py', 'ExifToolGUIData.append_files'),
+        ('cache_pool', 'exiftoolgui_data.py', 'ExifToolGUIData.release_files'),
+        ('cache_pool', 'exiftoolgui_data.py', 'ExifToolGUIData.refresh_batch'),
+        ('cache_pool', 'exiftoolgui_data.py', 'ExifToolGUIData.complete_batch'),
+        ('cache_pool', 'exiftoolgui_data.py', 'ExifToolGUIData.load_batch'),
+        ('cache_pool', 'exiftoolgui_data.py', 'ExifToolGUIData.read_tags_batch'),
+        ('name_index', 'exiftoolgui_data.py', 'ExifToolGUIData.get_name_index'),
+        ('name_index', 'exiftoolgui_data.py', 'ExifToolGUIData.claim_file_name'),
+        ('tag_defs', 'exiftool_tag_defs.py', ''),
+        ('dir_index', 'exiftoolgui_dir_index.py', ''),
+        ('dir_index', 'exiftoolgui_watchdog.py', ''),
+        ('gui:other', 'exiftoolgui.py', ''),
+        ('data:other', 'exiftoolgui_data.py', ''),
+    ]
+
+    # innermost frames of threads waiting for work, left out of top functions of workers
+    WAITING: tuple[str, ...] = ('threading.py', 'queue.py', 'selectors.py')
+
+    def __init__(self) -> None:
+        from exiftoolgui_configs import ExifToolGUIConfigs
+        from exiftoolgui_log import ExifToolGUILog
+        configs = ExifToolGUIConfigs.Instance
+
+        env: str = os.environ.get('EXIFTOOLGUI_PROFILE', None)
+        self.enabled: bool = configs.profile if env == None else env.strip().lower() not in ('', '0', 'false', 'off')
+        self.interval: float = configs.profile_interval
+
+        dir: str = os.path.dirname(os.path.abspath(ExifToolGUILog.Instance.source_file))
+        self.file_report: str = os.path.join(dir, 'exiftoolgui_profile.txt')
+        self.file_folded: str = os.path.join(dir, 'exiftoolgui_profile.folded')
+
+        self.locker = threading.Lock()
+        self.stopped = threading.Event()
+        self.started: float = None
+
+        self.samples: Counter[str] = Counter()  # by thread
+        self.waiting: Counter[str] = Counter()  # by thread
+        self.stacks: Counter[tuple[str, ...]] = Counter()  # thread, outermost frame, ..., innermost frame
+        self.self_lines: dict[str, Counter[str]] = {'ui': Counter(), 'workers': Counter()}
+        self.total_functions: dict[str, Counter[str]] = {'ui': Counter(), 'workers': Counter()}
+
+        self.idle_codes: set = set()
+        self.stall_started: float = None
+        self.stall_stacks: Counter[tuple[str, ...]] = Counter()
+        self.stalls: deque[tuple[float, float, tuple[str, ...]]] = deque(maxlen=20)
+
+        self.memory: deque[tuple[float, dict[str, int]]] = deque(maxlen=120)
+        self.memory_lines: list[tuple[str, int, int]] = []
+        self.native: dict[str, float] = {}
+
+    '''################################################################
+    Control
+    ################################################################'''
+
+    def start(self) -> None:
+        if not self.enabled or self.started != None:
+            return
+        self.started = time.time()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(ExifToolGUIProfiler.TRACE_FRAMES)
+        threading.Thread(target=self.run_sampler, name='ExifToolGUIProfiler:sampler', daemon=True).start()
+        threading.Thread(target=self.run_writer, name='ExifToolGUIProfiler:writer', daemon=True).start()
+        atexit.register(self.stop)
+        print(f"ExifToolGUIProfiler: profiling, see {self.file_report}")
+
+    def stop(self) -> None:
+        if self.started == None or self.stopped.is_set():
+            return
+        self.stopped.set()
+        self.snapshot_memory()
+        self.write()
+
+    def mark_idle(self) -> None:
+        '''
+        Called on the UI thread right before the event loop, by the function running it.
+        '''
+        self.idle_codes.add(sys._getframe(1).f_code)
+
+    def measure(self, name: str, value: float) -> None:
+        '''
+        A measure of memory not traced by Python, i.e. bytes of pixmaps or number of Qt items.
+        '''
+        self.native[name] = value
+
+    '''################################################################
+    CPU
+    ################################################################'''
+
+    def run_sampler(self) -> None:
+        ident_self: int = threading.get_ident()
+        ident_main: int = threading.main_thread().ident
+        while not self.stopped.wait(ExifToolGUIProfiler.SAMPLE_INTERVAL):
+            names: dict[int, str] = {t.ident: t.name for t in threading.enumerate() if not isinstance(t, threading._DummyThread)}
+            now: float = time.time()
+            frames = sys._current_frames()
+            with self.locker:
+                for ident, frame in frames.items():
+                    if ident == ident_self:
+                        continue
+                    if ident == ident_main:
+                        self.sample_ui(frame, now)
+                    else:
+                        self.sample_worker(frame, names.get(ident, None))
+            del frames
+
+    def sample_ui(self, frame, now: float) -> None:
+        self.samples['ui'] += 1
+        if frame.f_code in self.idle_codes:
+            self.waiting['ui'] += 1
+            self.end_stall(now)
+            return
+        stack: tuple[str, ...] = ExifToolGUIProfiler.Stack(frame)
+        self.add_stack('ui', stack, frame)
+        if self.stall_started == None:
+            self.stall_started = now
+        self.stall_stacks[stack] += 1
+
+    def end_stall(self, now: float) -> None:
+        if self.stall_started == None:
+            return
+        duration: float = now - self.stall_started
+        if duration >= ExifToolGUIProfiler.STALL:
+            self.stalls.append((self.stall_started, duration, self.stall_stacks.most_common(1)[0][0]))
+        self.stall_started = None
+        self.stall_stacks.clear()
+
+    def sample_worker(self, frame, name: str) -> None:
+        stack: tuple[str, ...] = ExifToolGUIProfiler.Stack(frame)
+        if name == None:
+            # threads started by Qt (i.e. QThreadPool), named by the function they run
+            name = f"pool:{stack[0].split(':', 1)[-1]}"
+        self.samples[name] += 1
+        if os.path.basename(frame.f_code.co_filename) in ExifToolGUIProfiler.WAITING:
+            self.waiting[name] += 1
+            self.stacks[(name,) + stack] += 1
+            return
+        self.add_stack('workers', stack, frame, name)
+
+    def add_stack(self, group: str, stack: tuple[str, ...], frame, name: str = None) -> None:
+        self.stacks[(name if name != None else group,) + stack] += 1
+        self.self_lines[group][f"{stack[-1]}:{frame.f_lineno}"] += 1
+        self.total_functions[group].update(set(stack))
+
+    @staticmethod
+    def Stack(frame) -> tuple[str, ...]:
+        stack: list[str] = []
+        while frame != None and len(stack) < ExifToolGUIProfiler.MAX_DEPTH:
+            code = frame.f_code
+            # co_qualname is new in 3.11
+            stack.append(f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}")
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+    '''################################################################
+    Memory
+    ################################################################'''
+
+    def snapshot_memory(self) -> None:
+        if not tracemalloc.is_tracing():
+            return
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        groups: Counter[str] = Counter()
+        for stat in snapshot.statistics('traceback'):
+            groups[ExifToolGUIProfiler.Subsystem(stat.traceback)] += stat.size
+        lines = [(f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}", stat.size, stat.count)
+                 for stat in snapshot.statistics('lineno')[:20]]
+        with self.locker:
+            self.memory.append((time.time(), dict(groups)))
+            self.memory_lines = lines
+
+    @staticmethod
+    def Subsystem(traceback: tracemalloc.Traceback) -> str:
+        # frames of a traceback are ordered from the outermost to the innermost
+        for frame in reversed(traceback):
+            file: str = os.path.basename(frame.filename)
+            for subsystem, file_s, prefix in ExifToolGUIProfiler.SUBSYSTEMS:
+                if file == file_s and (prefix == '' or ExifToolGUIProfiler.Qualname(frame.filename, frame.lineno).startswith(prefix)):
+                    return subsystem
+        return 'other'
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def Qualname(file: str, lineno: int) -> str:
+        for start, end, qualname in ExifToolGUIProfiler.Functions(file):
+            if start <= lineno <= end:
+                return qualname
+        return ''
+
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def Functions(file: str) -> list[tuple[int, int, str]]:
+        '''
+        Line ranges of functions of a source file, innermost first.
+        '''
+        try:
+            with open(file, encoding='utf-8') as f:
+                tree = ast.parse(f.read())
+        except (OSError, SyntaxError, ValueError):
+            return []
+
+        functions: list[tuple[int, int, str]] = []
+
+        def visit(node, prefix: str):
+            for child in ast.iter_child_nodes(node):
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    qualname: str = prefix + child.name
+                    if not isinstance(child, ast.ClassDef):
+                        functions.append((child.lineno, child.end_lineno, qualname))
+                    visit(child, qualname + '.')
+                else:
+                    visit(child, prefix)
+        visit(tree, '')
+        functions.sort(key=lambda f: f[1] - f[0])
+        return functions
+
+    '''################################################################
+    Report
+    ################################################################'''
+
+    def run_writer(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.snapshot_memory()
+            self.write()
+
+    def report(self) -> str:
+        now: float = time.time()
+        with self.locker:
+            samples: Counter[str] = Counter(self.samples)
+            waiting: Counter[str] = Counter(self.waiting)
+            stalls: list[tuple[float, float, tuple[str, ...]]] = list(self.stalls)
+            if self.stall_started != None and now - self.stall_started >= ExifToolGUIProfiler.STALL:
+                stalls.append((self.stall_started, now - self.stall_started, self.stall_stacks.most_common(1)[0][0]))
+            self_lines: dict[str, list[tuple[str, int]]] = {g: c.most_common(25) for g, c in self.self_lines.items()}
+            total_functions: dict[str, list[tuple[str, int]]] = {g: c.most_common(25) for g, c in self.total_functions.items()}
+            busy: dict[str, int] = {g: sum(c.values()) for g, c in self.self_lines.items()}
+            memory: list[tuple[float, dict[str, int]]] = list(self.memory)
+            memory_lines: list[tuple[str, int, int]] = list(self.memory_lines)
+            native: dict[str, float] = dict(self.native)
+
+        def strftime(t: float) -> str:
+            return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(t))
+
+        lines: list[str] = [
+            f"ExifToolGUI profile, pid {os.getpid()}, python {sys.version.split()[0]}, {sys.platform}",
+            f"since {strftime(self.started)}, written {strftime(now)}, sampled every {ExifToolGUIProfiler.SAMPLE_INTERVAL * 1000:g} ms",
+            '',
+            '== Threads',
+            f"{'thread':48s} {'samples':>9s} {'busy':>7s} {'waiting':>8s}",
+        ]
+        for name, count in samples.most_common():
+            busy_t: int = busy['ui'] if name == 'ui' else count - waiting[name]
+            lines.append(f"{name:48s} {count:9d} {busy_t / count * 100:6.1f}% {waiting[name] / count * 100:7.1f}%")
+
+        lines += ['', f"== UI stalls over {ExifToolGUIProfiler.STALL * 1000:g} ms, with the stack sampled most"]
+        for started, duration, stack in stalls:
+            lines.append(f"{strftime(started)} {duration:8.3f} s  {' > '.join(stack[-8:])}")
+
+        for group in ('ui', 'workers'):
+            lines += ['', f"== Top functions ({group}), of {busy[group]} busy samples", f"{'self':>7s}  line"]
+            for line, count in self_lines[group]:
+                lines.append(f"{count / max(busy[group], 1) * 100:6.1f}%  {line}")
+            lines += ['', f"{'total':>7s}  function"]
+            for function, count in total_functions[group]:
+                lines.append(f"{count / max(busy[group], 1) * 100:6.1f}%  {function}")
+
+        subsystems: list[str] = list(dict.fromkeys([s for s, _, _ in ExifToolGUIProfiler.SUBSYSTEMS] + ['other']))
+        lines += ['', '== Memory traced by tracemalloc, by subsystem (MB)', f"{'time':19s} " + ' '.join(f"{s:>13s}" for s in subsystems + ['total'])]
+        for t, groups in memory:
+            values: list[float] = [groups.get(s, 0) for s in subsystems] + [sum(groups.values())]
+            lines.append(f"{strftime(t)} " + ' '.join(f"{v / 1024 / 1024:13.2f}" for v in values))
+
+        lines += ['', '== Memory not traced, measured by the GUI (latest)']
+        for name, value in sorted(native.items()):
+            lines.append(f"{name:48s} {value}")
+
+        lines += ['', '== Memory traced, top lines (latest)', f"{'MB':>9s} {'blocks':>9s}  line"]
+        for line, size, count in memory_lines:
+            lines.append(f"{size / 1024 / 1024:9.3f} {count:9d}  {line}")
+
+        return '\n'.join(lines) + '\n'
+
+    def folded(self) -> str:
+        with self.locker:
+            stacks: list[tuple[tuple[str, ...], int]] = list(self.stacks.items())
+        return ''.join(f"{';'.join(stack)} {count}\n" for stack, count in stacks)
+
+    def write(self) -> None:
+        try:
+            for file, content in ((self.file_report, self.report()), (self.file_folded, self.folded())):
+                with open(file + '.tmp', 'w', encoding='utf-8') as f:
+                    f.write(content)
+                os.replace(file + '.tmp', file)
+        except OSError as e:
+            print(f"ExifToolGUIProfiler:Error:{type(e).__name__}: {e}")
@@ -0,0 +1,307 @@
+from collections.abc import MutableMapping
+import re
+import sys
+import threading
+from typing import Callable, Iterator
+import weakref
+
+
+class ExifToolGUISchema:
+    '''
+    Ordered tag keys shared by metadata of the same layout (i.e. files from the same camera model).
+    Keys are interned, and schemas are shared, so that a file only holds its values.
+    Adding or removing a key moves metadata to another schema, transitions are cached.
+
+    Schemas are held weakly (by the registry and by transitions), and live as long as metadata uses them,
+    since files of varied layouts would leave one schema per file behind. Their memory is charged to the
+    metadata using them, see ExifToolGUIMetadata.Sizeof.
+    '''
+    __slots__ = ('keys', 'index', 'index_n', 'transitions', '__weakref__')
+
+    registry: weakref.WeakValueDictionary[tuple[str, ...], 'ExifToolGUISchema'] = weakref.WeakValueDictionary()
+    registry_locker = threading.Lock()
+
+    def __init__(self, keys: tuple[str, ...]) -> None:
+        self.keys: tuple[str, ...] = keys
+        self.index: dict[str, int] = {key: i for i, key in enumerate(keys)}
+        self.index_n: dict[str, list[int]] = None  # normalised tag -> positions, built on demand
+        self.transitions: weakref.WeakValueDictionary[str, 'ExifToolGUISchema'] = None  # built on demand
+
+    @staticmethod
+    def Of(keys: tuple[str, ...]) -> 'ExifToolGUISchema':
+        schema = ExifToolGUISchema.registry.get(keys, None)
+        if schema != None:
+            return schema
+        with ExifToolGUISchema.registry_locker:
+            schema = ExifToolGUISchema.registry.get(keys, None)
+            if schema == None:
+                keys = tuple(sys.intern(key) for key in keys)
+                schema = ExifToolGUISchema(keys)
+                ExifToolGUISchema.registry[keys] = schema
+            return schema
+
+    def with_key(self, key: str) -> 'ExifToolGUISchema':
+        transitions = self.transitions
+        if transitions == None:
+            transitions = self.transitions = weakref.WeakValueDictionary()
+        schema = transitions.get(key, None)
+        if schema == None:
+            schema = ExifToolGUISchema.Of(self.keys + (key,))
+            transitions[key] = schema
+        return schema
+
+    def without_key(self, key: str) -> 'ExifToolGUISchema':
+        return ExifToolGUISchema.Of(tuple(k for k in self.keys if k != key))
+
+    def find(self, tag_n: str, normalise: Callable[[str], str]) -> list[int]:
+        '''
+        Positions of keys whose normalised form is tag_n, in order.
+        '''
+        index_n = self.index_n
+        if index_n == None:
+            index_n = {}
+            for i, key in enumerate(self.keys):
+                index_n.setdefault(normalise(key), []).append(i)
+            self.index_n = index_n
+        return index_n.get(tag_n, [])
+
+    def sizeof(self) -> int:
+        # keys are interned, and shared with other schemas holding them
+        size: int = sys.getsizeof(self) + sys.getsizeof(self.keys) + sys.getsizeof(self.index)
+        if self.index_n != None:
+            size += sys.getsizeof(self.index_n) + sum(sys.getsizeof(positions) for positions in self.index_n.values())
+        if self.transitions != None:
+            size += sys.getsizeof(self.transitions.data)
+        return size
+
+
+class ExifToolGUIMetadata(MutableMapping):
+    '''
+    Dict-like metadata of a file: a shared schema of keys plus a list of values.
+    '''
+    __slots__ = ('_schema', '_values')
+
+    def __init__(self, items: dict[str, ] = None) -> None:
+        items = items if items != None else {}
+        self._schema: ExifToolGUISchema = ExifToolGUISchema.Of(tuple(items.keys()))
+        self._values: list = list(items.values())
+
+    def __getitem__(self, key: str):
+        i = self._schema.index.get(key, None)
+        if i == None:
+            raise KeyError(key)
+        return self._values[i]
+
+    def __setitem__(self, key: str, value) -> None:
+        i = self._schema.index.get(key, None)
+        if i != None:
+            self._values[i] = value
+            return
+        self._schema = self._schema.with_key(key)
+        self._values.append(value)
+
+    def __delitem__(self, key: str) -> None:
+        i = self._schema.index[key]
+        self._schema = self._schema.without_key(key)
+        del self._values[i]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._schema.keys)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._schema.index
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+    def __reduce__(self):
+        # rebuilt through the registry, so schemas stay shared after unpickling
+        return (ExifToolGUIMetadata, (dict(self.items()),))
+
+    def get(self, key: str, default=None):
+        i = self._schema.index.get(key, None)
+        return default if i == None else self._values[i]
+
+    def keys(self) -> list[str]:
+        return list(self._schema.keys)
+
+    def values(self) -> list:
+        return list(self._values)
+
+    def items(self) -> list[tuple[str, ]]:
+        # a copy, so that it's safe to modify metadata while iterating
+        return list(zip(self._schema.keys, self._values))
+
+    def clear(self) -> None:
+        self._schema = ExifToolGUISchema.Of(())
+        self._values = []
+
+    def copy(self) -> 'ExifToolGUIMetadata':
+        metadata = ExifToolGUIMetadata()
+        metadata._schema = self._schema
+        metadata._values = list(self._values)
+        return metadata
+
+    def find(self, tag_n: str, normalise: Callable[[str], str]) -> list[tuple[str, ]]:
+        keys = self._schema.keys
+        return [(keys[i], self._values[i]) for i in self._schema.find(tag_n, normalise)]
+
+    @staticmethod
+    def Sizeof(metadata: 'ExifToolGUIMetadata') -> int:
+        # values, and a share of the schema among metadata using it (references but the ones of this call)
+        schema = metadata._schema
+        users: int = max(1, sys.getrefcount(schema) - 2)
+        size: int = sys.getsizeof(metadata) + sys.getsizeof(metadata._values) + schema.sizeof() // users
+        for value in metadata._values:
+            size += sys.getsizeof(value)
+        return size
+
+
+class ExifToolGUIBinary(str):
+    '''
+    Handle of a binary value in metadata, standing for its bytes (or their base64).
+    It reads as ExifTool's placeholder, "(Binary data N bytes, use -b option to extract)",
+    and the bytes are fetched on demand, see ExifToolGUIData.load_binary.
+    '''
+
+    RE_PLACEHOLDER = re.compile(r'\(Binary data (\d+) bytes')
+    INLINE_BYTES: int = 1024  # base64 values up to this size are kept as they are
+
+    def __new__(cls, file: str, tag: str, size: int) -> 'ExifToolGUIBinary':
+        handle = super().__new__(cls, f"(Binary data {size} bytes, use -b option to extract)")
+        handle.file = file
+        handle.tag = tag
+        handle.size = size
+        return handle
+
+    def __getnewargs__(self) -> tuple[str, str, int]:
+        return (self.file, self.tag, self.size)
+
+    @staticmethod
+    def Of(file: str, tag: str, value) -> 'ExifToolGUIBinary':
+        '''
+        A handle for the value if it's binary, otherwise None.
+        '''
+        if type(value) is not str:
+            return None
+        if value.startswith('(Binary data '):
+            match = ExifToolGUIBinary.RE_PLACEHOLDER.match(value)
+            if match != None:
+                return ExifToolGUIBinary(file, tag, int(match.group(1)))
+        elif value.startswith('base64:') and len(value) > ExifToolGUIBinary.INLINE_BYTES:
+            size = (len(value) - 7) * 3 // 4 - value.count('=', -2)
+            return ExifToolGUIBinary(file, tag, size)
+        return None
+
+    @staticmethod
+    def Bind(metadata: dict[str, ]) -> None:
+        '''
+        Replace binary values of metadata with handles, in place.
+        '''
+        file: str = metadata.get('SourceFile', None)
+        for tag, value in metadata.items():
+            handle = ExifToolGUIBinary.Of(file, tag, value)
+            if handle != None:
+                metadata[tag] = handle
+
+
+class ExifToolGUIFileRecord:
+    '''
+    Saved, edited and failed state of a file, cached as a whole.
+    Metadata is partial if it's read by a fast tier (see ExifToolGUIData.refresh_batch).
+    '''
+    __slots__ = ('metadata', 'edited', 'failed', 'partial')
+
+    def __init__(self, metadata: ExifToolGUIMetadata, edited: dict[str, str] = None, failed: dict[str, str] = None) -> None:
+        self.metadata: ExifToolGUIMetadata = metadata
+        self.edited: dict[str, str] = edited if edited != None else {}
+        self.failed: dict[str, str] = failed if failed != None else {}
+        self.partial: bool = False
+
+    @staticmethod
+    def Sizeof(record: 'ExifToolGUIFileRecord') -> int:
+        size: int = sys.getsizeof(record) + ExifToolGUIMetadata.Sizeof(record.metadata)
+        for state in (record.edited, record.failed):
+            size += sys.getsizeof(state)
+            for tag, value in state.items():
+                size += sys.getsizeof(tag) + sys.getsizeof(value)
+        return size
+
+
+class ExifToolGUIRecordView:
+    '''
+    List-like view of one field of records, i.e. `cache[file_index]` for `records[file_index].metadata`.
+    '''
+    __slots__ = ('records', 'field')
+
+    def __init__(self, records: list[ExifToolGUIFileRecord], field: str) -> None:
+        self.records: list[ExifToolGUIFileRecord] = records
+        self.field: str = field
+
+    def __getitem__(self, file_index: int):
+        return getattr(self.records[file_index], self.field)
+
+    def __setitem__(self, file_index: int, value) -> None:
+        setattr(self.records[file_index], self.field, value)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator:
+        field = self.field
+        return (getattr(record, field) for record in self.records)
+
+
+if __name__ == "__main__":
+    '''
+    Memory of metadata for 50k files, as plain dicts (keys decoded per file, like json does)
+    against compact records, with layouts shared by camera models, and with a layout per file
+    (tags present or not by file). Usage: python exiftoolgui_record.py [files] [tags]
+    '''
+    import gc
+    import random
+    import time
+    import tracemalloc
+
+    count_files: int = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    count_tags: int = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    layouts: int = 8  # i.e. camera models
+
+    def fake_metadata(i: int, varied: bool) -> dict[str, ]:
+        layout = i % layouts
+        metadata = {'SourceFile': f"/photos/{i // 1000:03d}/IMG_{i:06d}.jpg"}
+        # one tag in 8 is missing by file, so that every file has its own layout
+        missing: set[int] = set(random.Random(i).sample(range(count_tags), count_tags // 8)) if varied else set()
+        for t in range(count_tags):
+            if t in missing:
+                continue
+            # new key objects for every file
+            metadata[''.join(['EXIF:IFD0:Main:', 'Model', str(layout), ':Tag', str(t), ':Image:Camera:Main'])] = f"{i}-{t}"
+        return metadata
+
+    def measure(name: str, varied: bool, build: Callable[[dict[str, ]], object], sizeof: Callable[[object], int]) -> None:
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        cache = [build(fake_metadata(i, varied)) for i in range(count_files)]
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        charged: int = sum(sizeof(item) for item in cache)
+        print(f"{name:8s} {'varied' if varied else 'shared'} {count_files} files x {count_tags} tags: "
+              f"{current / 2**20:8.1f} MB held, {charged / 2**20:8.1f} MB charged, "
+              f"{len(ExifToolGUISchema.registry)} schemas, {elapsed:.2f}s")
+        del cache
+
+    def sizeof_dict(item: tuple[dict[str, ], dict, dict]) -> int:
+        size: int = sum(sys.getsizeof(part) for part in item)
+        for key, value in item[0].items():
+            size += sys.getsizeof(key) + sys.getsizeof(value)
+        return size
+
+    for varied in (False, True):
+        measure("dict", varied, lambda metadata: (metadata, {}, {}), sizeof_dict)
+        measure("record", varied, lambda metadata: ExifToolGUIFileRecord(ExifToolGUIMetadata(metadata)), ExifToolGUIFileRecord.Sizeof)
@@ -0,0 +1,390 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import inspect
+import json
+import os
+import secrets
+import sys
+import threading
+import urllib.request
+from typing import Any, Callable
+
+
+class ExifToolGUIServiceError(Exception):
+    '''
+    A JSON-RPC error, raised by the client for an error response, and by methods of the service
+    for invalid params (beyond their signature).
+    '''
+
+    PARSE_ERROR: int = -32700
+    INVALID_REQUEST: int = -32600
+    METHOD_NOT_FOUND: int = -32601
+    INVALID_PARAMS: int = -32602
+    SERVER_ERROR: int = -32000
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(f"{code}: {message}")
+        self.code: int = code
+        self.message: str = message
+
+
+class ExifToolGUIService:
+    '''
+    Local service sharing a single ExifToolGUIData (file records, caches, and ExifTool processes,
+    see "exiftool_processes") among clients, by JSON-RPC 2.0 over HTTP on localhost:
+
+        POST / {"jsonrpc": "2.0", "method": "read", "params": {"files": [...]}, "id": 1}
+
+    Files are addressed by path. They are added to the service's file list when first used, and
+    stay there, so that edits are kept until saved, whoever made them. Requests are served by a
+    thread each, and data guards itself.
+
+    The port and a token are written to the service file (user-only permissions), clients read
+    it to find the service and pass the token as the 'X-ExifToolGUI-Token' header.
+    '''
+
+    def __init__(self, port: int = 0, service_file: str = None) -> None:
+        from exiftoolgui_configs import ExifToolGUIConfigs
+        from exiftoolgui_data import ExifToolGUIData
+        from exiftoolgui_functions import ExifToolGUIFuncs
+
+        self.configs: ExifToolGUIConfigs = ExifToolGUIConfigs.Instance
+        self.data: ExifToolGUIData = ExifToolGUIData.Instance
+        self.funcs: ExifToolGUIFuncs = ExifToolGUIFuncs.Instance
+
+        self.token: str = secrets.token_urlsafe(24)
+        self.service_file: str = service_file if service_file else self.configs.file_service
+
+        self.indexes: dict[str, int] = {}  # {normalised file: file_index}
+        self.indexes_files: dict[int, str] = {}  # {file_index: normalised file}, to move files renamed
+        self.indexes_locker = threading.Lock()
+
+        self.methods: dict[str, Callable[..., Any]] = {
+            'read': self.read,
+            'edit': self.edit,
+            'unsaved': self.unsaved,
+            'save': self.save,
+            'exec': self.exec,
+            'forget': self.forget,
+            'status': self.status,
+        }
+
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                if not secrets.compare_digest(self.headers.get('X-ExifToolGUI-Token', '').encode('utf-8'), service.token.encode('utf-8')):
+                    self.send_error(403)
+                    return
+                body: bytes = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                response: bytes = json.dumps(service.handle(body), ensure_ascii=False).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+        self.port: int = self.server.server_address[1]
+
+    def serve_forever(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.service_file)), exist_ok=True)
+        fd = os.open(self.service_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'port': self.port, 'token': self.token, 'pid': os.getpid()}, f)
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            try:
+                os.remove(self.service_file)
+            except OSError:
+                pass
+
+    def shutdown(self) -> None:
+        self.server.shutdown()
+
+    '''################################################################
+    JSON-RPC
+    ################################################################'''
+
+    def handle(self, body: bytes) -> dict[str, ]:
+        try:
+            request = json.loads(body)
+        except ValueError as e:
+            return ExifToolGUIService.Error(None, ExifToolGUIServiceError.PARSE_ERROR, str(e))
+
+        id = request.get('id', None) if isinstance(request, dict) else None
+        if not isinstance(request, dict) or request.get('jsonrpc', None) != '2.0' or not isinstance(request.get('method', None), str):
+            return ExifToolGUIService.Error(id, ExifToolGUIServiceError.INVALID_REQUEST, 'not a JSON-RPC 2.0 request')
+
+        method = self.methods.get(request['method'], None)
+        if method == None:
+            return ExifToolGUIService.Error(id, ExifToolGUIServiceError.METHOD_NOT_FOUND, f"no method '{request['method']}', expected: {', '.join(self.methods.keys())}")
+
+        params = request.get('params', {})
+        try:
+            if isinstance(params, list):
+                bound = inspect.signature(method).bind(*params)
+            elif isinstance(params, dict):
+                bound = inspect.signature(method).bind(**params)
+            else:
+                return ExifToolGUIService.Error(id, ExifToolGUIServiceError.INVALID_REQUEST, 'params are neither an array nor an object')
+        except TypeError as e:
+            return ExifToolGUIService.Error(id, ExifToolGUIServiceError.INVALID_PARAMS, str(e))
+
+        try:
+            result = method(*bound.args, **bound.kwargs)
+        except ExifToolGUIServiceError as e:
+            return ExifToolGUIService.Error(id, e.code, e.message)
+        except Exception as e:
+            self.data.log.append(f'ExifToolGUI:Error:{type(e).__name__}:Service:{request["method"]}', '', str(e))
+            return ExifToolGUIService.Error(id, ExifToolGUIServiceError.SERVER_ERROR, f"{type(e).__name__}: {e}")
+        return {'jsonrpc': '2.0', 'result': result, 'id': id}
+
+    @staticmethod
+    def Error(id, code: int, message: str) -> dict[str, ]:
+        return {'jsonrpc': '2.0', 'error': {'code': code, 'message': message}, 'id': id}
+
+    '''################################################################
+    Files
+    ################################################################'''
+
+    @staticmethod
+    def Normalise_File(file: str) -> str:
+        return os.path.normcase(os.path.abspath(file))
+
+    def file_indexes(self, files: list[str]) -> list[int]:
+        '''
+        File indexes of files, files not listed yet are appended (not loaded). Files renamed by saving
+        are addressed by their new paths (see reindex), paths neither listed nor existing are invalid.
+        Not to be called holding data's locker, which append_files takes after indexes_locker.
+        '''
+        with self.indexes_locker:
+            files_new: list[str] = []
+            for file in files:
+                file_n = ExifToolGUIService.Normalise_File(file)
+                if file_n in self.indexes or file_n in files_new:
+                    continue
+                if not os.path.isfile(file_n):
+                    raise ExifToolGUIServiceError(ExifToolGUIServiceError.INVALID_PARAMS, f"no such file: {file}")
+                files_new.append(file_n)
+            if files_new:
+                for file_n, file_index in zip(files_new, self.data.append_files([os.path.abspath(file) for file in files_new])):
+                    self.indexes[file_n] = file_index
+                    self.indexes_files[file_index] = file_n
+            return [self.indexes[ExifToolGUIService.Normalise_File(file)] for file in files]
+
+    def file_index(self, file: str) -> int:
+        return self.file_indexes([file])[0]
+
+    def reindex(self, file_indexes: list[int]) -> None:
+        '''
+        Address files by their paths after saving, which renames or moves files of FileName or Directory edited.
+        '''
+        with self.indexes_locker:
+            with self.data.locker:
+                files: list[str] = [self.data.cache[file_index]['SourceFile'] for file_index in file_indexes]
+            for file_index, file in zip(file_indexes, files):
+                file_n = ExifToolGUIService.Normalise_File(file)
+                file_n_old = self.indexes_files.get(file_index, None)
+                if file_n_old == file_n:
+                    continue
+                if file_n_old != None and self.indexes.get(file_n_old, None) == file_index:
+                    del self.indexes[file_n_old]
+                self.indexes[file_n] = file_index
+                self.indexes_files[file_index] = file_n
+
+    def ensure_loaded(self, file_indexes: list[int]) -> None:
+        # files modified since loaded are read again, so are the ones never loaded
+        self.data.refresh_batch(file_indexes, force=False)
+
+    '''################################################################
+    Methods
+    ################################################################'''
+
+    def read(self, files: list[str], tags: list[str] = None) -> dict[str, dict[str, ]]:
+        '''
+        Metadata of files, all tags or the ones given (virtual tags included), with unsaved edits applied.
+        '''
+        file_indexes = self.file_indexes(files)
+        self.ensure_loaded(file_indexes)
+
+        results: dict[str, dict[str, ]] = {}
+        with self.data.locker:
+            for file, file_index in zip(files, file_indexes):
+                if tags == None:
+                    metadata = dict(self.data.cache[file_index].items())
+                    metadata.update(self.data.cache_edited[file_index])
+                else:
+                    metadata = {tag: self.data.get(file_index, tag) for tag in tags}
+                results[file] = metadata
+        return results
+
+    def edit(self, file: str, tags: dict[str, str], save: bool = False) -> dict[str, str]:
+        '''
+        Edit tags of a file, saved at once if asked. Return tags failed.
+        Values are strings, numbers are taken as their text.
+        '''
+        for tag, value in tags.items():
+            if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+                raise ExifToolGUIServiceError(ExifToolGUIServiceError.INVALID_PARAMS, f"value of '{tag}' is not a string or a number: {json.dumps(value)}")
+
+        file_index = self.file_index(file)
+        self.ensure_loaded([file_index])
+        with self.data.locker:
+            for tag, value in tags.items():
+                self.data.edit(file_index, tag, str(value))
+        if save:
+            self.data.save([file_index])
+            self.reindex([file_index])
+        return dict(self.data.cache_failed[file_index])
+
+    def unsaved(self, files: list[str] = None) -> dict[str, dict[str, str]]:
+        file_indexes = self.file_indexes(files) if files != None else range(0, len(self.data.cache))
+        with self.data.locker:
+            unsaved = self.data.cache_unsaved
+            return {self.data.cache[file_index]['SourceFile']: unsaved[file_index] for file_index in file_indexes if unsaved[file_index]}
+
+    def save(self, files: list[str] = None) -> dict[str, dict[str, str]]:
+        '''
+        Save edits of files, or all. Return tags failed of each file saved.
+        '''
+        file_indexes = self.file_indexes(files) if files != None else range(0, len(self.data.cache))
+        with self.data.locker:
+            file_indexes = [file_index for file_index in file_indexes if self.data.cache_edited[file_index]]
+        self.data.save(file_indexes)
+        self.reindex(file_indexes)
+        with self.data.locker:
+            return {self.data.cache[file_index]['SourceFile']: dict(self.data.cache_failed[file_index]) for file_index in file_indexes}
+
+    def exec(self, function: str, files: list[str], params: dict[str, ] = None, ref: str = None) -> dict[str, dict[str, str]]:
+        '''
+        Run a function of ExifToolGUIFuncs over files (parameters default as in configs).
+        Return edits made by it, of files it edited.
+        '''
+        if function not in self.funcs.funcs:
+            raise ExifToolGUIServiceError(ExifToolGUIServiceError.INVALID_PARAMS, f"no function '{function}', expected: {', '.join(self.funcs.funcs.keys())}")
+        file_indexes = self.file_indexes(files)
+        ref_index: int = self.file_index(ref) if ref else file_indexes[0]
+        self.ensure_loaded(file_indexes + [ref_index])
+
+        param_defs: dict[str, dict[str, ]] = self.configs.functions[function]
+        params = params if params else {}
+        for name in params:
+            if name not in param_defs:
+                raise ExifToolGUIServiceError(ExifToolGUIServiceError.INVALID_PARAMS, f"unknown parameter '{name}' of {function}, expected: {', '.join(param_defs.keys())}")
+
+        args: dict[str, ] = {name: param_def['default'] for name, param_def in param_defs.items()}
+        args.update(params)
+        args['file_indexes'] = file_indexes
+        args['ref'] = ref_index
+        with self.data.locker:
+            self.check_ref(function, args)
+            # edits left by others are not returned, only the ones made (or changed) by the function
+            edited_before: list[dict[str, str]] = [dict(self.data.cache_edited[file_index]) for file_index in file_indexes]
+            self.funcs.Exec(function, args)
+
+            results: dict[str, dict[str, str]] = {}
+            for file_index, edited in zip(file_indexes, edited_before):
+                made = {tag: value for tag, value in self.data.cache_edited[file_index].items() if edited.get(tag, None) != value}
+                if made:
+                    results[self.data.cache[file_index]['SourceFile']] = made
+            return results
+
+    def check_ref(self, function: str, args: dict[str, ]) -> None:
+        # functions read the reference file as they are, a value missing would fail halfway
+        if function == 'shift_datetime' and args['to_datetime']:
+            ref, tag, default_timezone = args['ref'], args['tag'], args['default_timezone']
+            if self.data.get_datetime(ref, tag, None, default_timezone=default_timezone)[0] == None:
+                raise ExifToolGUIServiceError(ExifToolGUIServiceError.INVALID_PARAMS, f"reference file has no datetime of '{tag}': {self.data.cache[ref]['SourceFile']}")
+            if self.data.get_datetime(ref, tag, args['to_datetime'], default_timezone=default_timezone)[0] == None:
+                raise ExifToolGUIServiceError(ExifToolGUIServiceError.INVALID_PARAMS, f"to_datetime is not a datetime: {args['to_datetime']}")
+
+    def forget(self, files: list[str] = None) -> int:
+        '''
+        Drop unsaved edits of files, or all. Return the number of files reset.
+        '''
+        file_indexes = self.file_indexes(files) if files != None else range(0, len(self.data.cache))
+        with self.data.locker:
+            file_indexes = [file_index for file_index in file_indexes if self.data.cache_edited[file_index]]
+            for file_index in file_indexes:
+                self.data.reset(file_index)
+        return len(file_indexes)
+
+    def status(self) -> dict[str, ]:
+        from exiftoolgui_data import ExifToolGUIData
+        return {
+            'files': len(self.data.cache),
+            'unsaved': sum(1 for unsaved in self.data.cache_unsaved if unsaved),
+            'processes': max(1, len(self.data.drivers)),
+            'quarantined': len(self.data.quarantine),
+            'cache': ExifToolGUIData.cache_pool.report(),
+        }
+
+
+class ExifToolGUIServiceClient:
+    '''
+    Client of ExifToolGUIService, found by its service file unless a port and token are given.
+
+        client = ExifToolGUIServiceClient()
+        client.call('read', files=['/photos/a.jpg'], tags=['EXIF:DateTimeOriginal'])
+    '''
+
+    def __init__(self, port: int = None, token: str = None, service_file: str = None, timeout: float = None) -> None:
+        if port == None or token == None:
+            if service_file == None:
+                from exiftoolgui_configs import ExifToolGUIConfigs
+                service_file = ExifToolGUIConfigs.Instance.file_service
+            with open(service_file, encoding='utf-8') as f:
+                info: dict[str, ] = json.load(f)
+            port = port if port != None else info['port']
+            token = token if token != None else info['token']
+
+        self.url: str = f"http://127.0.0.1:{port}/"
+        self.token: str = token
+        self.timeout: float = timeout
+        self._id: int = 0
+        self._id_locker = threading.Lock()
+
+    def call(self, method: str, **params) -> Any:
+        with self._id_locker:
+            self._id += 1
+            id = self._id
+        body: bytes = json.dumps({'jsonrpc': '2.0', 'method': method, 'params': params, 'id': id}).encode('utf-8')
+        request = urllib.request.Request(self.url, body, {'Content-Type': 'application/json', 'X-ExifToolGUI-Token': self.token})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            reply: dict[str, ] = json.loads(response.read())
+        if 'error' in reply:
+            raise ExifToolGUIServiceError(reply['error']['code'], reply['error']['message'])
+        return reply['result']
+
+
+if __name__ == "__main__":
+    '''
+    Usage:
+        python exiftoolgui_service.py serve [port]
+        python exiftoolgui_service.py call <method> [json params]
+        i.e. python exiftoolgui_service.py call read '{"files": ["/photos/a.jpg"], "tags": ["EXIF:Make"]}'
+    '''
+    # configs are relative to the program, paths are better passed as absolute ones
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    command: str = sys.argv[1] if len(sys.argv) > 1 else 'serve'
+    if command == 'serve':
+        service = ExifToolGUIService(int(sys.argv[2]) if len(sys.argv) > 2 else 0)
+        print(f"ExifToolGUIService: serving on 127.0.0.1:{service.port} ({service.service_file})", flush=True)
+        try:
+            service.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    elif command == 'call':
+        client = ExifToolGUIServiceClient()
+        params: dict[str, ] = json.loads(sys.argv[3]) if len(sys.argv) > 3 else {}
+        print(json.dumps(client.call(sys.argv[2], **params), ensure_ascii=False, indent=4))
+    else:
+        print(f"unknown command '{command}', expected: serve, call")
+        sys.exit(2)
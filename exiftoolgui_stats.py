@@ -0,0 +1,253 @@
+from collections import deque
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from typing import Callable
+
+
+class ExifToolGUITimer:
+    '''
+    Count, total and maximum of a timed operation, and its recent durations for percentiles.
+    '''
+    __slots__ = ('count', 'total', 'max', 'recent')
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+        self.recent: deque[float] = deque(maxlen=512)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.recent.append(seconds)
+
+    def summary(self) -> dict[str, float]:
+        recent: list[float] = sorted(self.recent)
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0,
+            'p50_ms': round(recent[len(recent) // 2] * 1000, 3) if recent else 0,
+            'p95_ms': round(recent[min(len(recent) - 1, len(recent) * 95 // 100)] * 1000, 3) if recent else 0,
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+
+class ExifToolGUIStopwatch:
+    __slots__ = ('stats', 'name', 'started')
+
+    def __init__(self, stats: 'ExifToolGUIStats', name: str) -> None:
+        self.stats: ExifToolGUIStats = stats
+        self.name: str = name
+
+    def __enter__(self) -> 'ExifToolGUIStopwatch':
+        self.started: float = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stats.observe(self.name, time.perf_counter() - self.started)
+
+
+class ExifToolGUINullStopwatch:
+    __slots__ = ()
+
+    def __enter__(self) -> 'ExifToolGUINullStopwatch':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+class ExifToolGUIStats:
+    '''
+    Timers, counters and gauges of hot paths, named by "<subsystem>:<operation>", i.e.
+        exiftool:read:load      ExifTool calls, by process name
+        cache:metadata          hits and misses, as "<name>:hit" and "<name>:miss"
+        queue:preview           tasks waiting in a thread pool
+        ui:on_batchLoaded       durations of slots
+
+    Collecting is off unless "stats" is set (or turned on in the stats panel). When off, timing is
+    a check of `enabled` returning a shared no-op stopwatch, and counting is a check alone.
+    Levels (queue depths) are always kept, since they can't be rebuilt when turned on later.
+
+    With "stats_interval" > 0, a snapshot is written to the stats file as JSON that often.
+    '''
+    _instance: 'ExifToolGUIStats' = None
+
+    @classmethod
+    @property
+    def Instance(cls) -> 'ExifToolGUIStats':
+        if cls._instance == None:
+            cls._instance = cls()
+        return cls._instance
+
+    NULL_STOPWATCH: ExifToolGUINullStopwatch = ExifToolGUINullStopwatch()
+
+    def __init__(self) -> None:
+        from exiftoolgui_configs import ExifToolGUIConfigs
+        configs = ExifToolGUIConfigs.Instance
+
+        self.enabled: bool = configs.stats
+        self.started: float = time.time()
+        self.locker = threading.Lock()
+
+        self.timers: dict[str, ExifToolGUITimer] = {}
+        self.counters: dict[str, int] = {}
+        self.levels: dict[str, int] = {}
+        self.gauges: dict[str, Callable[[], float]] = {}
+
+        self.file: str = configs.file_stats
+        self.interval: float = configs.stats_interval
+        self.dumper: threading.Thread = None
+        self.stopped = threading.Event()
+        if self.interval > 0:
+            self.dumper = threading.Thread(target=self.run_dumper, name='ExifToolGUIStats', daemon=True)
+            self.dumper.start()
+            atexit.register(self.dump_periodic)
+
+    '''################################################################
+    Collect
+    ################################################################'''
+
+    def time(self, name: str):
+        '''
+        Context manager timing a block: with stats.time('exiftool:read:load'): ...
+        '''
+        if not self.enabled:
+            return ExifToolGUIStats.NULL_STOPWATCH
+        return ExifToolGUIStopwatch(self, name)
+
+    def observe(self, name: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self.locker:
+            timer = self.timers.get(name, None)
+            if timer == None:
+                timer = self.timers[name] = ExifToolGUITimer()
+            timer.add(seconds)
+
+    def count(self, name: str, n: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self.locker:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def hit(self, name: str, hit: bool, n: int = 1) -> None:
+        if not self.enabled:
+            return
+        self.count(f"{name}:{'hit' if hit else 'miss'}", n)
+
+    def level(self, name: str, delta: int) -> None:
+        with self.locker:
+            self.levels[name] = self.levels.get(name, 0) + delta
+
+    def set_level(self, name: str, value: int) -> None:
+        '''
+        Set a level known by other means, i.e. a queue emptied without its items being counted off.
+        '''
+        with self.locker:
+            self.levels[name] = value
+
+    def gauge(self, name: str, read: Callable[[], float]) -> None:
+        '''
+        A value read when a snapshot is taken, i.e. the size of a cache.
+        '''
+        self.gauges[name] = read
+
+    def reset(self) -> None:
+        with self.locker:
+            self.timers.clear()
+            self.counters.clear()
+            self.started = time.time()
+
+    @staticmethod
+    def Timed(name: str = None) -> Callable:
+        '''
+        Decorator timing a function (i.e. a slot), as "ui:<function name>" unless named.
+        '''
+        def decorator(func: Callable) -> Callable:
+            name_t: str = name if name != None else f"ui:{func.__name__}"
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                stats = ExifToolGUIStats.Instance
+                if not stats.enabled:
+                    return func(*args, **kwargs)
+                with ExifToolGUIStopwatch(stats, name_t):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    '''################################################################
+    Report
+    ################################################################'''
+
+    def snapshot(self) -> dict[str, ]:
+        with self.locker:
+            timers: dict[str, dict[str, float]] = {name: timer.summary() for name, timer in sorted(self.timers.items())}
+            counters: dict[str, int] = dict(sorted(self.counters.items()))
+            levels: dict[str, int] = dict(sorted(self.levels.items()))
+
+        hit_rates: dict[str, float] = {}
+        for name, hits in counters.items():
+            if name.endswith(':hit'):
+                misses: int = counters.get(name[:-4] + ':miss', 0)
+                hit_rates[name[:-4]] = round(hits / (hits + misses), 4)
+        for name in counters:
+            if name.endswith(':miss') and name[:-5] not in hit_rates:
+                hit_rates[name[:-5]] = 0.0
+
+        gauges: dict[str, float] = {}
+        for name, read in sorted(self.gauges.items()):
+            try:
+                gauges[name] = read()
+            except Exception as e:
+                gauges[name] = f"{type(e).__name__}: {e}"
+
+        return {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'since': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(self.started)),
+            'enabled': self.enabled,
+            'timers': timers,
+            'counters': counters,
+            'hit_rates': dict(sorted(hit_rates.items())),
+            'levels': levels,
+            'gauges': gauges,
+        }
+
+    def report(self) -> str:
+        snapshot: dict[str, ] = self.snapshot()
+        lines: list[str] = [f"since {snapshot['since']}, collecting {'on' if self.enabled else 'off'}", '']
+        lines.append(f"{'timer':48s} {'count':>7s} {'total ms':>11s} {'mean':>9s} {'p50':>9s} {'p95':>9s} {'max':>9s}")
+        for name, t in snapshot['timers'].items():
+            lines.append(f"{name:48s} {t['count']:7d} {t['total_ms']:11.1f} {t['mean_ms']:9.2f} {t['p50_ms']:9.2f} {t['p95_ms']:9.2f} {t['max_ms']:9.2f}")
+        lines.append('')
+        for name, rate in snapshot['hit_rates'].items():
+            lines.append(f"{name:48s} hit rate {rate * 100:6.1f}%")
+        for name, value in list(snapshot['counters'].items()) + list(snapshot['levels'].items()) + list(snapshot['gauges'].items()):
+            lines.append(f"{name:48s} {value}")
+        return '\n'.join(lines)
+
+    def dump(self, file: str = None) -> None:
+        file = file if file != None else self.file
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(file)), exist_ok=True)
+            with open(file + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=4)
+            os.replace(file + '.tmp', file)
+        except OSError as e:
+            print(f"ExifToolGUIStats:Error:{type(e).__name__}: {e}")
+
+    def dump_periodic(self) -> None:
+        if self.enabled:
+            self.dump()
+
+    def run_dumper(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.dump_periodic()
@@ -0,0 +1,97 @@
+from contextlib import contextmanager
+import threading
+import time
+from typing import Callable, Iterator
+
+
+class ExifToolTimeoutError(Exception):
+    '''
+    An ExifTool call exceeded its deadline, the process was killed.
+    '''
+
+    def __init__(self, timeout: float) -> None:
+        super().__init__(f"no response in {timeout:g}s")
+        self.timeout: float = timeout
+
+
+class ExifToolGUIWatchdog:
+    '''
+    A single thread watching the deadline of the running ExifTool call.
+
+    When a deadline passes, `on_timeout` is called from the watchdog thread, and it's supposed to
+    kill the process, so that the blocked call returns (by raising). The call then raises
+    ExifToolTimeoutError instead, whatever it raised.
+
+    Calls are expected to be serialised by the caller, only one deadline is armed at a time.
+    '''
+
+    def __init__(self, on_timeout: Callable[[], None]) -> None:
+        self.on_timeout: Callable[[], None] = on_timeout
+
+        self._cond = threading.Condition()
+        self._deadline: float = None  # monotonic
+        self._generation: int = 0
+        self._fired: int = -1  # generation fired
+
+        self._thread: threading.Thread = None
+
+    def start(self) -> None:
+        if self._thread == None:
+            self._thread = threading.Thread(target=self.run, name='ExifToolGUIWatchdog', daemon=True)
+            self._thread.start()
+
+    def run(self) -> None:
+        with self._cond:
+            while True:
+                if self._deadline == None:
+                    self._cond.wait()
+                    continue
+
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+
+                # expired, and still armed
+                self._fired = self._generation
+                self._deadline = None
+                try:
+                    self.on_timeout()
+                except Exception as e:
+                    print(f"ExifToolGUIWatchdog:Error:{type(e).__name__}: {e}")
+
+    @contextmanager
+    def guard(self, timeout: float) -> Iterator[None]:
+        '''
+        Run the block with a deadline, no deadline if timeout <= 0.
+        '''
+        if timeout == None or timeout <= 0:
+            yield
+            return
+
+        self.start()
+        with self._cond:
+            self._generation += 1
+            generation = self._generation
+            self._deadline = time.monotonic() + timeout
+            self._cond.notify()
+
+        try:
+            yield
+        except Exception as e:
+            if self.disarm(generation):
+                raise ExifToolTimeoutError(timeout) from e
+            raise
+
+        if self.disarm(generation):
+            # the call returned, but only because the process was killed
+            raise ExifToolTimeoutError(timeout)
+
+    def disarm(self, generation: int) -> bool:
+        '''
+        Return whether the deadline of the generation has fired.
+        '''
+        with self._cond:
+            if self._generation == generation:
+                self._deadline = None
+            return self._fired == generation